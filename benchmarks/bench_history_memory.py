@@ -0,0 +1,109 @@
+"""
+Memory / latency benchmark: deque-of-dicts history vs columnar HistoryBuffer.
+
+Run from the project root:
+  python -m benchmarks.bench_history_memory --keys 300 --points 2000
+
+Reports traced bytes per stored point for both layouts and the time to read the newest
+200 points, which is what /prices/history does by default.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+from market_realtime_dashboard.history import HistoryBuffer, factor_codes
+from smart_market_stream.core.impact_engine import compute_impact
+
+
+def _points(n: int):
+    # a realistic mix of changed / unchanged prices, computed once and reused by both layouts
+    base = datetime(2025, 1, 1)
+    prev = None
+    out = []
+    for i in range(n):
+        price = 15000.0 + (i % 37) * 25.0
+        r = compute_impact(prev_price=prev, new_price=price)
+        out.append((base + timedelta(seconds=2 * i), price, r))
+        prev = price
+    return out
+
+
+def build_dicts(keys: int, points):
+    store = {}
+    for k in range(keys):
+        dq = deque(maxlen=len(points))
+        market_id = f"PASAR-{k:05d}"
+        for ts, price, r in points:
+            dq.append({
+                "timestamp": ts,
+                "market_id": market_id,
+                "commodity": "cabai",
+                "price": price,
+                "region": "JAKARTA",
+                "price_change": r.price_change,
+                "impact_score": r.impact_score,
+                "dominant_factor": r.dominant_factor,
+                # the realtime manager stored a fresh dict per point
+                "factors_with_weights": dict(r.factors_with_weights),
+            })
+        store[(market_id, "cabai", "JAKARTA")] = dq
+    return store
+
+
+def build_columnar(keys: int, points):
+    store = {}
+    for k in range(keys):
+        buf = HistoryBuffer(len(points))
+        for i, (ts, price, r) in enumerate(points, 1):
+            buf.append(ts.timestamp(), price, r.price_change, r.impact_score, factor_codes.code(r.dominant_factor), i)
+        store[(f"PASAR-{k:05d}", "cabai", "JAKARTA")] = buf
+    return store
+
+
+def measure(builder, keys: int, points):
+    tracemalloc.start()
+    store = builder(keys, points)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, current
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("bench-history-memory")
+    p.add_argument("--keys", type=int, default=300, help="number of (market, commodity, region) series")
+    p.add_argument("--points", type=int, default=2000, help="points per series (history capacity)")
+    p.add_argument("--limit", type=int, default=200, help="points read per history query")
+    args = p.parse_args()
+
+    points = _points(args.points)
+    total = args.keys * args.points
+
+    dicts, dict_bytes = measure(build_dicts, args.keys, points)
+    cols, col_bytes = measure(build_columnar, args.keys, points)
+
+    print(f"series={args.keys} points/series={args.points} total points={total}")
+    print(f"deque of dicts : {dict_bytes / 1e6:10.1f} MB  ({dict_bytes / total:7.1f} B/point)")
+    print(f"columnar ring  : {col_bytes / 1e6:10.1f} MB  ({col_bytes / total:7.1f} B/point)")
+    print(f"ratio          : {dict_bytes / max(col_bytes, 1):10.1f}x")
+
+    key = next(iter(dicts))
+    n = 2000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        list(dicts[key])[-args.limit:]
+    t_dict = (time.perf_counter() - t0) / n
+    buf = cols[key]
+    t0 = time.perf_counter()
+    for _ in range(n):
+        lo, hi = buf.tail(args.limit)
+        buf.columns(lo, hi)
+    t_col = (time.perf_counter() - t0) / n
+    print(f"last {args.limit} points: deque {t_dict * 1e6:8.1f} us  columnar {t_col * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Latency benchmark: scalar compute_impact loop vs vectorized compute_impact_batch.
+
+Run from the project root:
+  python -m benchmarks.bench_impact_batch --n 10000 50000 200000
+
+For each size it reports the scalar loop, the batch arrays alone and the batch including
+rounded() (the Python lists the realtime manager stores), and checks that both paths give
+identical rounded values.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from smart_market_stream.core.impact_engine import compute_impact, compute_impact_batch
+
+
+def _prices(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    prev, new = [], []
+    for _ in range(n):
+        p = rnd.choice([None, rnd.uniform(1000, 30000)])
+        # about a third unchanged, like repeated device readings
+        q = p if p is not None and rnd.random() < 0.3 else rnd.uniform(1000, 30000)
+        prev.append(p)
+        new.append(q)
+    return prev, new
+
+
+def _best(fn, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("bench-impact-batch")
+    p.add_argument("--n", type=int, nargs="+", default=[10000, 100000], help="prices per run")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    for n in args.n:
+        prev, new = _prices(n)
+        prev_arr = np.array([math.nan if v is None else v for v in prev])
+        new_arr = np.array(new)
+
+        t_scalar = _best(lambda: [compute_impact(a, b) for a, b in zip(prev, new)], args.repeat)
+        t_arrays = _best(lambda: compute_impact_batch(prev_arr, new_arr), args.repeat)
+        t_rounded = _best(lambda: compute_impact_batch(prev_arr, new_arr).rounded(), args.repeat)
+
+        scalar = [compute_impact(a, b) for a, b in zip(prev, new)]
+        changes, scores, dominants = compute_impact_batch(prev_arr, new_arr).rounded()
+        mismatches = sum(
+            (r.price_change, r.impact_score, r.dominant_factor) != (c, s, d)
+            for r, c, s, d in zip(scalar, changes, scores, dominants)
+        )
+
+        print(f"n={n}")
+        print(f"  scalar loop      : {t_scalar * 1e3:9.2f} ms  ({t_scalar / n * 1e9:7.1f} ns/price)")
+        print(f"  batch (arrays)   : {t_arrays * 1e3:9.2f} ms  ({t_arrays / n * 1e9:7.1f} ns/price)  {t_scalar / t_arrays:6.1f}x")
+        print(f"  batch + rounded  : {t_rounded * 1e3:9.2f} ms  ({t_rounded / n * 1e9:7.1f} ns/price)  {t_scalar / t_rounded:6.1f}x")
+        print(f"  mismatches       : {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Latency benchmark and differential check: list-based validation detectors vs RollingWindow.
+
+Run from the project root:
+  python -m benchmarks.bench_validation_window --n 20000 --window 500
+or as a script (python benchmarks/bench_validation_window.py ...).
+
+Replays the same synthetic price stream (noisy readings around a drifting price, with
+spikes and repeated readings) through the previous per-check path (copy the deque, then
+statistics / sorted + numpy.percentile) and through RollingWindow, and reports the time per
+check and the number of prices where any detector verdict or the quarantine decision differs.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+
+if __package__ in (None, ""):
+    # run as a script: make the project root importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smart_market_platform.validation_engine.engine import ai_anomaly_detector, iqr_outlier, zscore_outlier
+from smart_market_platform.validation_engine.window import RollingWindow
+
+
+def _stream(n: int, seed: int = 11):
+    rnd = random.Random(seed)
+    base = 15000.0
+    out = []
+    for _ in range(n):
+        base *= 1 + rnd.gauss(0, 0.0005)
+        r = rnd.random()
+        if r < 0.02:
+            out.append(base * rnd.choice([0.3, 2.5, 4.0]))  # spike
+        elif r < 0.10 and out:
+            out.append(out[-1])  # repeated reading
+        else:
+            out.append(round(base * (1 + rnd.gauss(0, 0.02)), rnd.choice([0, 2])))
+    # per-price multi-source outcome, shared by both paths
+    sources_ok = [rnd.random() > 0.05 for _ in range(n)]
+    return out, sources_ok
+
+
+def _run(prices, sources_ok, window, as_list: bool):
+    verdicts = []
+    for value, multi_ok in zip(prices, sources_ok):
+        w = list(window) if as_list else window
+        z = bool(zscore_outlier(w, value))
+        iq = bool(iqr_outlier(w, value))
+        ai = bool(ai_anomaly_detector(w, value))
+        quarantined = sum((z, iq, ai, not multi_ok)) >= 2
+        if not quarantined:
+            window.append(value)
+        verdicts.append((z, iq, ai, quarantined))
+    return verdicts
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("bench-validation-window")
+    p.add_argument("--n", type=int, default=20000, help="prices to validate")
+    p.add_argument("--window", type=int, default=500, help="window length (STATS_WINDOW)")
+    args = p.parse_args()
+
+    prices, sources_ok = _stream(args.n)
+
+    t0 = time.perf_counter()
+    ref = _run(prices, sources_ok, deque(maxlen=args.window), as_list=True)
+    t_list = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = _run(prices, sources_ok, RollingWindow(args.window), as_list=False)
+    t_rolling = time.perf_counter() - t0
+
+    mismatches = sum(a != b for a, b in zip(ref, new))
+    print(f"n={args.n} window={args.window} quarantined={sum(v[3] for v in ref)}")
+    print(f"  list + statistics : {t_list * 1e3:9.2f} ms  ({t_list / args.n * 1e6:7.2f} us/check)")
+    print(f"  RollingWindow     : {t_rolling * 1e3:9.2f} ms  ({t_rolling / args.n * 1e6:7.2f} us/check)  {t_list / t_rolling:6.1f}x")
+    print(f"  verdict mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -43,7 +43,7 @@ class DeviceClient:
         self.mock = settings.MOCK if mock is None else mock
         self.interval = settings.INTERVAL if interval is None else interval
         self.token = load_token()
-        self.http_client = HTTPClient(token=self.token)
+        self.http_client = HTTPClient(token=self.token, requeue=self._requeue)
         self.mqtt_client = None
         if self.mode == "mqtt":
             self.mqtt_client = MQTTClient(device_id=self.device_id, token=self.token)
@@ -54,6 +54,13 @@ class DeviceClient:
         init_db()
         self._stop = False
 
+    @staticmethod
+    def _requeue(payloads) -> None:
+        # HTTPClient callback: payloads of a failed stream go back to the offline queue
+        for payload in payloads:
+            enqueue(payload)
+        logger.warning("Stream failed; %d unconfirmed payload(s) requeued", len(payloads))
+
     async def register(self, server_base: Optional[str] = None) -> Dict[str, Any]:
         """
         Registers device via platform register endpoint.
@@ -71,7 +78,7 @@ class DeviceClient:
                         save_token(token)
                         self.token = token
                         # reinitialize clients with token
-                        self.http_client = HTTPClient(token=self.token)
+                        self.http_client = HTTPClient(token=self.token, requeue=self._requeue)
                         if self.mode == "mqtt":
                             self.mqtt_client = MQTTClient(device_id=self.device_id, token=self.token)
                     return data
@@ -104,6 +111,14 @@ class DeviceClient:
                     enqueue(payload)
                     return False
                 return True
+            elif self.mode == "stream":
+                # one long-lived NDJSON request; payloads of a stream that fails are requeued
+                # (see _requeue) once the client learns about the failure
+                ok = await self.http_client.send_stream(payload)
+                if not ok:
+                    enqueue(payload)
+                    return False
+                return True
             else:
                 # mqtt
                 if not self.mqtt_client:
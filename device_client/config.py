@@ -24,8 +24,11 @@ class Settings:
     PLATFORM_HTTP_BASE: str = os.getenv("PLATFORM_HTTP_BASE", "http://localhost:6969")
     REGISTER_PATH: str = os.getenv("REGISTER_PATH", "/api/auth/device/register")
     INGEST_PATH: str = os.getenv("INGEST_PATH", "/ingest")
+    INGEST_STREAM_PATH: str = os.getenv("INGEST_STREAM_PATH", "/ingest/stream")
     VALIDATION_PATH: str = os.getenv("VALIDATION_PATH", "/api/validation/price/check")
-    MODE: str = os.getenv("MODE", "http")  # 'http' or 'mqtt'
+    MODE: str = os.getenv("MODE", "http")  # 'http', 'stream' or 'mqtt'
+    # 'stream' mode: readings per long-lived NDJSON request before it is closed and reopened
+    STREAM_ROTATE_LINES: int = int(os.getenv("STREAM_ROTATE_LINES", "1800"))
     INTERVAL: float = float(os.getenv("INTERVAL", "2.0"))
     DEVICE_ID: str = os.getenv("DEVICE_ID", "DEV-001")
     MARKET_ID: str = os.getenv("MARKET_ID", "PASAR-001")
@@ -1,25 +1,42 @@
 """
 HTTP client to send payloads to the platform ingest endpoint.
 Uses aiohttp for async requests and Authorization: Bearer <token>.
+
+Two transports:
+- send_ingest(): one POST /ingest per reading
+- send_stream(): readings written as NDJSON lines into one long-lived chunked POST /ingest/stream
 """
 from __future__ import annotations
 
-import asyncio
 import aiohttp
+import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
+
+from smart_market_stream.network.ndjson_stream import NDJSONStream
 
 from .config import settings
 
 logger = logging.getLogger("device_client.http")
 
 class HTTPClient:
-    def __init__(self, token: Optional[str] = None) -> None:
+    def __init__(self, token: Optional[str] = None, requeue: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> None:
         self.base = settings.PLATFORM_HTTP_BASE.rstrip("/")
         self.ingest_url = self.base + settings.INGEST_PATH
         self.validation_url = self.base + settings.VALIDATION_PATH
+        self.stream_url = self.base + settings.INGEST_STREAM_PATH
         self.token = token
         self._session: Optional[aiohttp.ClientSession] = None
+        # stream transport; payloads of a failed stream go to requeue(payloads), or into the next stream
+        self._stream = NDJSONStream(
+            self.stream_url,
+            self._session_get,
+            settings.STREAM_ROTATE_LINES,
+            headers={"Authorization": f"Bearer {token}"} if token else None,
+            requeue=requeue,
+            dumps=lambda payload: json.dumps(payload, ensure_ascii=False),
+            logger=logger,
+        )
 
     async def _session_get(self) -> aiohttp.ClientSession:
         if self._session:
@@ -41,6 +58,14 @@ class HTTPClient:
             logger.warning("HTTP ingest error: %s", exc)
             return False
 
+    async def send_stream(self, payload: Dict[str, Any]) -> bool:
+        """
+        Write payload as one NDJSON line into the long-lived stream request (opened on demand).
+        Payloads are confirmed per stream; see NDJSONStream for the retry/requeue rules.
+        """
+        self._stream.send(payload)
+        return True
+
     async def validate(self, market_id: str, commodity: str, price: float, region: Optional[str] = None) -> Dict[str, Any]:
         session = await self._session_get()
         headers = {"Content-Type": "application/json"}
@@ -53,7 +78,10 @@ class HTTPClient:
         except Exception as exc:
             logger.warning("Validation request failed: %s", exc)
             return {"error": str(exc)}
+
     async def close(self) -> None:
+        # end the stream body so the server can answer with its summary
+        await self._stream.close()
         if self._session:
             await self._session.close()
             self._session = None
\ No newline at end of file
@@ -25,7 +25,7 @@ def parse_args():
     p.add_argument("--port", type=int, default=None, help="Platform server port (used when --server is host without port)")
     p.add_argument("--device-id", type=str, default=None)
     p.add_argument("--market-id", type=str, default=None)
-    p.add_argument("--mode", choices=("http","mqtt"), default=None)
+    p.add_argument("--mode", choices=("http","stream","mqtt"), default=None)
     p.add_argument("--mock", type=str, default=None, help="Enable mock sensors true/false")
     p.add_argument("--interval", type=float, default=None, help="Send interval seconds")
     p.add_argument("--log", default=None, help="Logging level")
@@ -91,7 +91,7 @@ def interactive_menu(args):
         print(" 1) Set server URL / port")
         print(" 2) Set device id")
         print(" 3) Set market id")
-        print(" 4) Set mode (http/mqtt)")
+        print(" 4) Set mode (http/stream/mqtt)")
         print(" 5) Toggle mock sensors")
         print(" 6) Set interval (seconds)")
         print(" 7) Register device")
@@ -112,8 +112,8 @@ def interactive_menu(args):
         elif choice == "3":
             market_id = input("Market ID: ").strip() or market_id
         elif choice == "4":
-            m = input("Mode (http/mqtt): ").strip().lower()
-            if m in ("http","mqtt"):
+            m = input("Mode (http/stream/mqtt): ").strip().lower()
+            if m in ("http","stream","mqtt"):
                 mode = m
             else:
                 print("Invalid mode")
@@ -21,7 +21,7 @@ def parse_args():
     p.add_argument("--server", type=str, default=None, help="Platform server base URL for registration")
     p.add_argument("--device-id", type=str, default=None)
     p.add_argument("--market-id", type=str, default=None)
-    p.add_argument("--mode", choices=("http","mqtt"), default=None)
+    p.add_argument("--mode", choices=("http","stream","mqtt"), default=None)
     p.add_argument("--mock", type=str, default=None, help="Enable mock sensors true/false")
     p.add_argument("--interval", type=float, default=None, help="Send interval seconds")
     p.add_argument("--log", default=None, help="Logging level")
@@ -3,11 +3,14 @@ FastAPI application providing:
 
 - /ingest            POST  -> accept MarketDataStream payloads and store/broadcast prices
 - /prices/latest     GET   -> latest price per market (supports filters)
-- /prices/history    GET   -> historical price time-series for market+commodity (includes impact metadata)
+- /prices/history    GET   -> historical price time-series for market+commodity (includes impact metadata),
+                              optionally restricted to start/end or aggregated per bucket (OHLC)
 - /ws/prices         WebSocket -> real-time price updates (includes impact metadata)
+- /metrics/websocket GET   -> per-client send queue depth and drop counters
 """
 from __future__ import annotations
 
+import asyncio
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -17,8 +20,10 @@ from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
+from .encoding import negotiate
 from .manager import RealtimeManager
 from .models import IngestPayload
+from .rollups import ROLLUP_TIERS
 
 app = FastAPI(title="Market Realtime Dashboard")
 
@@ -99,11 +104,23 @@ async def prices_history(
     commodity: str = Query(...),
     region: Optional[str] = Query(None),
     limit: int = Query(200, ge=1, le=2000),
+    start: Optional[datetime] = Query(None, description="ISO timestamp, inclusive"),
+    end: Optional[datetime] = Query(None, description="ISO timestamp, inclusive"),
+    bucket: Optional[str] = Query(None, description="Aggregate into buckets: " + ", ".join(ROLLUP_TIERS)),
 ):
     """
     Return historical time-series for a given market and commodity (includes impact metadata).
+
+    - start/end restrict the time range (limit keeps the newest points/buckets of the range).
+    - bucket returns OHLC/mean/count aggregates per bucket from the maintained rollups
+      instead of raw points.
     """
-    items = manager.get_history(market_id=market_id, commodity=commodity, region=region, limit=limit)
+    if bucket is not None:
+        if bucket not in ROLLUP_TIERS:
+            raise HTTPException(status_code=400, detail=f"Invalid bucket; expected one of {', '.join(ROLLUP_TIERS)}")
+        items = manager.get_buckets(market_id=market_id, commodity=commodity, bucket=bucket, region=region, limit=limit, start=start, end=end)
+    else:
+        items = manager.get_history(market_id=market_id, commodity=commodity, region=region, limit=limit, start=start, end=end)
     # Convert timestamps to isoformat for JSON
     out = []
     for p in items:
@@ -114,6 +131,28 @@ async def prices_history(
     return JSONResponse(out)
 
 
+@app.get("/metrics/websocket")
+async def websocket_metrics():
+    """
+    Outbound websocket metrics: per-client queue depth (current / max), frames sent, frames
+    dropped and points coalesced by the overflow policy, plus totals since startup.
+    """
+    return JSONResponse(manager.sender_stats())
+
+
+def _flag(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+def _seq_param(value) -> Optional[int]:
+    try:
+        return None if value is None or value == "" else max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
 @app.websocket("/ws/prices")
 async def websocket_prices(websocket: WebSocket):
     """
@@ -123,12 +162,25 @@ async def websocket_prices(websocket: WebSocket):
     - market_id
     - commodity (comma-separated)
     - region
+    - conflate_ms: opt-in conflation; at most one update per market/commodity per window of
+      this many milliseconds, carrying only the latest value (0 / absent = every tick)
+    - snapshot=1: first send the latest point per matching market/commodity/region
+    - since_seq: first replay the points with seq greater than this (e.g. after a reconnect)
+    - encoding: json (default), compact, msgpack or cbor (see encoding.py). Non-json encodings
+      send positional rows with integer-coded market/commodity/region/factor and a
+      {"type":"dictionary",...} message before the first frame that uses new codes; msgpack
+      and cbor use binary frames and fall back to json when the library is not installed.
+      permessage-deflate is negotiated by the server (uvicorn --ws-per-message-deflate).
 
     Alternatively, client may send a subscribe JSON message after connecting:
-    {"action":"subscribe","market_id":"PASAR-001","commodities":["cabai","beras"],"region":"JAKARTA"}
+    {"action":"subscribe","market_id":"PASAR-001","commodities":["cabai","beras"],"region":"JAKARTA",
+     "conflate_ms":500,"snapshot":true,"since_seq":1234}
 
     Server will send messages:
-    {"type":"price_update","data":[{...}, ...]} where each item contains impact metadata.
+    {"type":"snapshot","seq":S,"data":[{...}, ...]}                                  (if requested)
+    {"type":"replay","since_seq":N,"seq":S,"truncated":false,"data":[{...}, ...]}    (if requested)
+    {"type":"price_update","data":[{...}, ...]} where each item contains impact metadata and seq.
+    Live updates always follow the snapshot/replay; points with seq <= S may appear in both.
     """
     await websocket.accept()
     # parse filters from query params
@@ -137,8 +189,10 @@ async def websocket_prices(websocket: WebSocket):
         "market_id": qs.get("market_id"),
         "region": qs.get("region"),
         "commodities": qs.get("commodity").split(",") if qs.get("commodity") else None,
+        "conflate_ms": qs.get("conflate_ms"),
+        "encoding": negotiate(qs.get("encoding")),
     }
-    client_id = await manager.register_client(websocket, filters)
+    client_id = await manager.register_client(websocket, filters, snapshot=_flag(qs.get("snapshot")), since_seq=_seq_param(qs.get("since_seq")))
     try:
         # Keep connection active; allow client to send subscription messages
         while True:
@@ -152,12 +206,11 @@ async def websocket_prices(websocket: WebSocket):
                             "market_id": msg.get("market_id"),
                             "region": msg.get("region"),
                             "commodities": msg.get("commodities"),
+                            "conflate_ms": msg.get("conflate_ms"),
                         }
-                        # update stored filters
-                        async with manager._lock:
-                            if client_id in manager._clients:
-                                ws, _ = manager._clients[client_id]
-                                manager._clients[client_id] = (ws, new_filters)
+                        await manager.update_filters(
+                            client_id, new_filters, snapshot=_flag(msg.get("snapshot")), since_seq=_seq_param(msg.get("since_seq"))
+                        )
                     # additional actions can be handled here
             except WebSocketDisconnect:
                 break
@@ -0,0 +1,178 @@
+"""
+Negotiated wire encodings for /ws/prices.
+
+- json    : default; one object per point, same shape as /prices/history items
+- compact : JSON text, each point as a positional row with integer-coded names
+- msgpack : compact rows packed with MessagePack (binary frames, optional dependency)
+- cbor    : compact rows packed with CBOR (binary frames, optional dependency)
+
+Compact rows follow ROW_FIELDS. market_id, commodity and region are codes into shared
+append-only NameCodes tables and the dominant factor is a history.factor_codes code;
+factors_with_weights is not repeated per point: a row's weights are those of its factor table
+(the per commodity/region override if one matches, else factor_weights) when its factor is
+not "none", all zero otherwise. The tables are sent to each client in a "dictionary" message
+before the first frame that uses a new code or after the factor tables were reloaded (see
+DictionaryCursor). A point tagged quarantined by the ingest validation stage has one extra
+trailing element, true (and seq null); untagged rows keep the ROW_FIELDS length.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .history import FACTOR_NONE, factor_codes
+
+from smart_market_stream.core.impact_engine import factor_tables
+
+try:
+    import msgpack  # type: ignore
+    _HAS_MSGPACK = True
+except Exception:
+    msgpack = None  # type: ignore
+    _HAS_MSGPACK = False
+
+try:
+    import cbor2  # type: ignore
+    _HAS_CBOR = True
+except Exception:
+    cbor2 = None  # type: ignore
+    _HAS_CBOR = False
+
+ENCODINGS = ("json", "compact", "msgpack", "cbor")
+
+ROW_FIELDS = ("seq", "ts", "market", "commodity", "region", "price", "price_change", "impact_score", "factor")
+
+
+def available_encodings() -> List[str]:
+    out = ["json", "compact"]
+    if _HAS_MSGPACK:
+        out.append("msgpack")
+    if _HAS_CBOR:
+        out.append("cbor")
+    return out
+
+
+def negotiate(requested: Optional[str]) -> str:
+    """Encoding to use for a client's request; unknown or unavailable encodings fall back to json."""
+    if requested and requested.lower() in available_encodings():
+        return requested.lower()
+    return "json"
+
+
+def pack(obj: Any, encoding: str):
+    """Serialize a message for a non-json encoding: str for compact, bytes for msgpack / cbor."""
+    if encoding == "compact":
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    if encoding == "msgpack":
+        return msgpack.packb(obj, use_bin_type=True)
+    if encoding == "cbor":
+        return cbor2.dumps(obj)
+    raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+class NameCodes:
+    """Append-only registry of names to integer codes."""
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        c = self._codes.get(name)
+        if c is None:
+            c = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return c
+
+
+# shared by every compact client so one encoded row serves all of them
+market_codes = NameCodes()
+commodity_codes = NameCodes()
+region_codes = NameCodes()
+
+
+# code tables in the order they appear in a "dictionary" message
+CODE_TABLES = (("markets", market_codes), ("commodities", commodity_codes), ("regions", region_codes), ("factors", factor_codes))
+
+# (version, factor_weights, factor_tables) for the current factor tables, built once per
+# reload and shared by every client's DictionaryCursor
+_factor_payload: Optional[Tuple[int, Dict[str, float], List[Dict[str, Any]]]] = None
+
+
+def _factor_tables_payload() -> Tuple[int, Dict[str, float], List[Dict[str, Any]]]:
+    global _factor_payload
+    version = factor_tables.version
+    if _factor_payload is None or _factor_payload[0] != version:
+        _factor_payload = (
+            version,
+            factor_tables.default.weights,
+            [
+                {"commodity": commodity, "region": region, "weights": table.weights}
+                for (commodity, region), table in factor_tables.overrides().items()
+            ],
+        )
+    return _factor_payload
+
+
+def compact_rows(points: Sequence[Dict[str, Any]]) -> List[list]:
+    """Positional rows (ROW_FIELDS order) for entry dicts as produced by the realtime manager."""
+    rows = []
+    for p in points:
+        ts = p.get("timestamp")
+        region = p.get("region")
+        row = [
+            p.get("seq"),
+            ts.timestamp() if hasattr(ts, "timestamp") else ts,
+            market_codes.code(p["market_id"]),
+            commodity_codes.code(p["commodity"]),
+            None if region is None else region_codes.code(region),
+            p.get("price"),
+            p.get("price_change"),
+            p.get("impact_score"),
+            factor_codes.code(p.get("dominant_factor") or FACTOR_NONE),
+        ]
+        if p.get("quarantined"):
+            row.append(True)
+        rows.append(row)
+    return rows
+
+
+class DictionaryCursor:
+    """
+    Tracks how much of the shared code tables one client has been sent.
+
+    delta() returns a "dictionary" message with the names added since the last call (the full
+    tables plus field layout and factor weights on the first call), or None if nothing is new:
+      {"type": "dictionary", "fields": [...], "factor_weights": {...},
+       "factor_tables": [{"commodity": "cabai", "region": null, "weights": {...}}, ...],
+       "markets": {"start": 0, "names": [...]}, "commodities": {...}, "regions": {...}, "factors": {...}}
+    factor_weights / factor_tables are sent again whenever the factor tables are reloaded.
+    """
+
+    def __init__(self) -> None:
+        self._sent = {name: 0 for name, _ in CODE_TABLES}
+        self._first = True
+        self._tables_version = -1
+
+    def delta(self) -> Optional[Dict[str, Any]]:
+        version = factor_tables.version
+        if (
+            not self._first
+            and version == self._tables_version
+            and all(len(codes.names) == self._sent[name] for name, codes in CODE_TABLES)
+        ):
+            return None  # the common case: called once per frame, nothing new
+        msg: Dict[str, Any] = {"type": "dictionary"}
+        if self._first:
+            msg["fields"] = list(ROW_FIELDS)
+        if version != self._tables_version:
+            self._tables_version, msg["factor_weights"], msg["factor_tables"] = _factor_tables_payload()
+        for name, codes in CODE_TABLES:
+            start = self._sent[name]
+            if self._first or len(codes.names) > start:
+                msg[name] = {"start": start, "names": codes.names[start:]}
+                self._sent[name] = len(codes.names)
+        if len(msg) == 1:
+            return None
+        self._first = False
+        return msg
@@ -0,0 +1,170 @@
+"""
+Helpers for group-based websocket fan-out.
+
+Clients with identical filters share a FilterKey and therefore receive byte-identical
+price_update frames. Each point is JSON-encoded once per broadcast; a group's frame is
+assembled by joining the encoded points that match its key, and the same frame object is
+sent to every member of the group.
+
+Groups that asked for conflation (conflate_ms > 0) collect points in a Conflator instead and
+receive one frame per window with only the latest point per (market_id, commodity, region).
+
+The negotiated wire encoding is part of the group key as well, so a frame's parts are either
+JSON-encoded point objects or compact rows (see encoding.py), never a mix.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .encoding import pack
+
+# accepted range for the opt-in conflation window; 0 disables conflation
+MAX_CONFLATE_MS = 60_000
+
+# (market_id, region, sorted commodities, conflate_ms, encoding); None means "no restriction"
+FilterKey = Tuple[Optional[str], Optional[str], Optional[Tuple[str, ...]], int, str]
+
+
+def conflate_ms(value: Any) -> int:
+    """Parse a client-supplied conflation window in milliseconds (invalid -> 0, i.e. off)."""
+    try:
+        ms = int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+    return min(max(ms, 0), MAX_CONFLATE_MS)
+
+
+def filter_key(filters: Optional[Dict[str, Any]]) -> FilterKey:
+    """Canonical, hashable form of a client's filters dict (empty values mean no filter)."""
+    filters = filters or {}
+    commodities = filters.get("commodities")
+    return (
+        filters.get("market_id") or None,
+        filters.get("region") or None,
+        tuple(sorted(set(commodities))) if commodities else None,
+        conflate_ms(filters.get("conflate_ms")),
+        filters.get("encoding") or "json",
+    )
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_points(points: Sequence[Dict[str, Any]]) -> List[str]:
+    """JSON-encode each point once (datetimes as ISO strings), in input order."""
+    # same compact form as WebSocket.send_json
+    return [json.dumps(p, default=_json_default, separators=(",", ":"), ensure_ascii=False) for p in points]
+
+
+def build_frame(encoded: Sequence[str], kind: str = "price_update", meta: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Assemble a message of type `kind` from already encoded points; meta holds extra
+    top-level fields (e.g. seq for snapshot / replay messages).
+    """
+    head = '{"type":' + json.dumps(kind)
+    if meta:
+        head += "," + json.dumps(meta, separators=(",", ":"))[1:-1]
+    return head + ',"data":[' + ",".join(encoded) + "]}"
+
+
+# (market_id, commodity, region) of one encoded point, used when coalescing
+PointKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def point_key(point: Dict[str, Any]) -> PointKey:
+    return (point.get("market_id"), point.get("commodity"), point.get("region"))
+
+
+class Frame:
+    """
+    One price_update message as a list of (PointKey, encoded point) parts.
+
+    Parts are JSON strings for the json encoding and compact rows otherwise. The same Frame
+    is queued for every member of a filter group; its wire data (str for text frames, bytes
+    for binary ones) is built on first use and then shared.
+    """
+
+    __slots__ = ("parts", "kind", "meta", "encoding", "_data")
+
+    def __init__(
+        self,
+        parts: List[Tuple[PointKey, Any]],
+        kind: str = "price_update",
+        meta: Optional[Dict[str, Any]] = None,
+        encoding: str = "json",
+    ) -> None:
+        self.parts = parts
+        self.kind = kind
+        self.meta = meta
+        self.encoding = encoding
+        self._data: Union[str, bytes, None] = None
+
+    @property
+    def data(self) -> Union[str, bytes]:
+        if self._data is None:
+            if self.encoding == "json":
+                self._data = build_frame([enc for _, enc in self.parts], self.kind, self.meta)
+            else:
+                msg: Dict[str, Any] = {"type": self.kind}
+                if self.meta:
+                    msg.update(self.meta)
+                msg["data"] = [row for _, row in self.parts]
+                self._data = pack(msg, self.encoding)
+        return self._data
+
+    @classmethod
+    def coalesce(cls, frames: Sequence["Frame"]) -> "Frame":
+        """
+        Merge frames keeping only the newest point per key, ordered by last update.
+        The result is always a price_update (snapshot / replay points included).
+        """
+        latest: Dict[PointKey, Any] = {}
+        for frame in frames:
+            for key, enc in frame.parts:
+                latest.pop(key, None)
+                latest[key] = enc
+        return cls(list(latest.items()), encoding=frames[0].encoding)
+
+
+class Conflator:
+    """
+    Conflation window for one filter group.
+
+    Parts added while a window is open overwrite earlier parts with the same key; when the
+    window closes (interval_ms after its first part) one Frame with the surviving parts is
+    handed to `flush`. Runs on the event loop via call_later, so nothing awaits.
+    """
+
+    def __init__(self, interval_ms: int, flush: Callable[[Frame], None], encoding: str = "json") -> None:
+        self.interval = interval_ms / 1000.0
+        self._flush = flush
+        self.encoding = encoding
+        self._pending: Dict[PointKey, Any] = {}
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def add(self, parts: Sequence[Tuple[PointKey, Any]]) -> None:
+        pending = self._pending
+        for key, enc in parts:
+            pending.pop(key, None)
+            pending[key] = enc
+        if self._handle is None and pending:
+            self._handle = asyncio.get_running_loop().call_later(self.interval, self._fire)
+
+    def _fire(self) -> None:
+        self._handle = None
+        if self._pending:
+            frame = Frame(list(self._pending.items()), encoding=self.encoding)
+            self._pending = {}
+            self._flush(frame)
+
+    def cancel(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pending = {}
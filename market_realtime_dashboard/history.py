@@ -0,0 +1,206 @@
+"""
+Columnar ring-buffer storage for realtime price history.
+
+Each (market_id, commodity, region) series keeps a handful of numpy columns with a
+wraparound head index instead of a deque of dicts. Values repeated on every point
+(market_id, commodity, region, factor weights) live once in the key / factor table,
+and the dominant factor is stored as a small-int code.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FACTOR_NONE = "none"
+
+
+class FactorCodes:
+    """
+    Append-only registry mapping factor names to small-int codes (0 is always "none").
+    """
+
+    def __init__(self) -> None:
+        self._names: List[str] = [FACTOR_NONE]
+        self._codes: Dict[str, int] = {FACTOR_NONE: 0}
+
+    def code(self, name: str) -> int:
+        c = self._codes.get(name)
+        if c is None:
+            c = len(self._names)
+            if c > 255:
+                raise ValueError("too many distinct factor names for uint8 codes")
+            self._names.append(name)
+            self._codes[name] = c
+        return c
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._names)
+
+
+# shared by every HistoryBuffer so codes are comparable across series
+factor_codes = FactorCodes()
+
+
+class ColumnRing:
+    """
+    Fixed-capacity ring of numpy columns.
+
+    Rows are written at `head` and overwrite the oldest row once the ring is full; logical
+    index 0 is always the oldest retained row. Columns are allocated in doubling chunks up to
+    `capacity`, so series that only ever see a few points stay small.
+
+    Subclasses declare their layout in COLUMNS as (name, dtype) pairs.
+    """
+
+    COLUMNS: Tuple[Tuple[str, type], ...] = ()
+    INITIAL_ALLOC = 64
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._alloc = min(self.INITIAL_ALLOC, capacity)
+        self._cols: Dict[str, np.ndarray] = {name: np.empty(self._alloc, dtype=dt) for name, dt in self.COLUMNS}
+        self._head = 0  # next physical write position
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        new_alloc = min(self._alloc * 2, self.capacity)
+        for name, col in self._cols.items():
+            grown = np.empty(new_alloc, dtype=col.dtype)
+            grown[: self._size] = col[: self._size]
+            self._cols[name] = grown
+        # the ring never wraps before reaching capacity, so rows sit at [0, size)
+        self._alloc = new_alloc
+        self._head = self._size
+
+    def _append(self, values: Tuple) -> None:
+        # values follow COLUMNS order
+        if self._size == self._alloc and self._alloc < self.capacity:
+            self._grow()
+        h = self._head
+        for (name, _), v in zip(self.COLUMNS, values):
+            self._cols[name][h] = v
+        self._head = (h + 1) % self._alloc
+        if self._size < self._alloc:
+            self._size += 1
+
+    def _pos(self, i: int) -> int:
+        # physical position of logical index i (0 = oldest)
+        return (self._head - self._size + i) % self._alloc
+
+    def get(self, name: str, i: int):
+        """Single value at logical index i (negative indexes count from the newest row)."""
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("ColumnRing index out of range")
+        return self._cols[name][self._pos(i)].item()
+
+    def set(self, name: str, i: int, value) -> None:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("ColumnRing index out of range")
+        self._cols[name][self._pos(i)] = value
+
+    def column(self, name: str, lo: int = 0, hi: Optional[int] = None) -> np.ndarray:
+        """
+        Logical rows [lo, hi) of one column in oldest-first order, costing O(hi - lo).
+        Returns a view when the range is physically contiguous; copy it if you keep it.
+        """
+        hi = self._size if hi is None else min(hi, self._size)
+        lo = max(0, lo)
+        col = self._cols[name]
+        if hi <= lo:
+            return col[:0]
+        p0 = self._pos(lo)
+        n = hi - lo
+        if p0 + n <= self._alloc:
+            return col[p0 : p0 + n]
+        return np.concatenate((col[p0:], col[: p0 + n - self._alloc]))
+
+    def columns(self, lo: int = 0, hi: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return {name: self.column(name, lo, hi) for name, _ in self.COLUMNS}
+
+    def search(self, name: str, value: float, side: str = "left") -> int:
+        """
+        Binary search (np.searchsorted semantics) over a column that is sorted in logical order.
+        The ring is at most two physically contiguous runs, each searched in O(log n).
+        """
+        col = self._cols[name]
+        start = self._pos(0) if self._size else 0
+        n1 = min(self._size, self._alloc - start)
+        i = int(np.searchsorted(col[start : start + n1], value, side=side))
+        if i < n1:
+            return i
+        return n1 + int(np.searchsorted(col[: self._size - n1], value, side=side))
+
+    def tail(self, limit: int) -> Tuple[int, int]:
+        """Logical range covering the newest `limit` rows."""
+        return max(0, self._size - limit), self._size
+
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self._cols.values())
+
+
+class HistoryBuffer(ColumnRing):
+    """
+    Raw price history of one (market_id, commodity, region) series.
+
+    ts is stored as float epoch seconds (UTC); factor is a FactorCodes code; seq is the
+    manager-wide sequence number, increasing in append order.
+    """
+
+    COLUMNS = (
+        ("ts", np.float64),
+        ("price", np.float64),
+        ("price_change", np.float64),
+        ("impact_score", np.float64),
+        ("factor", np.uint8),
+        ("seq", np.int64),
+    )
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__(capacity)
+        # appends since the last out-of-order timestamp; once it reaches capacity every
+        # retained row is in time order again and range lookups can binary search
+        self._since_disorder = capacity
+
+    def append(self, ts: float, price: float, price_change: float, impact_score: float, factor_code: int, seq: int = 0) -> None:
+        if self._size and ts < self.get("ts", -1):
+            self._since_disorder = 0
+        elif self._since_disorder < self.capacity:
+            self._since_disorder += 1
+        self._append((ts, price, price_change, impact_score, factor_code, seq))
+
+    def since_seq(self, seq: int) -> int:
+        """Logical index of the first row with a sequence number greater than seq."""
+        return self.search("seq", seq, "right")
+
+    def time_range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Logical range [lo, hi) of rows with start <= ts <= end, found by binary search.
+        While out-of-order rows are still retained it falls back to a linear scan and returns
+        the rows between the first and the last match.
+        """
+        if self._since_disorder < self.capacity:
+            ts = self.column("ts")
+            idx = np.nonzero((ts >= (-np.inf if start is None else start)) & (ts <= (np.inf if end is None else end)))[0]
+            if idx.size == 0:
+                return 0, 0
+            return int(idx[0]), int(idx[-1]) + 1
+        lo = 0 if start is None else self.search("ts", start, "left")
+        hi = self._size if end is None else self.search("ts", end, "right")
+        return lo, max(lo, hi)
+
+    def last_price(self) -> Optional[float]:
+        if self._size == 0:
+            return None
+        return self.get("price", -1)
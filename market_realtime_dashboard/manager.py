@@ -2,57 +2,343 @@
 In-memory manager for price data and websocket broadcasting.
 
 Extended to compute Price Impact via smart_market_stream.core.impact_engine.
-Stores history entries with impact metadata so history and realtime streams include:
+Stores history with impact metadata so history and realtime streams include:
   price_change, impact_score, dominant_factor, factors_with_weights
+
+History is kept in columnar ring buffers (see history.py); factors_with_weights is not
+stored per point but rebuilt from the factor table, since the shares only depend on it.
+OHLC rollups per bucket tier are updated as points arrive (see rollups.py); bucket listeners
+(add_bucket_listener) are called with every bucket a point closes, e.g. to feed daily closes
+to the forecast models.
+
+Websocket clients are grouped by identical filters; each broadcast encodes every point once
+and queues one shared frame per group (see fanout.py). Groups are found per point through an
+inverted subscription index (see subscriptions.py). Every client has its own sender task and
+bounded queue with a slow-consumer policy (see sender.py), so broadcasting never awaits a socket.
+Clients may opt into conflation (conflate_ms): their group then gets at most one frame per
+window, holding the latest point per market/commodity/region.
+
+Every point carries a manager-wide, increasing seq. On (re)subscribe a client can ask for a
+snapshot of the latest point per matching key and/or a replay of points after a seq it has
+seen; both are queued before any live update that follows.
+
+Clients negotiate a wire encoding (filters['encoding'], see encoding.py); it is part of the
+group key, and points are encoded at most once per encoding per broadcast.
+
+A payload may carry 'quarantined' ({commodity: quarantine id}) from the ingest validation
+stage: those prices are broadcast tagged ("quarantined": true, no seq) but are not stored in
+latest / history / rollups and do not become the previous price of later points.
 """
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict, deque
-from datetime import datetime
-from typing import Deque, Dict, List, Optional, Tuple, Any
+import logging
+import math
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+import numpy as np
 
 from .models import PricePoint  # used for typing clarity (we store dicts for flexibility)
+from .encoding import compact_rows
+from .fanout import Conflator, FilterKey, Frame, encode_points, filter_key, point_key
+from .history import FACTOR_NONE, HistoryBuffer, factor_codes
+from .rollups import ROLLUP_TIERS, RollupTiers
+from .sender import ClientSender, SenderMetrics
+from .subscriptions import SubscriptionIndex
 
 # Import the impact engine from the main project package
-from smart_market_stream.core.impact_engine import compute_impact, ImpactResult
+from smart_market_stream.core.impact_engine import compute_impact, compute_impact_batch, resolve_table
+
+# rows (prices) from which impact metadata is computed with compute_impact_batch
+VECTORIZE_MIN_ROWS = 16
+
+# max raw points per market/commodity/region; longer horizons are served by the rollup tiers
+MAX_HISTORY = int(os.getenv("REALTIME_MAX_HISTORY", "2000"))
+
+# max websocket sends in flight across all client senders
+BROADCAST_CONCURRENCY = int(os.getenv("REALTIME_BROADCAST_CONCURRENCY", "256"))
+# frames queued per client before the overflow policy applies (drop_oldest | coalesce | disconnect)
+SEND_QUEUE_SIZE = int(os.getenv("REALTIME_SEND_QUEUE", "256"))
+OVERFLOW_POLICY = os.getenv("REALTIME_OVERFLOW_POLICY", "coalesce")
+# most points sent in one replay message; older ones are skipped and the replay marked truncated
+REPLAY_MAX_POINTS = int(os.getenv("REALTIME_REPLAY_MAX", "5000"))
+
+HistoryKey = Tuple[str, str, Optional[str]]
+# called as listener(key, tier, bucket row) for every closed rollup bucket, see RollupTiers.update
+BucketListener = Callable[[HistoryKey, str, Tuple], None]
+
+logger = logging.getLogger("market_realtime_dashboard.manager")
 
-MAX_HISTORY = 2000  # max points per market/commodity/region
+
+def _to_epoch(ts: datetime) -> float:
+    # naive datetimes are treated as UTC (the ingest paths use utcnow())
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _from_epoch(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
 
 
 class RealtimeManager:
     def __init__(self) -> None:
         # latest: market_id -> {"region":..., "timestamp": datetime, "prices": {...}, "impacts": {commodity: {...}}}
         self.latest: Dict[str, Dict[str, Any]] = {}
-        # key: (market_id, commodity, region) -> deque[dict] (includes impact metadata)
-        self.history: Dict[Tuple[str, str, Optional[str]], Deque[Dict[str, Any]]] = defaultdict(
-            lambda: deque(maxlen=MAX_HISTORY)
-        )
+        # key: (market_id, commodity, region) -> HistoryBuffer (columnar, includes impact metadata)
+        self.history: Dict[HistoryKey, HistoryBuffer] = {}
+        # same key -> OHLC rollup tiers (1m/5m/1h/1d), see rollups.ROLLUP_TIERS
+        self.rollups: Dict[HistoryKey, RollupTiers] = {}
+        # callbacks for closed rollup buckets (see add_bucket_listener)
+        self._bucket_listeners: List[BucketListener] = []
         # connected websockets: client_id -> (websocket, filters)
         self._clients: Dict[int, Tuple["WebSocket", Dict]] = {}
+        # per-client sender (bounded queue + task): client_id -> ClientSender
+        self._senders: Dict[int, ClientSender] = {}
+        # clients grouped by canonical filters: FilterKey -> {client_id: ClientSender}
+        self._groups: Dict[FilterKey, Dict[int, ClientSender]] = {}
+        # group keys by market_id / region / commodity, kept in step with _groups
+        self._index = SubscriptionIndex()
+        # conflation windows of groups with conflate_ms > 0
+        self._conflators: Dict[FilterKey, Conflator] = {}
         self._client_id_seq = 0
+        # last sequence number handed out to a point
+        self._seq = 0
         self._lock = asyncio.Lock()
+        self._send_limit = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        self.send_metrics = SenderMetrics()
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest stored point (0 before the first one)."""
+        return self._seq
+
+    def add_bucket_listener(self, listener: BucketListener) -> None:
+        """
+        Call listener(key, tier, row) whenever an ingested point closes a rollup bucket, or a
+        late point revises a closed one (the same bucket start is then reported again with the
+        new values); row is (start, open, high, low, close, count, sum). Listeners run inline on
+        the ingest path and must be cheap; exceptions are logged and otherwise ignored.
+        """
+        self._bucket_listeners.append(listener)
+
+    def remove_bucket_listener(self, listener: BucketListener) -> None:
+        if listener in self._bucket_listeners:
+            self._bucket_listeners.remove(listener)
+
+    def _bucket_closed(self, key: HistoryKey, closed: List[Tuple[str, Tuple]]) -> None:
+        for tier, row in closed:
+            for listener in self._bucket_listeners:
+                try:
+                    listener(key, tier, row)
+                except Exception as exc:
+                    logger.warning("bucket listener %r failed for %s %s: %s", listener, key, tier, exc)
 
-    async def register_client(self, websocket, filters: Dict) -> int:
+    async def register_client(self, websocket, filters: Dict, snapshot: bool = False, since_seq: Optional[int] = None) -> int:
         """
         Register a connected client and return assigned client_id.
-        filters: dict with optional 'market_id' and 'commodities' (list) and 'region'
+        filters: dict with optional 'market_id' and 'commodities' (list) and 'region', and
+        'conflate_ms' to receive at most one update per key per window, and 'encoding'
+        (already negotiated, fixed for the connection)
+        snapshot / since_seq: queue a snapshot and/or a replay first, see _queue_catch_up
         """
         async with self._lock:
             self._client_id_seq += 1
             cid = self._client_id_seq
+            sender = ClientSender(
+                cid, websocket, SEND_QUEUE_SIZE, OVERFLOW_POLICY, self.send_metrics, self.unregister_client, self._send_limit,
+                encoding=filters.get("encoding") or "json",
+            )
             self._clients[cid] = (websocket, filters)
+            self._senders[cid] = sender
+            self._join_group(cid, sender, filters)
+            self._queue_catch_up(sender, filters, snapshot, since_seq)
+            sender.start()
             return cid
 
     async def unregister_client(self, client_id: int) -> None:
         async with self._lock:
-            self._clients.pop(client_id, None)
+            entry = self._clients.pop(client_id, None)
+            if entry is not None:
+                self._leave_group(client_id, entry[1])
+            sender = self._senders.pop(client_id, None)
+            if sender is not None:
+                sender.close()
 
-    async def process_payload(self, timestamp: datetime, market_id: str, prices: Dict[str, float], region: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def update_filters(self, client_id: int, filters: Dict, snapshot: bool = False, since_seq: Optional[int] = None) -> None:
+        """
+        Replace a connected client's filters (moves it to the matching group), optionally
+        queueing a snapshot / replay for the new filters first. The connection's encoding
+        is kept.
+        """
+        async with self._lock:
+            entry = self._clients.get(client_id)
+            if entry is None:
+                return
+            ws, old = entry
+            filters = dict(filters, encoding=self._senders[client_id].encoding)
+            self._leave_group(client_id, old)
+            self._clients[client_id] = (ws, filters)
+            sender = self._senders[client_id]
+            self._join_group(client_id, sender, filters)
+            self._queue_catch_up(sender, filters, snapshot, since_seq)
+
+    def _queue_catch_up(self, sender: ClientSender, filters: Dict, snapshot: bool, since_seq: Optional[int]) -> None:
+        """
+        Queue snapshot / replay messages for a client that just joined its group.
+
+        Runs synchronously right after the join, and broadcasts are synchronous too, so every
+        later point reaches the client as a live update after these messages and nothing in
+        between is lost:
+          {"type":"snapshot","seq":S,"data":[latest point per matching key]}
+          {"type":"replay","since_seq":N,"seq":S,"truncated":false,"data":[points with seq > N]}
+        truncated is true when points after N are no longer retained (or exceed
+        REPLAY_MAX_POINTS); the client should then rely on the snapshot.
+        """
+        if not snapshot and since_seq is None:
+            return
+        fkey = filter_key(filters)
+        keys = [k for k in self.history if self._key_matches(fkey, k)]
+        if snapshot:
+            points = []
+            for k in keys:
+                buf = self.history[k]
+                if len(buf):
+                    points.extend(self._rows_to_dicts(k, buf, len(buf) - 1, len(buf)))
+            points.sort(key=lambda p: p["seq"])
+            sender.offer(self._frame(points, "snapshot", {"seq": self._seq}, sender.encoding))
+        if since_seq is not None:
+            points, truncated = self._replay_points(keys, since_seq)
+            sender.offer(self._frame(points, "replay", {"since_seq": since_seq, "seq": self._seq, "truncated": truncated}, sender.encoding))
+
+    def _replay_points(self, keys: List[HistoryKey], since_seq: int) -> Tuple[List[Dict[str, Any]], bool]:
+        truncated = since_seq > self._seq  # seq from before a restart
+        points: List[Dict[str, Any]] = []
+        for k in keys:
+            buf = self.history[k]
+            lo = buf.since_seq(since_seq)
+            if lo == 0 and len(buf) == buf.capacity and buf.get("seq", 0) > since_seq + 1:
+                truncated = True  # rows after since_seq were already evicted
+            if lo < len(buf):
+                lo = max(lo, len(buf) - REPLAY_MAX_POINTS)
+                points.extend(self._rows_to_dicts(k, buf, lo, len(buf)))
+        points.sort(key=lambda p: p["seq"])
+        if len(points) > REPLAY_MAX_POINTS:
+            points = points[-REPLAY_MAX_POINTS:]
+            truncated = True
+        return points, truncated
+
+    @staticmethod
+    def _key_matches(fkey: FilterKey, key: HistoryKey) -> bool:
+        market_id, region, commodities = fkey[:3]
+        return (
+            (market_id is None or key[0] == market_id)
+            and (region is None or key[2] == region)
+            and (commodities is None or key[1] in commodities)
+        )
+
+    @staticmethod
+    def _frame(points: List[Dict[str, Any]], kind: str, meta: Dict[str, Any], encoding: str) -> Frame:
+        payloads = encode_points(points) if encoding == "json" else compact_rows(points)
+        return Frame(list(zip(map(point_key, points), payloads)), kind, meta, encoding)
+
+    def _join_group(self, client_id: int, sender: ClientSender, filters: Dict) -> None:
+        key = filter_key(filters)
+        members = self._groups.get(key)
+        if members is None:
+            members = self._groups[key] = {}
+            self._index.add(key)
+            if key[3]:
+                self._conflators[key] = Conflator(key[3], lambda frame, key=key: self._offer_group(key, frame), key[4])
+        members[client_id] = sender
+
+    def _leave_group(self, client_id: int, filters: Dict) -> None:
+        key = filter_key(filters)
+        members = self._groups.get(key)
+        if members is not None:
+            members.pop(client_id, None)
+            if not members:
+                del self._groups[key]
+                self._index.remove(key)
+                conflator = self._conflators.pop(key, None)
+                if conflator is not None:
+                    conflator.cancel()
+
+    def _offer_group(self, key: FilterKey, frame: Frame) -> None:
+        for sender in self._groups.get(key, {}).values():
+            sender.offer(frame)
+
+    async def process_payload(
+        self,
+        timestamp: datetime,
+        market_id: str,
+        prices: Dict[str, float],
+        region: Optional[str] = None,
+        quarantined: Optional[Dict[str, int]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Store prices into latest and history, compute impact metadata and broadcast produced entries.
 
-        Returns the list of generated entry dicts (one per commodity) which include:
+        quarantined: {commodity: quarantine id} of prices to broadcast tagged without storing them.
+        Returns the list of generated entry dicts (one per commodity), see _apply_payloads.
+        """
+        payload = {"timestamp": timestamp, "market_id": market_id, "prices": prices, "region": region, "quarantined": quarantined}
+        produced = self._apply_payloads([payload])[0]
+
+        # Queue produced entries for interested clients; their sender tasks do the sends
+        self._broadcast_updates(produced)
+        return produced
+
+    async def replay_point(self, ts: float, market_id: str, commodity: str, price: float, region: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Store and broadcast one price that arrives late, e.g. a quarantined price confirmed by a
+        reviewer (ts in epoch seconds). It goes into history and rollups at its own timestamp
+        like any late point. In latest it is merged into the market's entry (the other
+        commodities stay) when it is at least as new as that entry, and ignored otherwise.
+        """
+        before = self.latest.get(market_id)
+        produced = await self.process_payload(timestamp=_from_epoch(ts), market_id=market_id, prices={commodity: price}, region=region)
+        if before is not None:
+            if _to_epoch(before["timestamp"]) > ts:
+                self.latest[market_id] = before
+            else:
+                replayed = self.latest[market_id]
+                self.latest[market_id] = {
+                    "region": replayed["region"],
+                    "timestamp": replayed["timestamp"],
+                    "prices": {**before["prices"], **replayed["prices"]},
+                    "impacts": {**before["impacts"], **replayed["impacts"]},
+                }
+        return produced
+
+    async def process_batch(self, payloads: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Store a batch of payloads and broadcast everything they produced as a single update.
+
+        payloads: list of dicts with 'timestamp', 'market_id', 'prices' and optional 'region'
+        and 'quarantined' (see module docstring), applied in order (so repeated keys inside one batch still see their previous price).
+        Impact metadata for the whole batch is computed in one vectorized call.
+
+        Returns the produced entries per payload, in input order.
+        """
+        results = self._apply_payloads(payloads)
+        points = [e for produced in results for e in produced]
+        if points:
+            self._broadcast_updates(points)
+        return results
+
+    def _apply_payloads(self, payloads: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Store payloads into latest and history and compute impact metadata (no broadcast).
+
+        Every (payload, commodity) price becomes one row of a single compute_impact_batch
+        call (plain compute_impact below VECTORIZE_MIN_ROWS rows); the previous price of a row
+        is the last stored price of its key, or the price of an earlier row with the same key
+        in this batch.
+
+        Returns, per payload, the list of generated entry dicts (one per commodity) which include:
           - timestamp (datetime)
           - market_id
           - commodity
@@ -62,89 +348,193 @@ class RealtimeManager:
           - impact_score
           - dominant_factor
           - factors_with_weights
+          - seq (manager-wide sequence number; None for quarantined prices)
+          - quarantined / quarantine_id (only for prices tagged by the validation stage)
         """
-        # Update latest structure
-        self.latest[market_id] = {"region": region, "timestamp": timestamp, "prices": prices.copy(), "impacts": {}}
+        # gather rows: (payload index, key, price) with their previous prices
+        keys: List[HistoryKey] = []
+        prev: List[float] = []
+        new: List[float] = []
+        last_in_batch: Dict[HistoryKey, float] = {}
+        for p in payloads:
+            market_id, region = p["market_id"], p.get("region")
+            held = p.get("quarantined") or {}
+            for commodity, price in p["prices"].items():
+                key = (market_id, commodity, region)
+                price = float(price)
+                prev_price = last_in_batch.get(key)
+                if prev_price is None:
+                    buf = self.history.get(key)
+                    prev_price = buf.last_price() if buf is not None else None
+                keys.append(key)
+                prev.append(math.nan if prev_price is None else prev_price)
+                new.append(price)
+                if commodity not in held:
+                    last_in_batch[key] = price
 
-        produced: List[Dict[str, Any]] = []
-        for commodity, price in prices.items():
-            key = (market_id, commodity, region)
-            dq = self.history.get(key, deque())
+        if len(keys) >= VECTORIZE_MIN_ROWS:
+            changes, scores, dominants, fws = self._impact_batch(keys, prev, new)
+        else:
+            # a single small payload: numpy's per-call overhead outweighs a few scalar calls
+            scalar = [
+                compute_impact(prev_price=None if math.isnan(a) else a, new_price=b, commodity=k[1], market_id=k[0], region=k[2])
+                for k, a, b in zip(keys, prev, new)
+            ]
+            changes = [r.price_change for r in scalar]
+            scores = [r.impact_score for r in scalar]
+            dominants = [r.dominant_factor for r in scalar]
+            fws = [r.factors_with_weights for r in scalar]
 
-            prev_price = None
-            if len(dq) > 0:
-                prev_price = dq[-1].get("price")
+        results: List[List[Dict[str, Any]]] = []
+        row = 0
+        for p in payloads:
+            timestamp, market_id, region = p["timestamp"], p["market_id"], p.get("region")
+            held = p.get("quarantined") or {}
+            # Update latest structure
+            impacts: Dict[str, Any] = {}
+            prices = {c: v for c, v in p["prices"].items() if c not in held} if held else dict(p["prices"])
+            if prices or not held:
+                self.latest[market_id] = {"region": region, "timestamp": timestamp, "prices": prices, "impacts": impacts}
+            ts_epoch = _to_epoch(timestamp)
+            produced: List[Dict[str, Any]] = []
+            for _ in range(len(p["prices"])):
+                key, price = keys[row], new[row]
+                change, score, dominant, fw = changes[row], scores[row], dominants[row], fws[row]
+                row += 1
 
-            # Compute impact
-            impact: ImpactResult = compute_impact(prev_price=prev_price, new_price=price, commodity=commodity, market_id=market_id, region=region)
+                if key[1] in held:
+                    produced.append({
+                        "seq": None,
+                        "timestamp": timestamp,
+                        "market_id": market_id,
+                        "commodity": key[1],
+                        "price": price,
+                        "region": region,
+                        "price_change": change,
+                        "impact_score": score,
+                        "dominant_factor": dominant,
+                        "factors_with_weights": fw,
+                        "quarantined": True,
+                        "quarantine_id": held[key[1]],
+                    })
+                    continue
 
-            entry: Dict[str, Any] = {
-                "timestamp": timestamp,
-                "market_id": market_id,
-                "commodity": commodity,
-                "price": float(price),
-                "region": region,
-                "price_change": impact.price_change,
-                "impact_score": impact.impact_score,
-                "dominant_factor": impact.dominant_factor,
-                "factors_with_weights": impact.factors_with_weights,
-            }
-
-            # Store in history and latest impacts
-            self.history[key].append(entry)
-            self.latest[market_id]["impacts"][commodity] = {
-                "price_change": impact.price_change,
-                "impact_score": impact.impact_score,
-                "dominant_factor": impact.dominant_factor,
-                "factors_with_weights": impact.factors_with_weights,
-            }
-
-            produced.append(entry)
-
-        # Broadcast produced entries asynchronously
-        asyncio.create_task(self._broadcast_updates(produced))
-        return produced
+                buf = self.history.get(key)
+                if buf is None:
+                    buf = self.history[key] = HistoryBuffer(MAX_HISTORY)
+                    self.rollups[key] = RollupTiers()
+
+                self._seq += 1
+                entry: Dict[str, Any] = {
+                    "seq": self._seq,
+                    "timestamp": timestamp,
+                    "market_id": market_id,
+                    "commodity": key[1],
+                    "price": price,
+                    "region": region,
+                    "price_change": change,
+                    "impact_score": score,
+                    "dominant_factor": dominant,
+                    "factors_with_weights": fw,
+                }
 
-    async def _broadcast_updates(self, points: List[Dict[str, Any]]) -> None:
+                # Store in history and latest impacts
+                buf.append(ts_epoch, price, change, score, factor_codes.code(dominant), self._seq)
+                closed = self.rollups[key].update(ts_epoch, price)
+                if closed and self._bucket_listeners:
+                    self._bucket_closed(key, closed)
+                impacts[key[1]] = {
+                    "price_change": change,
+                    "impact_score": score,
+                    "dominant_factor": dominant,
+                    "factors_with_weights": fw,
+                }
+                produced.append(entry)
+            results.append(produced)
+        return results
+
+    @staticmethod
+    def _impact_batch(keys: List[HistoryKey], prev: List[float], new: List[float]) -> Tuple[List[float], List[float], List[str], List[Dict[str, float]]]:
         """
-        Send price points (dicts) to connected clients filtered by their subscriptions.
-        If sending to a client fails, unregister it.
+        compute_impact_batch over all rows, one call per distinct factor table (rows are
+        grouped by the table resolved for their commodity/region). Returns per-row lists of
+        price_change, impact_score, dominant_factor and factors_with_weights.
         """
-        # snapshot clients to avoid long locking
-        async with self._lock:
-            clients_items = list(self._clients.items())
-
-        for cid, (ws, filters) in clients_items:
-            try:
-                # determine which points match client's filters
-                filtered = []
-                for p in points:
-                    if "market_id" in filters and filters["market_id"] and p.get("market_id") != filters["market_id"]:
-                        continue
-                    if "region" in filters and filters["region"] and p.get("region") != filters["region"]:
-                        continue
-                    if "commodities" in filters and filters["commodities"]:
-                        if p.get("commodity") not in filters["commodities"]:
-                            continue
-                    filtered.append(p)
-
-                if not filtered:
-                    continue
+        groups: Dict[int, Tuple[Any, List[int]]] = {}
+        for i, (_, commodity, region) in enumerate(keys):
+            table = resolve_table(None, commodity, region)
+            groups.setdefault(id(table), (table, []))[1].append(i)
 
-                # prepare list of dicts with ISO timestamps
-                payload_data = []
-                for fp in filtered:
-                    # shallow copy and convert timestamp
-                    cp = fp.copy()
-                    if isinstance(cp.get("timestamp"), datetime):
-                        cp["timestamp"] = cp["timestamp"].isoformat()
-                    payload_data.append(cp)
-
-                payload = {"type": "price_update", "data": payload_data}
-                await ws.send_json(payload)
-            except Exception:
-                # client likely disconnected or errored; remove it
-                await self.unregister_client(cid)
+        n = len(keys)
+        changes: List[float] = [0.0] * n
+        scores: List[float] = [0.0] * n
+        dominants: List[str] = [FACTOR_NONE] * n
+        fws: List[Dict[str, float]] = [{}] * n
+        prev_arr = np.asarray(prev, dtype=np.float64)
+        new_arr = np.asarray(new, dtype=np.float64)
+        for table, rows in groups.values():
+            if len(groups) == 1:
+                batch = compute_impact_batch(prev_arr, new_arr, table)
+            else:
+                idx = np.asarray(rows)
+                batch = compute_impact_batch(prev_arr[idx], new_arr[idx], table)
+            c, sc, d = batch.rounded()
+            for j, i in enumerate(rows):
+                changes[i], scores[i], dominants[i] = c[j], sc[j], d[j]
+                fws[i] = table.neutral if d[j] == FACTOR_NONE else table.weights
+        return changes, scores, dominants, fws
+
+    def _broadcast_updates(self, points: List[Dict[str, Any]]) -> None:
+        """
+        Queue price points (dicts) for connected clients filtered by their subscriptions.
+
+        Matching groups come from the subscription index, so only interested clients are
+        touched. Points are encoded once; each filter group gets one Frame that is queued for
+        all its members (conflated groups get theirs when the window closes). Nothing here awaits: the per-client senders drain their queues and
+        apply the overflow policy to slow consumers.
+        """
+        if not self._groups or not points:
+            return
+        selected: Dict[FilterKey, List[int]] = {}
+        matched: Dict[Tuple, Any] = {}
+        for i, p in enumerate(points):
+            fields = (p.get("market_id"), p.get("region"), p.get("commodity"))
+            keys = matched.get(fields)
+            if keys is None:
+                keys = matched[fields] = self._index.match(*fields)
+            for key in keys:
+                selected.setdefault(key, []).append(i)
+        if not selected:
+            return
+
+        # encode each point at most twice: JSON objects and/or compact rows (shared by compact/msgpack/cbor)
+        payloads: Dict[bool, List[Any]] = {}
+        for key, idxs in selected.items():
+            encoding = key[4]
+            as_json = encoding == "json"
+            encoded = payloads.get(as_json)
+            if encoded is None:
+                encoded = payloads[as_json] = encode_points(points) if as_json else compact_rows(points)
+            parts = [(point_key(points[i]), encoded[i]) for i in idxs]
+            conflator = self._conflators.get(key)
+            if conflator is not None:
+                conflator.add(parts)
+            else:
+                self._offer_group(key, Frame(parts, encoding=encoding))
+
+    def sender_stats(self) -> Dict[str, Any]:
+        """Queue depth and drop counters per connected client, plus totals."""
+        clients = [sender.stats() for sender in self._senders.values()]
+        return {
+            "clients": len(clients),
+            "groups": len(self._groups),
+            "queue_size": SEND_QUEUE_SIZE,
+            "overflow_policy": OVERFLOW_POLICY,
+            "queued": sum(c["depth"] for c in clients),
+            "max_depth": max((c["max_depth"] for c in clients), default=0),
+            "totals": self.send_metrics.as_dict(),
+            "per_client": clients,
+        }
 
     def get_latest(self, region: Optional[str] = None, commodities: Optional[List[str]] = None, markets: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
@@ -171,12 +561,101 @@ class RealtimeManager:
             })
         return out
 
-    def get_history(self, market_id: str, commodity: str, region: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    def get_history(
+        self,
+        market_id: str,
+        commodity: str,
+        region: Optional[str] = None,
+        limit: int = 200,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Return historical time-series for a given market and commodity as list of dicts (latest last).
         Each item includes impact metadata.
+
+        start/end (inclusive) restrict the time range via binary search over the timestamps;
+        limit then keeps the newest points of that range.
         """
         key = (market_id, commodity, region)
-        dq = self.history.get(key, deque())
-        items = list(dq)[-limit:]
-        return items
\ No newline at end of file
+        buf = self.history.get(key)
+        if buf is None:
+            return []
+        if start is None and end is None:
+            lo, hi = buf.tail(limit)
+        else:
+            lo, hi = buf.time_range(
+                None if start is None else _to_epoch(start),
+                None if end is None else _to_epoch(end),
+            )
+            lo = max(lo, hi - limit)
+        return self._rows_to_dicts(key, buf, lo, hi)
+
+    def get_buckets(
+        self,
+        market_id: str,
+        commodity: str,
+        bucket: str,
+        region: Optional[str] = None,
+        limit: int = 200,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return OHLC aggregates for a market/commodity from the incrementally maintained
+        rollup tier `bucket` (see rollups.ROLLUP_TIERS), oldest first. Each item has
+        timestamp (bucket start), open, high, low, close, mean and count.
+        """
+        if bucket not in ROLLUP_TIERS:
+            raise ValueError(f"unknown bucket {bucket!r}; expected one of {', '.join(ROLLUP_TIERS)}")
+        tiers = self.rollups.get((market_id, commodity, region))
+        if tiers is None:
+            return []
+        cols = tiers[bucket].buckets(
+            None if start is None else _to_epoch(start),
+            None if end is None else _to_epoch(end),
+            limit,
+        )
+        out: List[Dict[str, Any]] = []
+        for b_start, o, h, l, c, n, total in zip(
+            cols["start"].tolist(), cols["open"].tolist(), cols["high"].tolist(), cols["low"].tolist(),
+            cols["close"].tolist(), cols["count"].tolist(), cols["sum"].tolist(),
+        ):
+            out.append({
+                "timestamp": _from_epoch(b_start),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "mean": total / n if n else None,
+                "count": n,
+            })
+        return out
+
+    def _rows_to_dicts(self, key: HistoryKey, buf: HistoryBuffer, lo: int, hi: int) -> List[Dict[str, Any]]:
+        """
+        Materialize logical rows [lo, hi) of a history buffer as entry dicts (same shape as
+        produced by process_payload). Only the requested rows are read.
+        """
+        market_id, commodity, region = key
+        cols = buf.columns(lo, hi)
+        table = resolve_table(None, commodity, region)
+        weights, neutral = table.weights, table.neutral
+        out: List[Dict[str, Any]] = []
+        for seq, ts, price, change, score, code in zip(
+            cols["seq"].tolist(), cols["ts"].tolist(), cols["price"].tolist(), cols["price_change"].tolist(), cols["impact_score"].tolist(), cols["factor"].tolist()
+        ):
+            dominant = factor_codes.name(code)
+            out.append({
+                "seq": seq,
+                "timestamp": _from_epoch(ts),
+                "market_id": market_id,
+                "commodity": commodity,
+                "price": price,
+                "region": region,
+                "price_change": change,
+                "impact_score": score,
+                "dominant_factor": dominant,
+                "factors_with_weights": neutral if dominant == FACTOR_NONE else weights,
+            })
+        return out
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Incrementally maintained OHLC rollups for realtime price series.
+
+Every ingested point updates the open bucket of each tier in O(1); when a point falls into a
+later bucket the open one is closed into a bounded ColumnRing. Bucketed history and long-horizon
+(forecast) queries then read O(buckets) rows instead of recomputing aggregates from raw points,
+so raw history only needs to cover the recent window.
+
+A late point (e.g. a replayed, confirmed quarantined price) for an already closed bucket
+revises that bucket's high/low/count/sum; update() reports the revised row like a closed one,
+so consumers of closed buckets (the forecast models) see the new values. A late point for a
+bucket that is not retained (older than the retention, or a period without any point) is
+only counted in late_dropped.
+
+Retention per tier can be overridden with ROLLUP_RETENTION_<TIER> (e.g. ROLLUP_RETENTION_1D=365).
+"""
+from __future__ import annotations
+
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .history import ColumnRing
+
+
+def _retention(tier: str, default: int) -> int:
+    return int(os.getenv(f"ROLLUP_RETENTION_{tier.upper()}", default))
+
+
+# tier name -> (bucket width seconds, closed buckets retained)
+ROLLUP_TIERS: Dict[str, Tuple[int, int]] = {
+    "1m": (60, _retention("1m", 1440)),      # one day of minutes
+    "5m": (300, _retention("5m", 2016)),     # one week of 5-minute buckets
+    "1h": (3600, _retention("1h", 2160)),    # ninety days of hours
+    "1d": (86400, _retention("1d", 730)),    # two years of days
+}
+
+
+class RollupSeries(ColumnRing):
+    """
+    OHLC / count / sum buckets of a fixed width for one price series.
+
+    The open (newest) bucket lives in plain attributes so updates never touch numpy;
+    closed buckets are kept in the ring, oldest first, keyed by bucket start (epoch seconds).
+    """
+
+    COLUMNS = (
+        ("start", np.float64),
+        ("open", np.float64),
+        ("high", np.float64),
+        ("low", np.float64),
+        ("close", np.float64),
+        ("count", np.int64),
+        ("sum", np.float64),
+    )
+
+    def __init__(self, width: int, capacity: int) -> None:
+        super().__init__(capacity)
+        self.width = width
+        self._cur: Optional[list] = None  # [start, open, high, low, close, count, sum]
+        self.late_dropped = 0  # late points without a retained bucket
+
+    def update(self, ts: float, price: float) -> Optional[Tuple]:
+        """
+        Fold one point into its bucket. Returns the bucket row that was closed by this point
+        (a point in a later bucket closes the open one) or, for a late point, the closed bucket
+        it revised; else None.
+        """
+        start = math.floor(ts / self.width) * self.width
+        cur = self._cur
+        if cur is not None and start == cur[0]:
+            if price > cur[2]:
+                cur[2] = price
+            if price < cur[3]:
+                cur[3] = price
+            cur[4] = price
+            cur[5] += 1
+            cur[6] += price
+            return None
+        if cur is None or start > cur[0]:
+            closed = None
+            if cur is not None:
+                closed = tuple(cur)
+                self._append(closed)
+            self._cur = [start, price, price, price, price, 1, price]
+            return closed
+        return self._update_closed(start, price)
+
+    def _update_closed(self, start: float, price: float) -> Optional[Tuple]:
+        # late point for an already closed bucket: widen high/low and totals, keep open/close
+        i = self.search("start", start, "left")
+        if i >= len(self) or self.get("start", i) != start:
+            self.late_dropped += 1
+            return None
+        if price > self.get("high", i):
+            self.set("high", i, price)
+        if price < self.get("low", i):
+            self.set("low", i, price)
+        self.set("count", i, self.get("count", i) + 1)
+        self.set("sum", i, self.get("sum", i) + price)
+        return tuple(self.get(name, i) for name, _ in self.COLUMNS)
+
+    def buckets(self, start: Optional[float] = None, end: Optional[float] = None, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Buckets overlapping [start, end] (the open bucket included), oldest first.
+        With limit, only the newest `limit` buckets of that range are returned.
+        """
+        if start is not None:
+            start = math.floor(start / self.width) * self.width
+        lo = 0 if start is None else self.search("start", start, "left")
+        hi = len(self) if end is None else self.search("start", end, "right")
+        hi = max(lo, hi)
+        cur = self._cur
+        include_cur = cur is not None and (start is None or cur[0] >= start) and (end is None or cur[0] <= end)
+        if limit is not None:
+            lo = max(lo, hi - (limit - 1 if include_cur else limit))
+        cols = self.columns(lo, hi)
+        if include_cur:
+            cols = {name: np.append(cols[name], cur[k]) for k, (name, _) in enumerate(self.COLUMNS)}
+        return cols
+
+
+class RollupTiers:
+    """
+    All rollup tiers of one (market_id, commodity, region) series, updated together.
+    """
+
+    def __init__(self) -> None:
+        self.tiers: Dict[str, RollupSeries] = {name: RollupSeries(width, retention) for name, (width, retention) in ROLLUP_TIERS.items()}
+
+    def __getitem__(self, tier: str) -> RollupSeries:
+        return self.tiers[tier]
+
+    def update(self, ts: float, price: float) -> List[Tuple[str, Tuple]]:
+        """
+        Fold one point into every tier. Returns (tier, bucket row) for each bucket this point
+        closed or, if it is late, revised; usually empty, except at minute/hour/day boundaries.
+        """
+        closed: List[Tuple[str, Tuple]] = []
+        for name, series in self.tiers.items():
+            row = series.update(ts, price)
+            if row is not None:
+                closed.append((name, row))
+        return closed
+
+    def nbytes(self) -> int:
+        return sum(series.nbytes() for series in self.tiers.values())
@@ -0,0 +1,184 @@
+"""
+Per-client websocket senders with bounded queues.
+
+Broadcasting only enqueues frames (synchronously, never awaiting a socket); each client has
+its own sender task that drains its queue, so one slow consumer cannot stall the others.
+When a client's queue is full the configured overflow policy applies:
+
+- drop_oldest : discard the oldest queued frame
+- coalesce    : merge everything queued into one frame with the latest point per
+                (market_id, commodity, region)
+- disconnect  : drop the queue and close the socket (code 1013, try again later)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from .encoding import DictionaryCursor, pack
+from .fanout import Frame
+
+logger = logging.getLogger("market_realtime_dashboard.sender")
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class SenderMetrics:
+    """Totals across all senders, including clients that have already gone."""
+
+    def __init__(self) -> None:
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.points_coalesced = 0
+        self.overflow_disconnects = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "points_coalesced": self.points_coalesced,
+            "overflow_disconnects": self.overflow_disconnects,
+        }
+
+
+class ClientSender:
+    """
+    Owns the outbound side of one websocket: a bounded frame queue and the task draining it.
+
+    on_close(client_id) is awaited once the sender stops on its own (send error or overflow
+    disconnect), so the manager can unregister the client.
+    """
+
+    def __init__(
+        self,
+        client_id: int,
+        websocket,
+        maxsize: int,
+        policy: str,
+        metrics: SenderMetrics,
+        on_close: Callable[[int], Awaitable[None]],
+        send_limit: Optional[asyncio.Semaphore] = None,
+        encoding: str = "json",
+    ) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}; expected one of {', '.join(OVERFLOW_POLICIES)}")
+        self.client_id = client_id
+        self.websocket = websocket
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self._metrics = metrics
+        self._on_close = on_close
+        self._send_limit = send_limit
+        self.encoding = encoding
+        # compact encodings reference shared code tables; track what this client has seen
+        self._dictionary = None if encoding == "json" else DictionaryCursor()
+        self._queue: Deque[Frame] = deque()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._overflowed = False
+        self._task: Optional[asyncio.Task] = None
+        # per-client counters
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop sending; frames still queued are discarded."""
+        self._closed = True
+        self._queue.clear()
+        self._wakeup.set()
+
+    def close(self) -> None:
+        """Stop and cancel the sender task (e.g. when the client has disconnected)."""
+        self.stop()
+        task = self._task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def offer(self, frame: Frame) -> None:
+        """Queue a frame without blocking, applying the overflow policy when full."""
+        if self._closed:
+            return
+        q = self._queue
+        if len(q) >= self.maxsize:
+            if self.policy == "disconnect":
+                self._overflowed = True
+                self._metrics.overflow_disconnects += 1
+                self.stop()
+                return
+            if self.policy == "drop_oldest":
+                q.popleft()
+                self.dropped += 1
+                self._metrics.frames_dropped += 1
+                q.append(frame)
+            else:
+                pending = list(q)
+                pending.append(frame)
+                merged = Frame.coalesce(pending)
+                removed = sum(len(f.parts) for f in pending) - len(merged.parts)
+                self.coalesced += removed
+                self._metrics.points_coalesced += removed
+                q.clear()
+                q.append(merged)
+        else:
+            q.append(frame)
+        if len(q) > self.max_depth:
+            self.max_depth = len(q)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        ws = self.websocket
+        try:
+            while not self._closed:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                frame = self._queue.popleft()
+                if self._dictionary is not None:
+                    delta = self._dictionary.delta()
+                    if delta is not None:
+                        await self._send(pack(delta, self.encoding))
+                await self._send(frame.data)
+                self.sent += 1
+                self._metrics.frames_sent += 1
+        except Exception as exc:
+            # client likely disconnected or errored
+            logger.debug("sender for client %s stopped: %s", self.client_id, exc)
+        finally:
+            if self._overflowed:
+                try:
+                    await ws.close(code=1013)
+                except Exception:
+                    pass
+            self.stop()
+            await self._on_close(self.client_id)
+
+    async def _send(self, data) -> None:
+        ws = self.websocket
+        if self._send_limit is not None:
+            async with self._send_limit:
+                await (ws.send_bytes(data) if isinstance(data, bytes) else ws.send_text(data))
+        else:
+            await (ws.send_bytes(data) if isinstance(data, bytes) else ws.send_text(data))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client_id": self.client_id,
+            "encoding": self.encoding,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
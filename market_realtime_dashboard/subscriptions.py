@@ -0,0 +1,84 @@
+"""
+Inverted subscription index for websocket filter groups.
+
+Every filter group (see fanout.FilterKey) is indexed under its market_id, region and
+commodities; a field left unrestricted puts the group in that field's wildcard set. Finding
+the groups interested in a point is then three dict lookups and a set intersection instead
+of testing every client's filters.
+"""
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Optional, Set
+
+from .fanout import FilterKey
+
+_EMPTY: FrozenSet[FilterKey] = frozenset()
+
+
+class _FieldIndex:
+    """value -> group keys restricted to that value, plus the groups not restricting the field."""
+
+    def __init__(self) -> None:
+        self.by_value: Dict[str, Set[FilterKey]] = {}
+        self.wildcard: Set[FilterKey] = set()
+
+    def add(self, key: FilterKey, values) -> None:
+        if values is None:
+            self.wildcard.add(key)
+            return
+        for v in values:
+            self.by_value.setdefault(v, set()).add(key)
+
+    def remove(self, key: FilterKey, values) -> None:
+        if values is None:
+            self.wildcard.discard(key)
+            return
+        for v in values:
+            keys = self.by_value.get(v)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_value[v]
+
+    def candidates(self, value: Optional[str]) -> Set[FilterKey]:
+        exact = self.by_value.get(value, _EMPTY) if value is not None else _EMPTY
+        if not exact:
+            return self.wildcard
+        if not self.wildcard:
+            return exact
+        return exact | self.wildcard
+
+
+class SubscriptionIndex:
+    """
+    Index of filter group keys by market_id, region and commodity.
+
+    The manager adds a key when its first client joins and removes it when the last one leaves.
+    """
+
+    def __init__(self) -> None:
+        self._market = _FieldIndex()
+        self._region = _FieldIndex()
+        self._commodity = _FieldIndex()
+
+    def add(self, key: FilterKey) -> None:
+        market_id, region, commodities = key[:3]
+        self._market.add(key, None if market_id is None else (market_id,))
+        self._region.add(key, None if region is None else (region,))
+        self._commodity.add(key, commodities)
+
+    def remove(self, key: FilterKey) -> None:
+        market_id, region, commodities = key[:3]
+        self._market.remove(key, None if market_id is None else (market_id,))
+        self._region.remove(key, None if region is None else (region,))
+        self._commodity.remove(key, commodities)
+
+    def match(self, market_id: Optional[str], region: Optional[str], commodity: Optional[str]) -> Set[FilterKey]:
+        """Group keys whose filters accept a point with these fields."""
+        sets = sorted(
+            (self._market.candidates(market_id), self._region.candidates(region), self._commodity.candidates(commodity)),
+            key=len,
+        )
+        if not sets[0]:
+            return set()
+        return sets[0].intersection(sets[1], sets[2])
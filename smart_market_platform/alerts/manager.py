@@ -4,20 +4,54 @@ Alerts manager: detects anomalies and pushes alerts via websocket and mock integ
 from __future__ import annotations
 
 import asyncio
+import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import logging
 
 from ..config import settings
 
+try:
+    import msgpack  # type: ignore
+    _HAS_MSGPACK = True
+except Exception:
+    msgpack = None  # type: ignore
+    _HAS_MSGPACK = False
+
+try:
+    import cbor2  # type: ignore
+    _HAS_CBOR = True
+except Exception:
+    cbor2 = None  # type: ignore
+    _HAS_CBOR = False
+
 logger = logging.getLogger("alerts")
 
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """json (text frames) unless msgpack / cbor was requested and is installed (binary frames)."""
+    requested = (requested or "").lower()
+    if requested == "msgpack" and _HAS_MSGPACK:
+        return "msgpack"
+    if requested == "cbor" and _HAS_CBOR:
+        return "cbor"
+    return "json"
+
+
+def _encode(message: Dict, encoding: str) -> Union[str, bytes]:
+    if encoding == "msgpack":
+        return msgpack.packb(message, use_bin_type=True, default=str)
+    if encoding == "cbor":
+        return cbor2.dumps(message, default=lambda enc, obj: enc.encode(str(obj)))
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
 class AlertsManager:
     _instance = None
 
     def __init__(self):
         self._recent: List[Dict] = []
-        self._subscribers: List = []
+        # websocket -> negotiated encoding
+        self._subscribers: Dict = {}
         self._lock = asyncio.Lock()
 
     @classmethod
@@ -34,15 +68,20 @@ class AlertsManager:
         async with self._lock:
             self._recent.insert(0, alert)
             self._recent = self._recent[:200]
-        # broadcast to websocket subscribers
-        for ws in list(self._subscribers):
+        # broadcast to websocket subscribers, serializing once per encoding
+        message = {"type": "alert", "data": alert}
+        frames: Dict[str, Union[str, bytes]] = {}
+        for ws, encoding in list(self._subscribers.items()):
             try:
-                await ws.send_json({"type": "alert", "data": alert})
+                frame = frames.get(encoding)
+                if frame is None:
+                    frame = frames[encoding] = _encode(message, encoding)
+                if isinstance(frame, bytes):
+                    await ws.send_bytes(frame)
+                else:
+                    await ws.send_text(frame)
             except Exception:
-                try:
-                    self._subscribers.remove(ws)
-                except Exception:
-                    pass
+                self._subscribers.pop(ws, None)
         # mock external sends
         if settings.TELEGRAM_TOKEN:
             logger.info("Mock send to Telegram: %s", alert)
@@ -52,14 +91,11 @@ class AlertsManager:
     async def get_recent_alerts(self, limit: int = 50):
         return self._recent[:limit]
 
-    async def register_ws(self, websocket):
-        self._subscribers.append(websocket)
+    async def register_ws(self, websocket, encoding: str = "json"):
+        self._subscribers[websocket] = encoding
 
     async def unregister_ws(self, websocket):
-        try:
-            self._subscribers.remove(websocket)
-        except Exception:
-            pass
+        self._subscribers.pop(websocket, None)
 
 # background worker example
 async def start_alert_worker():
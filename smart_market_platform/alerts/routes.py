@@ -5,7 +5,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import List
-from .manager import AlertsManager
+from .manager import AlertsManager, negotiate_encoding
 
 router = APIRouter()
 alerts_mgr = AlertsManager.get_instance()
@@ -17,8 +17,13 @@ async def trigger_alert(payload: dict):
 
 @router.websocket("/ws/alerts")
 async def alerts_ws(websocket: WebSocket):
+    """
+    Push alerts as {"type": "alert", "data": {...}}.
+    Optional query param encoding=msgpack|cbor switches to binary frames when the library
+    is installed; otherwise JSON text frames are sent.
+    """
     await websocket.accept()
-    await alerts_mgr.register_ws(websocket)
+    await alerts_mgr.register_ws(websocket, negotiate_encoding(websocket.query_params.get("encoding")))
     try:
         while True:
             try:
@@ -1,4 +1,8 @@
 from fastapi import APIRouter
 
 router = APIRouter()
-from . import commodity, devices, impact, alerts  # noqa: F401
\ No newline at end of file
+from . import commodity, devices, impact, alerts  # noqa: F401
+
+# the submodules declare their own routers; mount them on the package router
+for _module in (commodity, devices, impact, alerts):
+    router.include_router(_module.router)
\ No newline at end of file
@@ -21,7 +21,7 @@ async def price_history(commodity: str, market_id: str, limit: int = Query(200,
     return await stats_manager.get_price_history(market_id=market_id, commodity=commodity, limit=limit)
 
 @router.get("/forecast")
-async def get_forecast(commodity: str):
-    # proxy to forecast_engine
-    from ...forecast_engine.routes import forecast_for_commodity
-    return await forecast_for_commodity(commodity)
\ No newline at end of file
+async def get_forecast(commodity: str, region: Optional[str] = None, market_id: Optional[str] = None):
+    # proxy to forecast_engine (shares its result cache)
+    from ...forecast_engine.routes import cached_forecast
+    return await cached_forecast(commodity, region, market_id)
\ No newline at end of file
@@ -1,17 +1,55 @@
 """
 Public impact endpoint proxies to the impact engine.
+
+POST /impact/batch scores many price pairs at once with one macro snapshot. The body is either
+JSON:
+    {"prev_prices": [100, null, ...], "new_prices": [110, 95, ...],
+     "commodity": "cabai" | ["cabai", ...], "market_id": "m1" | [...], "region": null | [...]}
+or an Arrow IPC stream (Content-Type: application/vnd.apache.arrow.stream, needs pyarrow) with
+columns prev_price, new_price and optional commodity, market_id, region.
+
+The response is NDJSON: a meta line with the macro snapshot and the factor weights of every
+table used, then one line per input row in input order:
+    {"type": "meta", "count": 2, "macro": {...}, "multiplier": 1.03, "stale": false,
+     "factor_tables": {"default": {"weather": 17.31, ...}}}
+    {"i": 0, "commodity": "cabai", "market_id": "m1", "price_change": 0.1, "impact_score": 53.63,
+     "dominant_factor": "weather", "factor_table": "default"}
+A row's factors_with_weights are its factor table's weights, or all zero when dominant_factor is "none".
 """
 from __future__ import annotations
 
-from typing import Dict
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+try:
+    import pyarrow as pa  # type: ignore
+    _HAS_ARROW = True
+except Exception:
+    pa = None  # type: ignore
+    _HAS_ARROW = False
 
 router = APIRouter()
 
+ARROW_CONTENT_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file")
+# Upper bound for one /impact/batch request
+MAX_BATCH_ROWS = 500_000
+# NDJSON rows per streamed chunk
+STREAM_CHUNK_ROWS = 2000
+
 @router.get("/impact")
 async def get_impact(commodity: str, market_id: str, prev_price: float, new_price: float) -> Dict:
     from ...impact_engine.engine import compute_impact_with_macro
-    res = compute_impact_with_macro(prev_price=prev_price, new_price=new_price, commodity=commodity, market_id=market_id)
+    from ...macro_data.engine import macro_provider
+
+    # a backend fetch on a macro cache miss runs in a worker thread, not on the event loop
+    macro = (await macro_provider.snapshot_async()).data
+    res = compute_impact_with_macro(prev_price=prev_price, new_price=new_price, commodity=commodity, market_id=market_id, macro=macro)
     return {
         "commodity": commodity,
         "market_id": market_id,
@@ -19,4 +57,170 @@ async def get_impact(commodity: str, market_id: str, prev_price: float, new_pric
         "impact_score": res.impact_score,
         "dominant_factor": res.dominant_factor,
         "factors_with_weights": res.factors_with_weights,
-    }
\ No newline at end of file
+    }
+
+
+def _column(value: Any, n: int, name: str) -> List[Optional[str]]:
+    """Per-row string column from a scalar (broadcast) or a list of length n."""
+    if value is None or isinstance(value, str):
+        return [value] * n
+    if not isinstance(value, list) or len(value) != n:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be a string or a list with one value per price")
+    return [None if v is None else str(v) for v in value]
+
+
+def _prices(values: Any, name: str, allow_missing: bool) -> np.ndarray:
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail=f"'{name}' must be a list of numbers")
+    try:
+        arr = np.array([math.nan if v is None else float(v) for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"'{name}' must contain only numbers")
+    if not allow_missing and not np.isfinite(arr).all():
+        raise HTTPException(status_code=400, detail=f"'{name}' must contain only finite numbers")
+    return arr
+
+
+def _parse_json(body: bytes) -> Tuple[np.ndarray, np.ndarray, Dict[str, List[Optional[str]]]]:
+    try:
+        data = json.loads(body)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(data, dict) or "new_prices" not in data:
+        raise HTTPException(status_code=400, detail="Body must be an object with 'new_prices' (and 'prev_prices')")
+    new = _prices(data["new_prices"], "new_prices", allow_missing=False)
+    n = len(new)
+    prev = _prices(data["prev_prices"], "prev_prices", allow_missing=True) if data.get("prev_prices") is not None else np.full(n, math.nan)
+    if len(prev) != n:
+        raise HTTPException(status_code=400, detail="prev_prices and new_prices must have the same length")
+    cols = {name: _column(data.get(name), n, name) for name in ("commodity", "market_id", "region")}
+    return prev, new, cols
+
+
+def _parse_arrow(body: bytes) -> Tuple[np.ndarray, np.ndarray, Dict[str, List[Optional[str]]]]:
+    if not _HAS_ARROW:
+        raise HTTPException(status_code=415, detail="Arrow input needs pyarrow on the server; send JSON instead")
+    try:
+        try:
+            table = pa.ipc.open_stream(body).read_all()
+        except pa.ArrowInvalid:
+            table = pa.ipc.open_file(body).read_all()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid Arrow IPC payload")
+    if "new_price" not in table.column_names:
+        raise HTTPException(status_code=400, detail="Arrow table needs a 'new_price' column (and 'prev_price')")
+    n = table.num_rows
+    new = table.column("new_price").cast(pa.float64()).to_numpy(zero_copy_only=False)
+    if not np.isfinite(new).all():
+        raise HTTPException(status_code=400, detail="'new_price' must contain only finite numbers")
+    if "prev_price" in table.column_names:
+        prev = table.column("prev_price").cast(pa.float64()).fill_null(math.nan).to_numpy(zero_copy_only=False)
+    else:
+        prev = np.full(n, math.nan)
+    cols = {
+        name: (table.column(name).cast(pa.string()).to_pylist() if name in table.column_names else [None] * n)
+        for name in ("commodity", "market_id", "region")
+    }
+    return prev, new, cols
+
+
+def _ndjson(
+    meta: Dict[str, Any],
+    cols: Dict[str, List[Optional[str]]],
+    changes: List[float],
+    scores: List[float],
+    dominants: List[str],
+    table_names: List[str],
+) -> Iterator[bytes]:
+    dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    yield (dumps(meta) + "\n").encode("utf-8")
+    commodities, markets = cols["commodity"], cols["market_id"]
+    n = len(changes)
+    for start in range(0, n, STREAM_CHUNK_ROWS):
+        lines = [
+            dumps({
+                "i": i,
+                "commodity": commodities[i],
+                "market_id": markets[i],
+                "price_change": changes[i],
+                "impact_score": scores[i],
+                "dominant_factor": dominants[i],
+                "factor_table": table_names[i],
+            })
+            for i in range(start, min(start + STREAM_CHUNK_ROWS, n))
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _score(prev: np.ndarray, new: np.ndarray, cols: Dict[str, List[Optional[str]]], macro) -> Tuple[List[float], List[float], List[str], List[str], Dict[str, Dict[str, float]]]:
+    """
+    Impact per row, grouped by (commodity, region) so each factor table is applied in one
+    compute_impact_with_macro_batch call. Returns changes, scores, dominant factors, factor
+    table names and the weights of every table used.
+    """
+    from ...impact_engine.engine import compute_impact_with_macro_batch
+
+    n = len(new)
+    groups: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+    for i, key in enumerate(zip(cols["commodity"], cols["region"])):
+        groups.setdefault(key, []).append(i)
+
+    changes: List[float] = [0.0] * n
+    scores: List[float] = [0.0] * n
+    dominants: List[str] = ["none"] * n
+    table_names: List[str] = ["default"] * n
+    tables: Dict[str, Dict[str, float]] = {}
+    for (commodity, region), idx in groups.items():
+        if len(idx) == n:
+            rows = None
+            res = compute_impact_with_macro_batch(prev, new, commodity=commodity, region=region, macro=macro)
+        else:
+            rows = np.asarray(idx)
+            res = compute_impact_with_macro_batch(prev[rows], new[rows], commodity=commodity, region=region, macro=macro)
+        tables[res.table.name] = res.table.weights
+        c, s, d = res.rounded()
+        if rows is None:
+            changes, scores, dominants = c, s, d
+            table_names = [res.table.name] * n
+        else:
+            for j, i in enumerate(idx):
+                changes[i], scores[i], dominants[i], table_names[i] = c[j], s[j], d[j], res.table.name
+    return changes, scores, dominants, table_names, tables
+
+
+def _parse(body: bytes, content_type: str) -> Tuple[np.ndarray, np.ndarray, Dict[str, List[Optional[str]]]]:
+    if any(ct in content_type for ct in ARROW_CONTENT_TYPES):
+        prev, new, cols = _parse_arrow(body)
+    else:
+        prev, new, cols = _parse_json(body)
+    n = len(new)
+    if n > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch too large ({n} rows, max {MAX_BATCH_ROWS})")
+    return prev, new, cols
+
+
+@router.post("/impact/batch")
+async def impact_batch(request: Request) -> StreamingResponse:
+    """
+    Vectorized impact with macro adjustment for many price pairs (see module docstring); all
+    rows share the same macro snapshot. Parsing and scoring run in a worker thread so a large
+    batch does not hold up the event loop; the NDJSON lines are encoded as they are streamed.
+    """
+    from ...impact_engine.engine import macro_multiplier
+    from ...macro_data.engine import macro_provider
+
+    content_type = request.headers.get("content-type", "").lower()
+    body = await request.body()
+    prev, new, cols = await asyncio.to_thread(_parse, body, content_type)
+    snapshot = await macro_provider.snapshot_async()
+    changes, scores, dominants, table_names, tables = await asyncio.to_thread(_score, prev, new, cols, snapshot.data)
+
+    meta = {
+        "type": "meta",
+        "count": len(new),
+        "macro": snapshot.data.as_dict(),
+        "multiplier": macro_multiplier(snapshot.data),
+        "stale": snapshot.stale,
+        "factor_tables": tables,
+    }
+    return StreamingResponse(_ndjson(meta, cols, changes, scores, dominants, table_names), media_type="application/x-ndjson")
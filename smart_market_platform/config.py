@@ -30,5 +30,39 @@ class Settings:
     # NEW: host/port defaults (used by programmatic runner)
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "6969"))
+    # permessage-deflate for websocket endpoints (negotiated with clients that support it)
+    WS_PER_MESSAGE_DEFLATE: bool = os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() in ("1", "true", "yes")
+    # macro data snapshots: backend (simulated | file), JSON file for the file backend, bucket length
+    MACRO_SOURCE: str = os.getenv("MACRO_SOURCE", "simulated")
+    MACRO_FILE: Optional[str] = os.getenv("MACRO_FILE")
+    MACRO_TTL_SECONDS: float = float(os.getenv("MACRO_TTL_SECONDS", "60"))
+    # validation windows: max resident (market, commodity, region) windows, idle eviction
+    # (seconds, 0 = off) and optional SQLite file for evicted windows / restarts
+    VALIDATION_MAX_WINDOWS: int = int(os.getenv("VALIDATION_MAX_WINDOWS", "10000"))
+    VALIDATION_WINDOW_IDLE_SECONDS: float = float(os.getenv("VALIDATION_WINDOW_IDLE_SECONDS", "86400"))
+    VALIDATION_SPILL_PATH: Optional[str] = os.getenv("VALIDATION_SPILL_PATH")
+    # multi-source verification: per-source lookup timeout and cache TTL per (source, market, commodity,
+    # region); lookups without a price are cached for the shorter negative TTL
+    VALIDATION_SOURCE_TIMEOUT_SECONDS: float = float(os.getenv("VALIDATION_SOURCE_TIMEOUT_SECONDS", "1.0"))
+    VALIDATION_SOURCE_TTL_SECONDS: float = float(os.getenv("VALIDATION_SOURCE_TTL_SECONDS", "30"))
+    VALIDATION_SOURCE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("VALIDATION_SOURCE_NEGATIVE_TTL_SECONDS", "2"))
+    # simulated reference sources (window median + noise) instead of none, for local testing
+    VALIDATION_SIMULATED_SOURCES: bool = os.getenv("VALIDATION_SIMULATED_SOURCES", "false").lower() in ("1", "true", "yes")
+    # quarantined prices: SQLite file and size of the in-memory ring of recent entries
+    QUARANTINE_DB_PATH: str = os.getenv("QUARANTINE_DB_PATH", "./quarantine.db")
+    QUARANTINE_RING_SIZE: int = int(os.getenv("QUARANTINE_RING_SIZE", "1000"))
+    # inline validation of /ingest prices: off | tag (broadcast tagged, not stored) | divert (dropped)
+    INGEST_VALIDATION: str = os.getenv("INGEST_VALIDATION", "tag").lower()
+    # forecast models: days of daily prices in each online trend fit
+    FORECAST_WINDOW_DAYS: int = int(os.getenv("FORECAST_WINDOW_DAYS", "90"))
+    # cached forecast results (per commodity/region/market/horizon), LRU bound
+    FORECAST_CACHE_SIZE: int = int(os.getenv("FORECAST_CACHE_SIZE", "10000"))
+    # background model training: worker processes (0 = off) and dispatch interval
+    FORECAST_TRAIN_WORKERS: int = int(os.getenv("FORECAST_TRAIN_WORKERS", "2"))
+    FORECAST_TRAIN_INTERVAL_SECONDS: float = float(os.getenv("FORECAST_TRAIN_INTERVAL_SECONDS", "60"))
+    # directory of trained model artifacts (JSON header + .npy arrays, memory-mapped); empty = memory only
+    FORECAST_MODEL_DIR: str = os.getenv("FORECAST_MODEL_DIR", "./models")
+    # how often a model lookup re-checks its header on disk (models saved by the training worker)
+    FORECAST_MODEL_RECHECK_SECONDS: float = float(os.getenv("FORECAST_MODEL_RECHECK_SECONDS", "5"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+On-disk format for trained forecast models.
+
+One model is a small JSON header plus one .npy file per array, all in the model directory:
+
+  <slug>.json                     header (format name and version, scope, model kind,
+                                  model version, trained_at, array file names / shapes)
+  <slug>.v<version>.coef.npy      float64 [slope, intercept]
+  <slug>.v<version>.seasonal.npy  float64 [7] day-of-week offsets, Monday first
+  <slug>.v<version>.resid.npy     float64 [resid_std, mean, n, last_day]
+
+The slug is the URL-quoted (commodity, region, market_id) joined by "+", with "@" for None.
+Arrays are loaded with np.load(mmap_mode="r"): opening a model reads the header only and
+maps the arrays, so a server with hundreds of models starts without reading them, and
+uvicorn workers mapping the same files share their pages. All file access is blocking:
+refresh() rescans the directory and (re)loads every model whose header changed since the
+last call; the training scheduler runs it in a worker thread every `recheck` seconds and
+serves lookups from memory. A load that fails is retried when its header changes, or after
+FAILED_RETRY_SECONDS.
+
+Only one process saves models in a directory: the one holding the writer lock
+(acquire_writer, an flock on .writer.lock). The training scheduler of every other uvicorn
+worker only reads, so versions stay increasing per scope. save() writes the versioned array
+files first and then replaces the header atomically (os.replace), so a reader always sees a
+complete model. Arrays of the previous version are removed afterwards. Already mapped copies
+stay valid until they are unmapped, and a reader that opened the old header just before the
+swap fails that load and picks up the new header on the next refresh().
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, IO, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from .online import ForecastKey
+
+try:
+    import fcntl
+    _HAS_FCNTL = True
+except ImportError:  # Windows: no flock, a single process is assumed
+    fcntl = None  # type: ignore
+    _HAS_FCNTL = False
+
+logger = logging.getLogger("forecast_engine.artifacts")
+
+FORMAT_NAME = "smart-market-forecast"
+FORMAT_VERSION = 1
+HEADER_SUFFIX = ".json"
+LOCK_FILE = ".writer.lock"
+FAILED_RETRY_SECONDS = 60.0
+_NONE = "@"
+_SEP = "+"  # quote(safe="") escapes both, so neither appears inside a part
+
+
+def scope_slug(scope: ForecastKey) -> str:
+    return _SEP.join(_NONE if part is None else quote(part, safe="") for part in scope)
+
+
+def slug_scope(slug: str) -> Optional[ForecastKey]:
+    parts = slug.split(_SEP)
+    if len(parts) != 3 or parts[0] == _NONE:
+        return None
+    commodity, region, market_id = (None if p == _NONE else unquote(p) for p in parts)
+    return (commodity, region, market_id)  # type: ignore[return-value]
+
+
+def _atomic_write(path: str, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ArtifactStore:
+    """Directory of model artifacts with lazy, memory-mapped loading."""
+
+    def __init__(self, path: str, recheck: float = 5.0) -> None:
+        self.path = path
+        self.recheck = recheck
+        self._index: Dict[ForecastKey, str] = {}  # scope -> header path
+        # scope -> (header stat, model or None if it failed to load, checked at)
+        self._loaded: Dict[ForecastKey, Tuple[Tuple[int, int, int], Optional[Dict[str, Any]], float]] = {}
+        self._lock = threading.Lock()  # refresh() and save() run in worker threads
+        self._lock_fh: Optional[IO] = None
+        self.loads = 0
+        self.saves = 0
+        self.errors = 0
+
+    def scan(self) -> int:
+        """List the headers in the directory (no file contents are read); returns the count."""
+        self._index.clear()
+        if not os.path.isdir(self.path):
+            return 0
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(HEADER_SUFFIX) and not entry.name.startswith("."):
+                scope = slug_scope(entry.name[: -len(HEADER_SUFFIX)])
+                if scope is not None:
+                    self._index[scope] = entry.path
+        return len(self._index)
+
+    def __contains__(self, scope: ForecastKey) -> bool:
+        return scope in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def refresh(self) -> Dict[ForecastKey, Dict[str, Any]]:
+        """
+        Rescan the directory and load the models whose header changed (or appeared) since the
+        last refresh; returns them by scope. Blocking: run it in a worker thread.
+        """
+        changed = {}
+        with self._lock:
+            self.scan()
+            for scope in list(self._loaded):
+                if scope not in self._index:
+                    del self._loaded[scope]  # header removed
+            for scope in self._index:
+                before = self._loaded.get(scope)
+                model = self.load(scope)
+                if model is not None and (before is None or before[1] is not model):
+                    changed[scope] = model
+        return changed
+
+    def load(self, scope: ForecastKey) -> Optional[Dict[str, Any]]:
+        """
+        The scope's model as {"header": ..., "arrays": {name: read-only memmap}}, or None if
+        there is no usable artifact. Stats the header and only reads it again when it changed
+        since the last load. Blocking: call it from a worker thread.
+        """
+        now = time.monotonic()
+        cached = self._loaded.get(scope)
+        header_path = self._index.get(scope)
+        if header_path is None:
+            return None
+        try:
+            st = os.stat(header_path)
+        except OSError:
+            self._index.pop(scope, None)
+            self._loaded.pop(scope, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if cached is not None and cached[0] == stamp and (cached[1] is not None or now - cached[2] < FAILED_RETRY_SECONDS):
+            self._loaded[scope] = (stamp, cached[1], cached[2] if cached[1] is None else now)
+            return cached[1]
+        model = None
+        try:
+            model = self._read(header_path)
+            self.loads += 1
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("could not load forecast model %s from %s: %s", scope, header_path, exc)
+        self._loaded[scope] = (stamp, model, now)
+        return model
+
+    def _read(self, header_path: str) -> Dict[str, Any]:
+        with open(header_path, "rb") as fh:
+            header = json.loads(fh.read())
+        if header.get("format") != FORMAT_NAME:
+            raise ValueError(f"not a forecast model header (format {header.get('format')!r})")
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported artifact format version {header.get('format_version')!r}")
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            arr = np.load(os.path.join(self.path, spec["file"]), mmap_mode="r", allow_pickle=False)
+            if list(arr.shape) != spec["shape"]:
+                raise ValueError(f"array {name} has shape {arr.shape}, header says {spec['shape']}")
+            arrays[name] = arr
+        return {"header": header, "arrays": arrays}
+
+    def acquire_writer(self) -> bool:
+        """
+        Try to become the process that saves models in this directory (non-blocking); True if
+        this process holds the writer lock. The lock is released by release_writer() or when
+        the process exits.
+        """
+        if self._lock_fh is not None or not _HAS_FCNTL:
+            return True
+        os.makedirs(self.path, exist_ok=True)
+        fh = open(os.path.join(self.path, LOCK_FILE), "a+b")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._lock_fh = fh
+        return True
+
+    def release_writer(self) -> None:
+        if self._lock_fh is not None:
+            self._lock_fh.close()  # closing the file drops the flock
+            self._lock_fh = None
+
+    @property
+    def is_writer(self) -> bool:
+        return self._lock_fh is not None or not _HAS_FCNTL
+
+    def save(self, scope: ForecastKey, model: str, version: int, trained_at: float, arrays: Dict[str, np.ndarray]) -> str:
+        """
+        Write one model (float64 arrays); returns the header path. Call with the writer lock held,
+        from a worker thread.
+        """
+        with self._lock:
+            return self._save(scope, model, version, trained_at, arrays)
+
+    def _save(self, scope: ForecastKey, model: str, version: int, trained_at: float, arrays: Dict[str, np.ndarray]) -> str:
+        os.makedirs(self.path, exist_ok=True)
+        slug = scope_slug(scope)
+        header_path = os.path.join(self.path, slug + HEADER_SUFFIX)
+        previous = self._files(header_path)
+        specs = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr, dtype="<f8")
+            fname = f"{slug}.v{version}.{name}.npy"
+            _atomic_write(os.path.join(self.path, fname), lambda fh, a=arr: np.save(fh, a, allow_pickle=False))
+            specs[name] = {"file": fname, "shape": list(arr.shape), "dtype": "<f8"}
+        header = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION,
+            "scope": {"commodity": scope[0], "region": scope[1], "market_id": scope[2]},
+            "model": model,
+            "model_version": version,
+            "trained_at": trained_at,
+            "arrays": specs,
+        }
+        _atomic_write(header_path, lambda fh: fh.write(json.dumps(header, ensure_ascii=False, indent=1).encode()))
+        for fname in previous - {s["file"] for s in specs.values()}:
+            try:
+                os.unlink(os.path.join(self.path, fname))
+            except OSError:
+                pass
+        self._index[scope] = header_path
+        self._loaded.pop(scope, None)
+        self.saves += 1
+        return header_path
+
+    @staticmethod
+    def _files(header_path: str) -> set:
+        """Array files referenced by an existing header (empty if there is none)."""
+        try:
+            with open(header_path, "rb") as fh:
+                return {spec["file"] for spec in json.loads(fh.read())["arrays"].values()}
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "on_disk": len(self._index),
+            "loaded": sum(1 for _, m, _ in self._loaded.values() if m is not None),
+            "writer": self.is_writer,
+            "loads": self.loads,
+            "saves": self.saves,
+            "errors": self.errors,
+        }
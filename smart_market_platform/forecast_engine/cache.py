@@ -0,0 +1,95 @@
+"""
+Forecast result cache.
+
+Entries are keyed by (commodity, region, market_id, horizon) and remember the model version
+they were computed from; a lookup with a different version (the model saw new data, or a
+new trained artifact was swapped in) recomputes. ForecastModels also calls invalidate() for
+every scope a closed daily bucket updated, so stale entries are dropped right away instead of
+waiting for the LRU bound.
+
+Each entry holds the future of its computation, so concurrent identical requests (e.g. a
+dashboard refresh storm) share one computation (single-flight). A computation that fails is
+shared by the requests already waiting on it but not cached for later ones.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger("forecast_engine.cache")
+
+Scope = Tuple[str, Optional[str], Optional[str]]  # (commodity, region, market_id)
+CacheKey = Tuple[str, Optional[str], Optional[str], int]  # scope + horizon
+
+
+class ForecastCache:
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        # key -> (model version, future with the forecast)
+        self._entries: "OrderedDict[CacheKey, Tuple[Hashable, asyncio.Future]]" = OrderedDict()
+        # scope -> cached keys of that scope (all horizons), for invalidate()
+        self._by_scope: Dict[Scope, Set[CacheKey]] = {}
+        self.hits = 0
+        self.joined = 0  # requests that waited on an in-flight computation
+        self.computed = 0
+        self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: CacheKey, version: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """The cached forecast for key at this model version, computing it (once) if needed."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version and entry[1].get_loop() is asyncio.get_running_loop():
+            fut = entry[1]
+            if not fut.done():
+                self.joined += 1
+            elif fut.cancelled() or fut.exception() is not None:
+                fut = None  # failed computation: compute again
+            else:
+                self.hits += 1
+            if fut is not None:
+                self._entries.move_to_end(key)
+                return await asyncio.shield(fut)
+        fut = asyncio.ensure_future(compute())
+        self.computed += 1
+        self._entries[key] = (version, fut)
+        self._entries.move_to_end(key)
+        self._by_scope.setdefault(key[:3], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old, _ = self._entries.popitem(last=False)
+            self._unindex(old)
+        return await asyncio.shield(fut)
+
+    def _unindex(self, key: CacheKey) -> None:
+        keys = self._by_scope.get(key[:3])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_scope[key[:3]]
+
+    def invalidate(self, scope: Scope) -> int:
+        """Drop every cached horizon of a (commodity, region, market_id) scope."""
+        keys = self._by_scope.pop(scope, None)
+        if not keys:
+            return 0
+        for key in keys:
+            self._entries.pop(key, None)
+        self.invalidated += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_scope.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "joined": self.joined,
+            "computed": self.computed,
+            "invalidated": self.invalidated,
+        }
@@ -0,0 +1,253 @@
+"""
+Online linear-trend forecast models fed from the realtime daily rollups.
+
+Each OnlineTrend keeps the running least-squares sums (n, Σx, Σy, Σx², Σxy, Σy²) of its
+(day, daily mean price) observations over the last `window_days` days, so adding a day,
+dropping the oldest one and fitting the trend are all O(1); a 7-day forecast no longer
+regenerates and refits a series per request. Sums are taken relative to the first
+observation (shifted data) and recomputed exactly from the kept observations every
+`window_days` updates, so cancellation and drift stay bounded.
+
+ForecastModels keeps one model per (commodity, region, market_id) scope: every closed daily
+bucket of a (market_id, commodity, region) series updates its market model, its region model
+(commodity, region, None) and the commodity-wide model (commodity, None, None). attach()
+seeds the models from the closed 1d buckets a RealtimeManager already holds and registers
+a bucket listener for the ones that close later. Observations are expected roughly in day
+order; a day older than the window is ignored, and a day seen again (a daily bucket revised
+by a late point) replaces that day's price. Update listeners (add_listener, e.g. the forecast
+cache) are called with every scope a new daily price changed.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger("forecast_engine.online")
+
+DAY_SECONDS = 86400
+# rollup tier whose closed buckets feed the models (see market_realtime_dashboard.rollups)
+DAILY_TIER = "1d"
+
+ForecastKey = Tuple[str, Optional[str], Optional[str]]  # (commodity, region, market_id)
+
+
+class TrendFit:
+    """A fitted trend: price(day) = level + slope * (day - last_day)."""
+
+    __slots__ = ("slope", "level", "last_day", "resid_std", "mean", "n", "days")
+
+    def __init__(self, slope: float, level: float, last_day: float, resid_std: float, mean: float, n: int, days: int) -> None:
+        self.slope = slope
+        self.level = level
+        self.last_day = last_day
+        self.resid_std = resid_std
+        self.mean = mean
+        self.n = n
+        self.days = days
+
+    @property
+    def confidence(self) -> float:
+        # same heuristic as the previous polyfit forecaster
+        return max(0.1, 1 - self.resid_std / (self.mean + 1e-9))
+
+    def forecast(self, horizon: int) -> List[Tuple[float, float]]:
+        """(day, price) for the `horizon` days after the last observed day."""
+        return [(self.last_day + i, self.level + self.slope * i) for i in range(1, horizon + 1)]
+
+
+class OnlineTrend:
+    """Incremental least-squares trend over the observations of the last window_days days."""
+
+    __slots__ = ("window_days", "_obs", "_x0", "_y0", "_n", "_sx", "_sy", "_sxx", "_sxy", "_syy", "_last_day", "_updates", "version")
+
+    def __init__(self, window_days: int) -> None:
+        if window_days < 2:
+            raise ValueError("window_days must be at least 2")
+        self.window_days = window_days
+        self._obs: Deque[Tuple[float, float]] = deque()
+        self._x0 = self._y0 = 0.0  # shift origin of the sums
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = self._syy = 0.0
+        self._last_day = -math.inf
+        self._updates = 0
+        self.version = 0  # bumped on every change, e.g. for cache keys
+
+    def __len__(self) -> int:
+        return self._n
+
+    def add(self, day: float, price: float) -> bool:
+        """
+        Add one (day, price) observation, replacing the price of a day already in the window;
+        returns False if it is older than the window.
+        """
+        day, price = float(day), float(price)
+        if day <= self._last_day - self.window_days:
+            return False
+        for i, (d, p) in enumerate(self._obs if day <= self._last_day else ()):
+            if d == day:
+                self._include(d, p, -1.0)
+                self._obs[i] = (day, price)
+                self._include(day, price, 1.0)
+                self._updates += 1
+                if self._updates >= self.window_days:
+                    self._rebase()
+                self.version += 1
+                return True
+        if not self._n:
+            self._x0, self._y0 = day, price
+        self._obs.append((day, price))
+        self._include(day, price, 1.0)
+        if day > self._last_day:
+            self._last_day = day
+        cutoff = self._last_day - self.window_days
+        obs = self._obs
+        while obs and obs[0][0] <= cutoff:
+            self._include(*obs.popleft(), -1.0)
+        self._updates += 1
+        if self._updates >= self.window_days:
+            self._rebase()
+        self.version += 1
+        return True
+
+    def observations(self) -> Tuple[List[float], List[float]]:
+        """(days, prices) of the observations in the window, oldest first (copies)."""
+        return [d for d, _ in self._obs], [p for _, p in self._obs]
+
+    def _include(self, day: float, price: float, sign: float) -> None:
+        x, y = day - self._x0, price - self._y0
+        self._n += int(sign)
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxx += sign * x * x
+        self._sxy += sign * x * y
+        self._syy += sign * y * y
+
+    def _rebase(self) -> None:
+        """Recompute the sums exactly from the kept observations, around a fresh origin."""
+        self._updates = 0
+        obs = self._obs
+        self._n = len(obs)
+        if not obs:
+            self._sx = self._sy = self._sxx = self._sxy = self._syy = 0.0
+            return
+        self._x0, self._y0 = obs[0]
+        xs = [d - self._x0 for d, _ in obs]
+        ys = [p - self._y0 for _, p in obs]
+        self._sx, self._sy = math.fsum(xs), math.fsum(ys)
+        self._sxx = math.fsum(x * x for x in xs)
+        self._sxy = math.fsum(x * y for x, y in zip(xs, ys))
+        self._syy = math.fsum(y * y for y in ys)
+
+    def fit(self) -> Optional[TrendFit]:
+        """The least-squares trend, or None until the window spans at least two days."""
+        n = self._n
+        if n < 2:
+            return None
+        mx, my = self._sx / n, self._sy / n
+        cxx = self._sxx - n * mx * mx
+        if cxx <= 1e-9:
+            return None  # every observation on the same day: no trend to fit
+        cxy = self._sxy - n * mx * my
+        cyy = self._syy - n * my * my
+        slope = cxy / cxx
+        sse = max(cyy - slope * cxy, 0.0)
+        last_x = self._last_day - self._x0
+        level = self._y0 + my + slope * (last_x - mx)
+        days = int(self._last_day - self._obs[0][0]) + 1 if self._obs else 0
+        return TrendFit(slope, level, self._last_day, math.sqrt(sse / n), self._y0 + my, n, days)
+
+
+class ForecastModels:
+    """OnlineTrend per (commodity, region, market_id) scope, fed by closed daily buckets."""
+
+    def __init__(self, window_days: int = 90) -> None:
+        self.window_days = window_days
+        self._models: Dict[ForecastKey, OnlineTrend] = {}
+        self._listeners: List[Callable[[ForecastKey], None]] = []
+        self.observed = 0
+        self.ignored = 0
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    @staticmethod
+    def _scopes(market_id: str, commodity: str, region: Optional[str]) -> List[ForecastKey]:
+        scopes: List[ForecastKey] = [(commodity, None, None), (commodity, region, market_id)]
+        if region is not None:
+            scopes.append((commodity, region, None))
+        return scopes
+
+    def observe(self, market_id: str, commodity: str, region: Optional[str], day_start: float, price: float) -> None:
+        """Add the daily price of one market series (day_start in epoch seconds) to its scopes."""
+        day = math.floor(day_start / DAY_SECONDS)
+        for scope in self._scopes(market_id, commodity, region):
+            model = self._models.get(scope)
+            if model is None:
+                model = self._models[scope] = OnlineTrend(self.window_days)
+            if not model.add(day, price):
+                self.ignored += 1
+                continue
+            for listener in self._listeners:
+                try:
+                    listener(scope)
+                except Exception as exc:
+                    logger.warning("forecast model listener %r failed for %s: %s", listener, scope, exc)
+        self.observed += 1
+
+    def add_listener(self, listener: Callable[[ForecastKey], None]) -> None:
+        """Call listener(scope) whenever the model of a (commodity, region, market_id) scope changes."""
+        self._listeners.append(listener)
+
+    def on_bucket_closed(self, key: Tuple[str, str, Optional[str]], tier: str, row: Tuple) -> None:
+        """RealtimeManager bucket listener: row is (start, open, high, low, close, count, sum)."""
+        if tier != DAILY_TIER:
+            return
+        start, count, total = row[0], row[5], row[6]
+        if count:
+            self.observe(key[0], key[1], key[2], start, total / count)
+
+    def seed(self, rollups: Dict[Tuple[str, str, Optional[str]], Any]) -> int:
+        """Feed the closed daily buckets of existing RollupTiers (all series, in day order)."""
+        rows = []
+        for key, tiers in rollups.items():
+            series = tiers[DAILY_TIER]
+            cols = series.columns(0, len(series))
+            for start, count, total in zip(cols["start"].tolist(), cols["count"].tolist(), cols["sum"].tolist()):
+                if count:
+                    rows.append((start, key, total / count))
+        rows.sort(key=lambda r: r[0])
+        for start, key, price in rows:
+            self.observe(key[0], key[1], key[2], start, price)
+        return len(rows)
+
+    def attach(self, manager) -> None:
+        """Seed from a RealtimeManager's rollups and follow its daily bucket closes."""
+        seeded = self.seed(manager.rollups)
+        manager.add_bucket_listener(self.on_bucket_closed)
+        logger.info("forecast models attached to realtime rollups (%d daily buckets seeded)", seeded)
+
+    def get(self, commodity: str, region: Optional[str] = None, market_id: Optional[str] = None) -> Optional[OnlineTrend]:
+        return self._models.get((commodity, region, market_id))
+
+    def scopes(self) -> List[ForecastKey]:
+        return list(self._models)
+
+    def version(self, commodity: str, region: Optional[str] = None, market_id: Optional[str] = None) -> int:
+        """Version of a scope's model (0 while it has none); changes with every new daily price."""
+        model = self._models.get((commodity, region, market_id))
+        return model.version if model is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": len(self._models),
+            "window_days": self.window_days,
+            "observed": self.observed,
+            "ignored": self.ignored,
+        }
+
+
+forecast_models = ForecastModels(settings.FORECAST_WINDOW_DAYS)
@@ -1,46 +1,106 @@
 """
-Forecast endpoints: simple ARIMA/SARIMAX and optional LSTM/Prophet.
+Forecast endpoints: linear-trend forecasts from the online models in online.py, which are
+fed with the daily price rollups of the realtime manager (see main.py lifespan). Once the
+training scheduler (scheduler.py) has fitted a scope, the forecast comes from that fit alone
+(its trend plus day-of-week offsets, its residual spread for the confidence), as long as it
+covers the scope's data up to MAX_TRAINED_LAG_DAYS before the latest daily price; otherwise
+the online trend is used.
+
+Results go through the forecast cache (cache.py): one computation per scope, horizon and
+model version, shared by concurrent requests and dropped when a new daily price arrives.
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..config import settings
+from .cache import ForecastCache
+from .online import DAY_SECONDS, forecast_models
+from .scheduler import TrainedModel, training_scheduler
 
 router = APIRouter()
 
-# Lightweight in-memory sample series generator
-def _generate_series(commodity: str, days: int = 90):
-    rng = pd.date_range(end=datetime.utcnow(), periods=days, freq="D")
-    base = {"cabai": 15000, "beras": 12000, "bawang": 9000}.get(commodity, 10000)
-    series = base + np.cumsum(np.random.normal(0, 200, size=days))
-    return pd.Series(series, index=rng)
+FORECAST_DAYS = 7
+MAX_FORECAST_DAYS = 90
+# a trained model missing more of the newest daily prices than this is stale: use the online trend
+MAX_TRAINED_LAG_DAYS = 2
 
-@router.get("/{commodity}")
-async def forecast_for_commodity(commodity: str):
+forecast_cache = ForecastCache(settings.FORECAST_CACHE_SIZE)
+forecast_models.add_listener(forecast_cache.invalidate)
+
+
+def _forecast(commodity: str, region: Optional[str], market_id: Optional[str], horizon: int, trained: Optional[TrainedModel]) -> Dict[str, Any]:
+    model = forecast_models.get(commodity, region, market_id)
+    fit = model.fit() if model is not None else None
+    if fit is None:
+        raise HTTPException(status_code=404, detail=f"not enough daily price history to forecast {commodity}")
+    if trained is not None and fit.last_day - trained.last_day > MAX_TRAINED_LAG_DAYS:
+        trained = None  # stale: not retrained since several new daily prices
+    if trained is not None:
+        points = [(day, trained.predict(day)) for day, _ in fit.forecast(horizon)]
+        confidence, slope = trained.confidence, trained.slope
+        model = "trend+weekly" if trained.seasonal_fitted else "trend"
+    else:
+        points = fit.forecast(horizon)
+        confidence, slope, model = fit.confidence, fit.slope, "trend"
+    return {
+        "commodity": commodity,
+        "region": region,
+        "market_id": market_id,
+        f"forecast_{horizon}d": [
+            {"date": datetime.fromtimestamp(day * DAY_SECONDS, tz=timezone.utc).isoformat(), "price": float(round(price, 2))}
+            for day, price in points
+        ],
+        "confidence": round(confidence, 2),
+        "trend_per_day": round(slope, 4),
+        "days": fit.days,
+        "model": model,
+        "trained_at": trained.trained_at if trained is not None else None,
+    }
+
+
+async def cached_forecast(commodity: str, region: Optional[str] = None, market_id: Optional[str] = None, horizon: int = FORECAST_DAYS) -> Dict[str, Any]:
     """
-    Return 7-day forecast with a naïve model (last value + trend).
-    Replace with Prophet/ARIMA model in production.
+    The forecast of a scope from the cache. A miss computes it on the event loop: it is cheap
+    (an O(1) fit plus `horizon` points) and reads the OnlineTrend models, which the realtime
+    manager updates on the loop, so a worker thread could see a half-applied update. The
+    cache future only serves to share one computation between concurrent requests.
     """
-    ser = _generate_series(commodity, days=90)
-    # naive trend: linear fit
-    x = np.arange(len(ser))
-    coef = np.polyfit(x, ser.values, 1)
-    trend = coef[0]
-    last = ser.values[-1]
-    forecast = []
-    for i in range(1, 8):
-        val = last + trend * i
-        forecast.append({"date": (ser.index[-1] + timedelta(days=i)).isoformat(), "price": float(round(val,2))})
-    # compute naive confidence based on residual std
-    resid = ser.values - (coef[0]*x + coef[1])
-    conf = float(max(0.1, 1 - (np.std(resid) / (np.mean(ser)+1e-9))))
-    return {"commodity": commodity, "forecast_7d": forecast, "confidence": round(conf,2)}
+    trained = training_scheduler.get(commodity, region, market_id)
+    version = (forecast_models.version(commodity, region, market_id), trained.version if trained is not None else 0)
+
+    async def compute() -> Dict[str, Any]:
+        return _forecast(commodity, region, market_id, horizon, trained)
 
+    return await forecast_cache.get((commodity, region, market_id, horizon), version, compute)
+
+
+@router.get("/models/stats")
+async def forecast_model_stats():
+    return {**forecast_models.stats(), "cache": forecast_cache.stats(), "training": training_scheduler.stats()}
+
+
+# declared before /{commodity} so "confidence" is not taken as a commodity name
 @router.get("/confidence")
-async def forecast_confidence(commodity: str):
-    # quick wrapper returning confidence only
-    res = await forecast_for_commodity(commodity)
-    return {"commodity": commodity, "confidence": res["confidence"]}
\ No newline at end of file
+async def forecast_confidence(commodity: str, region: Optional[str] = None, market_id: Optional[str] = None):
+    # confidence only, from the same cached 7-day forecast
+    res = await cached_forecast(commodity, region, market_id)
+    return {"commodity": commodity, "confidence": res["confidence"]}
+
+
+@router.get("/{commodity}")
+async def forecast_for_commodity(
+    commodity: str,
+    region: Optional[str] = None,
+    market_id: Optional[str] = None,
+    horizon: int = Query(FORECAST_DAYS, ge=1, le=MAX_FORECAST_DAYS),
+):
+    """
+    Return a forecast (fitted level + daily trend) for the next `horizon` days (default 7, key
+    forecast_<horizon>d) for a commodity, optionally narrowed to a region and/or market.
+    404 until the scope has daily prices for at least two days.
+    """
+    return await cached_forecast(commodity, region, market_id, horizon)
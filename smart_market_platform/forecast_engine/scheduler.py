@@ -0,0 +1,283 @@
+"""
+Background training of forecast models in a process pool.
+
+The online trend models (online.py) are cheap enough to update inline; anything heavier
+(trainer.fit_weekly_trend, later SARIMAX/Prophet-style fits) runs here, off the event loop.
+TrainingScheduler listens for scopes whose model got a new daily price and, every `interval`
+seconds, dispatches the scopes that changed most to a ProcessPoolExecutor, at most `workers`
+fits in flight. Priority: never trained first, then the relative move of the scope's mean
+price since its last fit, then the number of new daily prices. A failed fit marks its scope
+again, to be retried after a backoff that doubles with every consecutive failure (starting at
+`interval`, at most MAX_RETRY_BACKOFF seconds).
+
+A finished fit replaces the scope's TrainedModel with a new object in one dict assignment, so
+requests keep serving the previous model until the new one is in place and never wait on a
+fit; the model version then changes, which makes the forecast cache recompute. With a model
+directory, every fit is also saved as an artifact (artifacts.py, written in a worker thread
+before the swap). Every process refreshes its models from the directory in a worker thread
+every FORECAST_MODEL_RECHECK_SECONDS (ArtifactStore.refresh), which brings in models of earlier
+runs at start and newer versions saved by another process; get() itself only reads memory.
+Only the process holding the directory's writer lock trains and saves. With several uvicorn
+workers the others serve the models it saves, and take over training when the lock is free.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..config import settings
+from .artifacts import ArtifactStore
+from .online import ForecastKey, ForecastModels, forecast_models
+from .trainer import fit_weekly_trend, weekday
+
+logger = logging.getLogger("forecast_engine.scheduler")
+
+# upper bound of the retry delay after consecutive failed fits of a scope
+MAX_RETRY_BACKOFF = 3600.0
+
+
+class TrainedModel:
+    """Result of one offline fit for a scope; immutable once published."""
+
+    __slots__ = ("scope", "version", "slope", "intercept", "seasonal", "resid_std", "mean", "n", "last_day", "trained_at")
+
+    def __init__(self, scope: ForecastKey, version: int, params: Dict[str, Any], trained_at: Optional[float] = None) -> None:
+        self.scope = scope
+        self.version = version
+        self.slope = float(params["slope"])
+        self.intercept = float(params["intercept"])
+        self.seasonal = np.asarray(params["seasonal"], dtype=np.float64)
+        self.resid_std = float(params["resid_std"])
+        self.mean = float(params["mean"])
+        self.n = int(params["n"])
+        self.last_day = float(params["last_day"])
+        self.trained_at = time.time() if trained_at is None else trained_at
+
+    @property
+    def seasonal_fitted(self) -> bool:
+        return bool(self.seasonal.any())
+
+    @property
+    def confidence(self) -> float:
+        # same heuristic as TrendFit.confidence, on this fit's residuals
+        return max(0.1, 1 - self.resid_std / (self.mean + 1e-9))
+
+    def predict(self, day: float) -> float:
+        """Trend plus the day-of-week offset at an epoch day number."""
+        return self.intercept + self.slope * (day - self.last_day) + float(self.seasonal[weekday(day)])
+
+    @classmethod
+    def from_artifact(cls, scope: ForecastKey, loaded: Dict[str, Any]) -> "TrainedModel":
+        """Build from ArtifactStore.load() output; seasonal stays a read-only memory map."""
+        header, arrays = loaded["header"], loaded["arrays"]
+        slope, intercept = arrays["coef"].tolist()
+        resid_std, mean, n, last_day = arrays["resid"].tolist()
+        params = {"slope": slope, "intercept": intercept, "seasonal": arrays["seasonal"], "resid_std": resid_std, "mean": mean, "n": n, "last_day": last_day}
+        return cls(scope, int(header["model_version"]), params, trained_at=float(header["trained_at"]))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The arrays stored in an artifact (see artifacts.py for the layout)."""
+        return {
+            "coef": np.array([self.slope, self.intercept]),
+            "seasonal": np.asarray(self.seasonal, dtype=np.float64),
+            "resid": np.array([self.resid_std, self.mean, self.n, self.last_day]),
+        }
+
+
+class TrainingScheduler:
+    def __init__(
+        self,
+        models: ForecastModels,
+        workers: int = 2,
+        interval: float = 60.0,
+        fit: Callable[..., Dict[str, Any]] = fit_weekly_trend,
+        artifacts: Optional[ArtifactStore] = None,
+    ) -> None:
+        self.models = models
+        self.workers = workers
+        self.interval = interval
+        self.fit = fit
+        self.artifacts = artifacts
+        self._trained: Dict[ForecastKey, TrainedModel] = {}
+        self._dirty: Dict[ForecastKey, int] = {}  # scope -> new daily prices since its last dispatch
+        self._running: Set[ForecastKey] = set()
+        self._failed: Dict[ForecastKey, Tuple[int, float]] = {}  # scope -> (consecutive failures, retry not before)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.fits = 0
+        self.failures = 0
+        models.add_listener(self.mark)
+
+    def mark(self, scope: ForecastKey) -> None:
+        """ForecastModels listener: the scope got a new daily price."""
+        self._dirty[scope] = self._dirty.get(scope, 0) + 1
+
+    def get(self, commodity: str, region: Optional[str] = None, market_id: Optional[str] = None) -> Optional[TrainedModel]:
+        """The scope's current trained model (memory only; see refresh_artifacts)."""
+        return self._trained.get((commodity, region, market_id))
+
+    def publish(self, model: TrainedModel) -> None:
+        """Swap in a trained model for its scope (requests pick it up on their next lookup)."""
+        self._trained[model.scope] = model
+
+    async def refresh_artifacts(self) -> int:
+        """Adopt saved models newer than the ones in memory (file access in a worker thread)."""
+        if self.artifacts is None:
+            return 0
+        try:
+            loaded = await asyncio.to_thread(self.artifacts.refresh)
+        except Exception as exc:
+            logger.warning("could not refresh forecast model artifacts: %s", exc)
+            return 0
+        adopted = 0
+        for scope, artifact in loaded.items():
+            current = self._trained.get(scope)
+            try:
+                if current is None or int(artifact["header"]["model_version"]) > current.version:
+                    self.publish(TrainedModel.from_artifact(scope, artifact))
+                    adopted += 1
+            except Exception as exc:
+                logger.warning("invalid forecast model artifact for %s: %s", scope, exc)
+        return adopted
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh_artifacts()
+            await asyncio.sleep(self.artifacts.recheck)
+
+    def _priority(self, scope: ForecastKey) -> Tuple[float, float, int]:
+        trained = self.get(*scope)
+        if trained is None:
+            return (1.0, math.inf, self._dirty.get(scope, 0))
+        model = self.models.get(*scope)
+        fit = model.fit() if model is not None else None
+        move = abs(fit.mean - trained.mean) / (abs(trained.mean) + 1e-9) if fit is not None else 0.0
+        return (0.0, move, self._dirty.get(scope, 0))
+
+    def _pick(self) -> List[ForecastKey]:
+        slots = self.workers - len(self._running)
+        if slots <= 0 or not self._dirty:
+            return []
+        now = time.monotonic()
+        candidates = [s for s in self._dirty if s not in self._running and (s not in self._failed or self._failed[s][1] <= now)]
+        candidates.sort(key=self._priority, reverse=True)
+        return candidates[:slots]
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: never fork the serving process (event loop, threads, sockets)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _train(self, scope: ForecastKey) -> None:
+        try:
+            model = self.models.get(*scope)
+            if model is None or model.fit() is None:
+                return  # not enough days yet; marked again when the next one arrives
+            days, prices = model.observations()
+            loop = asyncio.get_running_loop()
+            try:
+                params = await loop.run_in_executor(self._ensure_pool(), self.fit, days, prices)
+            except BrokenProcessPool:
+                self._pool = None  # a worker died; start a fresh pool next time
+                raise
+            previous = self.get(*scope)
+            trained = TrainedModel(scope, previous.version + 1 if previous is not None else 1, params)
+            if self.artifacts is not None:
+                try:
+                    await asyncio.to_thread(self.artifacts.save, scope, "weekly_trend", trained.version, trained.trained_at, trained.arrays())
+                except Exception as exc:
+                    logger.warning("could not save forecast model artifact for %s: %s", scope, exc)
+            self.publish(trained)
+            self._failed.pop(scope, None)
+            self.fits += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.failures += 1
+            count = self._failed.get(scope, (0, 0.0))[0] + 1
+            delay = min(self.interval * 2 ** (count - 1), MAX_RETRY_BACKOFF)
+            self._failed[scope] = (count, time.monotonic() + delay)
+            self.mark(scope)  # dispatch dropped it from _dirty; retry after the backoff
+            logger.warning("forecast training failed for %s (%d in a row, retry in %.0fs): %s", scope, count, delay, exc)
+        finally:
+            self._running.discard(scope)
+
+    def dispatch(self) -> List[asyncio.Task]:
+        """Start fits for the highest-priority changed scopes, up to the free worker slots."""
+        tasks = []
+        for scope in self._pick():
+            self._dirty.pop(scope, None)
+            self._running.add(scope)
+            tasks.append(asyncio.create_task(self._train(scope)))
+        return tasks
+
+    async def run(self) -> None:
+        """
+        Background task (app lifespan): refresh saved models every `recheck` seconds and
+        dispatch fits every `interval` seconds.
+        """
+        refresher = asyncio.create_task(self._refresh_loop()) if self.artifacts is not None else None
+        tasks: Set[asyncio.Task] = set()
+        try:
+            if self.workers <= 0:
+                logger.info("forecast training disabled (FORECAST_TRAIN_WORKERS=0)")
+                if refresher is not None:
+                    await refresher  # still serve models saved by other processes
+                return
+            for scope in self.models.scopes():
+                self.mark(scope)  # data that arrived before the scheduler started
+            while True:
+                await asyncio.sleep(self.interval)
+                if not await asyncio.to_thread(self._owns_artifacts):
+                    continue  # another worker trains; keep collecting changes in case it stops
+                for task in self.dispatch():
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        finally:
+            if refresher is not None:
+                refresher.cancel()
+            for task in tasks:
+                task.cancel()
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            if self.artifacts is not None:
+                self.artifacts.release_writer()
+
+    def _owns_artifacts(self) -> bool:
+        """True if this process may train and save (no model directory, or the writer lock is ours)."""
+        if self.artifacts is None or self.artifacts.is_writer:
+            return True
+        if not self.artifacts.acquire_writer():
+            return False
+        logger.info("forecast training: this process now writes %s", self.artifacts.path)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "interval_seconds": self.interval,
+            "trained": len(self._trained),
+            "pending": len(self._dirty),
+            "running": len(self._running),
+            "fits": self.fits,
+            "failures": self.failures,
+            "backing_off": len(self._failed),
+            "artifacts": self.artifacts.stats() if self.artifacts is not None else None,
+        }
+
+
+training_scheduler = TrainingScheduler(
+    forecast_models,
+    workers=settings.FORECAST_TRAIN_WORKERS,
+    interval=settings.FORECAST_TRAIN_INTERVAL_SECONDS,
+    artifacts=ArtifactStore(settings.FORECAST_MODEL_DIR, recheck=settings.FORECAST_MODEL_RECHECK_SECONDS) if settings.FORECAST_MODEL_DIR else None,
+)
@@ -1,21 +1,63 @@
 """
-Training utilities for forecast models (placeholder).
-Implements simple save/load of model artifacts for Prophet/SARIMAX/LSTM when available.
+Training utilities for forecast models.
+
+fit_weekly_trend() is the offline fit run by the training scheduler (scheduler.py) in worker
+processes: a least-squares linear trend with day-of-week levels over a scope's daily prices.
+It is a module-level function of plain lists / numpy in and out so it pickles cheaply; a
+SARIMAX/Prophet fit can be dropped in with the same signature when those packages are
+available.
 """
 from __future__ import annotations
 
-import os
-import pandas as pd
+import math
+from typing import Any, Dict, Sequence
+
 import numpy as np
 
-MODEL_DIR = "./models"
-os.makedirs(MODEL_DIR, exist_ok=True)
-
-def train_dummy_model(commodity: str):
-    # Train a trivial model and save a small artifact
-    series = pd.Series(10000 + np.cumsum(np.random.normal(0, 100, 365)))
-    avg = float(series.mean())
-    path = os.path.join(MODEL_DIR, f"{commodity}.meta")
-    with open(path, "w") as fh:
-        fh.write(str({"avg": avg}))
-    return path
\ No newline at end of file
+WEEK_DAYS = 7
+
+
+def weekday(day: float) -> int:
+    """Monday=0 weekday of an epoch day number (1970-01-01 was a Thursday)."""
+    return int(day + 3) % WEEK_DAYS
+
+
+def fit_weekly_trend(days: Sequence[float], prices: Sequence[float]) -> Dict[str, Any]:
+    """
+    Fit price = level(weekday) + slope * (day - last_day) by least squares.
+
+    Day-of-week levels are only fitted when the data spans two weeks with every weekday
+    present; otherwise a plain trend is fitted and the seasonal offsets are zero. Returns
+    slope, intercept (trend value at last_day), seasonal (7 offsets, mean zero, Monday
+    first), resid_std, mean, n and last_day.
+    """
+    x = np.asarray(days, dtype=np.float64)
+    y = np.asarray(prices, dtype=np.float64)
+    if len(x) < 2 or x.max() == x.min():
+        raise ValueError("need daily prices for at least two days")
+    last_day = float(x.max())
+    t = x - last_day
+    wd = (x.astype(np.int64) + 3) % WEEK_DAYS
+    seasonal = np.zeros(WEEK_DAYS)
+    if last_day - x.min() >= 2 * WEEK_DAYS and len(np.unique(wd)) == WEEK_DAYS:
+        design = np.zeros((len(x), 1 + WEEK_DAYS))
+        design[:, 0] = t
+        design[np.arange(len(x)), 1 + wd] = 1.0
+        coef, *_ = np.linalg.lstsq(design, y, rcond=None)
+        slope, levels = float(coef[0]), coef[1:]
+        intercept = float(levels.mean())
+        seasonal = levels - intercept
+    else:
+        design = np.column_stack((np.ones(len(x)), t))
+        coef, *_ = np.linalg.lstsq(design, y, rcond=None)
+        intercept, slope = float(coef[0]), float(coef[1])
+    resid = y - design @ coef
+    return {
+        "slope": slope,
+        "intercept": intercept,
+        "seasonal": seasonal,
+        "resid_std": float(math.sqrt(float(np.mean(resid ** 2)))),
+        "mean": float(y.mean()),
+        "n": int(len(x)),
+        "last_day": last_day,
+    }
@@ -1,16 +1,27 @@
 """
 Enhanced Impact Engine with Macro-Economic Fusion.
 Uses the earlier heuristic impact engine ideas and applies macro adjustments.
+
+The macro snapshot comes from macro_data.macro_provider (cached per time bucket), so prices
+scored within one bucket get the same adjustment; pass `macro` to pin a snapshot explicitly.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
 from datetime import datetime
 import math
 
+import numpy as np
+
 from ..macro_data.engine import MacroData
-from ..core.impact_engine import compute_impact as base_compute_impact  # uses previous repo's compute_impact
+from smart_market_stream.core.impact_engine import (  # uses previous repo's compute_impact
+    ImpactBatch,
+    round_list,
+    compute_impact as base_compute_impact,
+    compute_impact_batch as base_compute_impact_batch,
+    resolve_table,
+)
 
 @dataclass
 class ImpactResult:
@@ -19,17 +30,59 @@ class ImpactResult:
     dominant_factor: str
     factors_with_weights: Dict[str, float]
 
-def compute_impact_with_macro(prev_price: Optional[float], new_price: float, commodity: Optional[str]=None, market_id: Optional[str]=None, region: Optional[str]=None) -> ImpactResult:
+
+@dataclass
+class MacroImpactBatch(ImpactBatch):
+    """ImpactBatch whose impact_score includes the macro adjustment of one snapshot."""
+
+    macro: MacroData
+    multiplier: float
+
+
+def macro_multiplier(macro: MacroData) -> float:
+    # if inflation high, amplify positive impact
+    return 1.0 + (macro.inflation_rate * 0.5) + (macro.fuel_coefficient * 0.3)
+
+
+def compute_impact_with_macro(prev_price: Optional[float], new_price: float, commodity: Optional[str]=None, market_id: Optional[str]=None, region: Optional[str]=None, macro: Optional[MacroData]=None) -> ImpactResult:
     """
     Compute impact and fuse macroeconomic adjustments.
     """
     # Call base engine
     base = base_compute_impact(prev_price=prev_price, new_price=new_price, commodity=commodity, market_id=market_id, region=region)
-    # Fetch macro coefficients (inflation, fuel, currency)
-    macro = MacroData.get_current()
-    # Adjust impact_score: e.g., if inflation high, amplify positive impact
-    multiplier = 1.0 + (macro.inflation_rate * 0.5) + (macro.fuel_coefficient * 0.3)
-    adjusted_score = min(100.0, base.impact_score * multiplier)
+    # Macro coefficients (inflation, fuel, currency) of the current bucket
+    if macro is None:
+        macro = MacroData.get_current()
+    adjusted_score = min(100.0, base.impact_score * macro_multiplier(macro))
     # If currency depreciation is big, add small boost
     adjusted_score = round(adjusted_score, 2)
-    return ImpactResult(price_change=base.price_change, impact_score=adjusted_score, dominant_factor=base.dominant_factor, factors_with_weights=base.factors_with_weights)
\ No newline at end of file
+    return ImpactResult(price_change=base.price_change, impact_score=adjusted_score, dominant_factor=base.dominant_factor, factors_with_weights=base.factors_with_weights)
+
+
+def compute_impact_with_macro_batch(
+    prev_prices: Sequence[float] | np.ndarray,
+    new_prices: Sequence[float] | np.ndarray,
+    commodity: Optional[str] = None,
+    region: Optional[str] = None,
+    macro: Optional[MacroData] = None,
+) -> MacroImpactBatch:
+    """
+    compute_impact_with_macro for many prices of one commodity/region with a single macro snapshot.
+
+    prev_prices may hold NaN (or None in a list) where there is no previous price.
+    rounded() gives the same values compute_impact_with_macro returns row by row.
+    """
+    if macro is None:
+        macro = MacroData.get_current()
+    multiplier = macro_multiplier(macro)
+    base = base_compute_impact_batch(prev_prices, new_prices, factor_table=resolve_table(None, commodity, region))
+    # the scalar path scales the already rounded base score; do the same so results match exactly
+    base_score = np.asarray(round_list(base.impact_score, 2), dtype=np.float64)
+    return MacroImpactBatch(
+        price_change=base.price_change,
+        impact_score=np.minimum(100.0, base_score * multiplier),
+        dominant=base.dominant,
+        table=base.table,
+        macro=macro,
+        multiplier=multiplier,
+    )
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, Any
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
 
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 
+from ..config import settings
+from ..validation_engine.engine import validate_batch
+
 router = APIRouter()
 
+# Inline validation stage (see _validation_stage): off, tag or divert
+VALIDATION_MODES = ("off", "tag", "divert")
+VALIDATION_MODE = settings.INGEST_VALIDATION if settings.INGEST_VALIDATION in VALIDATION_MODES else "tag"
+
 # Try to import the realtime manager and payload model from the optional dashboard package.
 # If that package/module isn't available in this environment, we'll still provide a safe /ingest
 # endpoint that validates the payload shape and returns a helpful response.
@@ -20,6 +29,173 @@ except Exception:
     realtime_manager = None  # type: ignore
     _HAS_REALTIME = False
 
+# Upper bound for a single /ingest/batch request (gateways should split larger buffers)
+MAX_BATCH_ITEMS = 5000
+# Longest accepted NDJSON line on /ingest/stream; protects the line buffer from a missing newline
+MAX_STREAM_LINE_BYTES = 64 * 1024
+# Only the first N rejected lines are reported back in the /ingest/stream summary
+MAX_STREAM_ERRORS = 100
+# /ingest/stream applies accepted lines in small batches: after N lines, or once the oldest
+# waiting line is this many seconds old (so a slow device still sees its readings promptly)
+STREAM_FLUSH_LINES = 100
+STREAM_FLUSH_SECONDS = 0.05
+
+
+def _normalize_timestamp(ts_raw: Any) -> datetime:
+    """
+    Normalize a payload timestamp (ISO string, datetime or missing) to datetime.
+    Falls back to utcnow() when the value is missing or unparseable.
+    """
+    try:
+        if isinstance(ts_raw, datetime):
+            return ts_raw
+        if isinstance(ts_raw, str) and ts_raw:
+            # handle trailing Z
+            if ts_raw.endswith("Z"):
+                return datetime.fromisoformat(ts_raw.replace("Z", "+00:00"))
+            return datetime.fromisoformat(ts_raw)
+    except Exception:
+        pass
+    return datetime.utcnow()
+
+
+def _epoch(ts: datetime) -> float:
+    # naive timestamps are UTC, as in the realtime manager
+    return (ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts).timestamp()
+
+
+def _coerce_payload(raw: Any) -> Dict[str, Any]:
+    """
+    Validate one raw ingest payload and return a normalized dict with
+    'timestamp' (datetime), 'market_id', 'prices' and 'region'.
+
+    Raises ValueError with a readable message if the payload is invalid.
+    """
+    # Basic validation with IngestPayload if available
+    if IngestPayload is not None:
+        if not isinstance(raw, dict):
+            raise ValueError("payload must be a JSON object")
+        try:
+            p = IngestPayload(**raw)
+        except Exception as exc:
+            raise ValueError(f"Invalid payload: {exc}")
+        return {"timestamp": _normalize_timestamp(p.timestamp), "market_id": p.market_id, "prices": p.prices, "region": p.region}
+
+    # Minimal validation fallback
+    if not isinstance(raw, dict) or "market_id" not in raw or "prices" not in raw:
+        raise ValueError("Payload must include 'market_id' and 'prices' keys")
+    return {"timestamp": _normalize_timestamp(raw.get("timestamp")), "market_id": raw["market_id"], "prices": raw["prices"], "region": raw.get("region")}
+
+
+def _parse_batch_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    Parse a batch body: either a JSON array of payloads or NDJSON (one payload per line).
+    Unparseable NDJSON lines are returned as ValueError instances so they can be reported per item.
+    """
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Batch body must be UTF-8 encoded")
+    is_ndjson = "ndjson" in content_type or "jsonl" in content_type or not text.lstrip().startswith("[")
+    if not is_ndjson:
+        try:
+            items = json.loads(text)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Batch body must be a JSON array or NDJSON")
+        return items
+
+    items: List[Any] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except Exception:
+            items.append(ValueError("Invalid JSON line"))
+    return items
+
+
+async def _validation_stage(payloads: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Validate every price of the payloads in one validate_batch call (windows are updated as
+    with /api/validation/price/check) and handle quarantined prices per VALIDATION_MODE:
+
+    - tag    : payload['quarantined'] = {commodity: quarantine_id}; the realtime manager
+               broadcasts those prices tagged but keeps them out of latest/history
+    - divert : the prices are removed from the payload (they remain in the quarantine store)
+    - off    : nothing is validated
+
+    Returns, per payload, the quarantined prices as {"commodity", "price", "quarantine_id", "flags"}.
+    """
+    reports: List[List[Dict[str, Any]]] = [[] for _ in payloads]
+    if VALIDATION_MODE == "off" or not payloads:
+        return reports
+    items = []
+    owners = []
+    timestamps = []
+    for n, p in enumerate(payloads):
+        ts = _epoch(p["timestamp"])
+        for commodity, price in p["prices"].items():
+            items.append((p["market_id"], commodity, float(price), p["region"]))
+            owners.append(n)
+            timestamps.append(ts)
+    # origin "ingest": a confirmed price is replayed into the realtime manager (resolve_quarantined)
+    results = await validate_batch(items, origin="ingest", timestamps=timestamps)
+    for n, res in zip(owners, results):
+        if res["quarantined"]:
+            reports[n].append({"commodity": res["commodity"], "price": res["value"], "quarantine_id": res["quarantine_id"], "flags": res["flags"]})
+    for p, quarantined in zip(payloads, reports):
+        if not quarantined:
+            continue
+        held = {q["commodity"]: q["quarantine_id"] for q in quarantined}
+        if VALIDATION_MODE == "divert":
+            p["prices"] = {c: v for c, v in p["prices"].items() if c not in held}
+        else:
+            p["quarantined"] = held
+    return reports
+
+
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[Union[bytes, ValueError]]:
+    """
+    Yield complete NDJSON lines from a (chunked) request body as soon as they arrive.
+    Empty lines are skipped; a trailing line without newline is yielded at end of stream.
+    A line longer than MAX_STREAM_LINE_BYTES is yielded as a ValueError (reported per line,
+    like invalid JSON) and its remaining bytes are skipped up to the next newline.
+    """
+    too_long = ValueError(f"NDJSON line exceeds {MAX_STREAM_LINE_BYTES} bytes")
+    buf = bytearray()
+    skipping = False  # inside an oversized line already reported
+    async for chunk in request.stream():
+        buf.extend(chunk)
+        start = 0
+        if skipping:
+            nl = buf.find(b"\n")
+            if nl < 0:
+                buf.clear()
+                continue
+            start = nl + 1
+            skipping = False
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl < 0:
+                break
+            line = bytes(buf[start:nl]).strip()
+            start = nl + 1
+            if len(line) > MAX_STREAM_LINE_BYTES:
+                yield too_long
+            elif line:
+                yield line
+        del buf[:start]
+        if len(buf) > MAX_STREAM_LINE_BYTES:
+            yield too_long
+            buf.clear()
+            skipping = True
+    line = bytes(buf).strip()
+    if line and not skipping:
+        yield line
+
 
 @router.post("/ingest")
 async def ingest(request: Request) -> JSONResponse:
@@ -35,7 +211,8 @@ async def ingest(request: Request) -> JSONResponse:
     }
 
     Behavior:
-    - Validates payload shape.
+    - Validates payload shape, then every price through the inline validation stage
+      (INGEST_VALIDATION, see _validation_stage); quarantined prices are listed in "quarantined".
     - If the realtime manager (market_realtime_dashboard) is available, it will process and broadcast the prices.
     - Returns a JSON summary including processed count or an informative message.
     """
@@ -44,56 +221,34 @@ async def ingest(request: Request) -> JSONResponse:
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    # Basic validation with IngestPayload if available
-    if IngestPayload is not None:
-        try:
-            p = IngestPayload(**raw)
-        except Exception as exc:
-            raise HTTPException(status_code=400, detail=f"Invalid payload: {exc}")
-    else:
-        # Minimal validation fallback
-        if not isinstance(raw, dict) or "market_id" not in raw or "prices" not in raw:
-            raise HTTPException(status_code=400, detail="Payload must include 'market_id' and 'prices' keys")
-        # normalize timestamp
-        p = raw  # type: ignore
-
-    # Normalize timestamp to datetime
-    ts = None
     try:
-        if isinstance(p, dict):
-            ts_raw = p.get("timestamp")
-        else:
-            ts_raw = p.timestamp  # p is pydantic model
-        if ts_raw:
-            # handle trailing Z
-            if isinstance(ts_raw, str) and ts_raw.endswith("Z"):
-                ts = datetime.fromisoformat(ts_raw.replace("Z", "+00:00"))
-            elif isinstance(ts_raw, str):
-                ts = datetime.fromisoformat(ts_raw)
-            else:
-                ts = datetime.utcnow()
-        else:
-            ts = datetime.utcnow()
-    except Exception:
-        ts = datetime.utcnow()
+        p = _coerce_payload(raw)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    quarantined = (await _validation_stage([p]))[0]
 
-    market_id = p.market_id if not isinstance(p, dict) else p["market_id"]
-    prices = p.prices if not isinstance(p, dict) else p["prices"]
-    region = getattr(p, "region", None) if not isinstance(p, dict) else p.get("region")
+    ts = p["timestamp"]
+    market_id = p["market_id"]
+    prices = p["prices"]
+    region = p["region"]
 
     processed = 0
     details = []
 
     if _HAS_REALTIME and realtime_manager is not None:
         # process_payload returns list of generated entries (one per commodity)
-        produced = await realtime_manager.process_payload(timestamp=ts, market_id=market_id, prices=prices, region=region)
+        produced = []
+        if prices:  # divert mode may have removed every price
+            produced = await realtime_manager.process_payload(timestamp=ts, market_id=market_id, prices=prices, region=region, quarantined=p.get("quarantined"))
         processed = len(produced)
         # convert datetime to isoformat for JSON
         for e in produced:
+            e = e.copy()
             if isinstance(e.get("timestamp"), datetime):
                 e["timestamp"] = e["timestamp"].isoformat()
             details.append(e)
-        return JSONResponse({"status": "ok", "processed": processed, "details": details})
+        return JSONResponse({"status": "ok", "processed": processed, "details": details, "quarantined": quarantined})
     else:
         # Realtime manager not available in this deployment; respond that ingest was received.
         # Optionally, you could persist to DB here if persistence models are present.
@@ -102,5 +257,160 @@ async def ingest(request: Request) -> JSONResponse:
                 "status": "ok",
                 "note": "ingest accepted by API but realtime manager not available in this deployment",
                 "received": {"market_id": market_id, "region": region, "timestamp": ts.isoformat(), "prices_count": len(prices) if isinstance(prices, dict) else 0},
+                "quarantined": quarantined,
             }
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/ingest/batch")
+async def ingest_batch(request: Request) -> JSONResponse:
+    """
+    Batch ingest for gateways that buffer many readings.
+
+    Body is either a JSON array of /ingest payloads or NDJSON (one payload per line,
+    Content-Type: application/x-ndjson). All items are validated in one pass; valid ones
+    are handed to the realtime manager as a single batch (one broadcast).
+
+    Response (no per-entry echo, only a per-item summary):
+    {
+      "status": "ok", "received": 3, "accepted": 2, "rejected": 1, "processed": 6, "quarantined": 1,
+      "items": [{"index": 0, "status": "accepted", "processed": 3, "quarantined": 1},
+                {"index": 1, "status": "rejected", "error": "..."}, ...]
+    }
+    Accepted items always carry "processed" (0 when there is no realtime manager or divert mode
+    removed every price). All prices of the batch go through the validation stage in one call
+    (see _validation_stage).
+    """
+    body = await request.body()
+    raw_items = _parse_batch_body(body, request.headers.get("content-type", ""))
+    if len(raw_items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_ITEMS} items)")
+
+    items: List[Dict[str, Any]] = []
+    valid: List[Dict[str, Any]] = []
+    for idx, raw in enumerate(raw_items):
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            valid.append(_coerce_payload(raw))
+            items.append({"index": idx, "status": "accepted", "processed": 0})
+        except ValueError as exc:
+            items.append({"index": idx, "status": "rejected", "error": str(exc)})
+
+    reports = await _validation_stage(valid)
+    accepted_items = [it for it in items if it["status"] == "accepted"]
+    for it, quarantined in zip(accepted_items, reports):
+        it["quarantined"] = len(quarantined)
+
+    processed = 0
+    if valid and _HAS_REALTIME and realtime_manager is not None:
+        # divert mode may have emptied some payloads
+        todo = [(it, p) for it, p in zip(accepted_items, valid) if p["prices"]]
+        results = await realtime_manager.process_batch([p for _, p in todo]) if todo else []
+        for (it, _), produced in zip(todo, results):
+            it["processed"] = len(produced)
+            processed += len(produced)
+
+    out: Dict[str, Any] = {
+        "status": "ok",
+        "received": len(raw_items),
+        "accepted": len(valid),
+        "rejected": len(raw_items) - len(valid),
+        "processed": processed,
+        "quarantined": sum(len(q) for q in reports),
+        "items": items,
+    }
+    if not _HAS_REALTIME or realtime_manager is None:
+        out["note"] = "ingest accepted by API but realtime manager not available in this deployment"
+    return JSONResponse(out)
+
+
+@router.post("/ingest/stream")
+async def ingest_stream(request: Request) -> JSONResponse:
+    """
+    Streaming ingest over one long-lived HTTP request.
+
+    The client sends a chunked NDJSON body (Content-Type: application/x-ndjson) and keeps
+    the request open, writing one /ingest payload per line as readings are taken. Lines are
+    validated and fed to the realtime manager as the stream advances, so devices pay the
+    request/response overhead once per stream instead of once per reading.
+
+    Accepted lines are applied in small batches (STREAM_FLUSH_LINES lines or
+    STREAM_FLUSH_SECONDS after the first waiting line, whichever comes first): one
+    validate_batch call and one realtime broadcast per batch instead of per line.
+
+    When the client ends the body, a summary is returned:
+    {"status": "ok", "lines": 120, "accepted": 119, "rejected": 1, "processed": 357,
+     "quarantined": 2, "errors": [{"line": 17, "error": "..."}]}
+    """
+    lines = accepted = processed = quarantined = 0
+    errors: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+
+    async def flush() -> None:
+        nonlocal processed, quarantined
+        batch = pending[:]
+        pending.clear()
+        quarantined += sum(len(q) for q in await _validation_stage(batch))
+        todo = [p for p in batch if p["prices"]]  # divert mode may have emptied some payloads
+        if todo and _HAS_REALTIME and realtime_manager is not None:
+            processed += sum(len(produced) for produced in await realtime_manager.process_batch(todo))
+
+    loop = asyncio.get_running_loop()
+    source = _iter_ndjson_lines(request).__aiter__()
+    next_line: Optional[asyncio.Future] = None
+    deadline = 0.0
+    try:
+        while True:
+            if next_line is None:
+                next_line = asyncio.ensure_future(source.__anext__())
+            # wait for the next line, but no longer than the flush deadline of waiting lines
+            timeout = max(0.0, deadline - loop.time()) if pending else None
+            done, _ = await asyncio.wait({next_line}, timeout=timeout)
+            if not done:
+                await flush()
+                continue
+            arrived, next_line = next_line, None
+            try:
+                line = arrived.result()
+            except StopAsyncIteration:
+                break
+            lines += 1
+            try:
+                if isinstance(line, ValueError):
+                    raise line
+                try:
+                    raw = json.loads(line)
+                except Exception:
+                    raise ValueError("Invalid JSON line")
+                p = _coerce_payload(raw)
+            except ValueError as exc:
+                if len(errors) < MAX_STREAM_ERRORS:
+                    errors.append({"line": lines, "error": str(exc)})
+                continue
+
+            accepted += 1
+            if not pending:
+                deadline = loop.time() + STREAM_FLUSH_SECONDS
+            pending.append(p)
+            if len(pending) >= STREAM_FLUSH_LINES:
+                await flush()
+    finally:
+        if next_line is not None:
+            next_line.cancel()
+        # lines received before a disconnect are still applied, as they were line by line
+        if pending:
+            await flush()
+
+    out: Dict[str, Any] = {
+        "status": "ok",
+        "lines": lines,
+        "accepted": accepted,
+        "rejected": lines - accepted,
+        "processed": processed,
+        "quarantined": quarantined,
+        "errors": errors,
+    }
+    if not _HAS_REALTIME or realtime_manager is None:
+        out["note"] = "ingest accepted by API but realtime manager not available in this deployment"
+    return JSONResponse(out)
@@ -1,14 +1,31 @@
 """
 Macro data simulation and coefficients.
 Provides inflation_rate, currency_rate, fuel_coefficient, fertilizer_trend etc.
+
+MacroProvider serves time-bucketed snapshots: every request inside one TTL bucket sees the
+same MacroData, and the backend is fetched at most once per bucket (ahead of time when the
+background refresher from run_refresher() is running). Backends:
+
+- simulated : random values around typical levels (default, stands in for real feeds)
+- file      : a JSON object with the MacroData fields, re-read on every refresh
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+import asyncio
+import json
+import logging
 import random
-import datetime
+import threading
+import time
+from typing import Dict, Optional
+
+from ..config import settings
+
+logger = logging.getLogger("smart_market_platform.macro_data")
+
 
-@dataclass
+@dataclass(frozen=True)
 class MacroData:
     inflation_rate: float  # e.g., 0.03 = 3%
     currency_rate: float   # IDR per USD (for context)
@@ -17,10 +34,165 @@ class MacroData:
 
     @staticmethod
     def get_current() -> "MacroData":
+        """Cached snapshot for the current time bucket (see MacroProvider)."""
+        return macro_provider.get()
+
+    @staticmethod
+    def simulate() -> "MacroData":
         # In production pull from external macro data sources (APIs). Here we simulate.
         return MacroData(
             inflation_rate=0.03 + random.uniform(-0.005, 0.01),
             currency_rate=15300 + random.uniform(-200, 500),
             fuel_coefficient=0.05 + random.uniform(0, 0.1),
             fertilizer_trend=0.02 + random.uniform(-0.01, 0.02),
-        )
\ No newline at end of file
+        )
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+# used when the backend fails before any snapshot was fetched
+BASELINE_MACRO = MacroData(inflation_rate=0.03, currency_rate=15300.0, fuel_coefficient=0.05, fertilizer_trend=0.02)
+
+
+class SimulatedMacroBackend:
+    name = "simulated"
+
+    def fetch(self) -> MacroData:
+        return MacroData.simulate()
+
+
+class FileMacroBackend:
+    """Reads {"inflation_rate": ..., "currency_rate": ..., ...} from a JSON file."""
+
+    name = "file"
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def fetch(self) -> MacroData:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return MacroData(
+            inflation_rate=float(data["inflation_rate"]),
+            currency_rate=float(data["currency_rate"]),
+            fuel_coefficient=float(data["fuel_coefficient"]),
+            fertilizer_trend=float(data["fertilizer_trend"]),
+        )
+
+
+def make_backend(source: str, path: Optional[str] = None):
+    source = (source or "simulated").lower()
+    if source == "file":
+        if not path:
+            raise ValueError("MACRO_SOURCE=file needs MACRO_FILE")
+        return FileMacroBackend(path)
+    if source == "simulated":
+        return SimulatedMacroBackend()
+    raise ValueError(f"unknown macro source {source!r}; expected simulated or file")
+
+
+@dataclass(frozen=True)
+class MacroSnapshot:
+    data: MacroData
+    bucket: int         # floor(fetch time / ttl)
+    fetched_at: float   # unix time
+    stale: bool = False  # True when the backend failed and an older snapshot is reused
+
+
+class MacroProvider:
+    """
+    TTL cache in front of a macro backend.
+
+    Snapshots are keyed by the time bucket floor(now / ttl). get() refreshes synchronously
+    (once, under a lock) only when the cached snapshot is from an earlier bucket; with
+    run_refresher() running, the next bucket is fetched in a worker thread before it starts.
+    If the backend fails, the previous snapshot (or BASELINE_MACRO) stays in use, marked stale.
+    """
+
+    def __init__(self, backend, ttl: float = 60.0) -> None:
+        self.backend = backend
+        self.ttl = max(1.0, float(ttl))
+        self._snapshot: Optional[MacroSnapshot] = None
+        self._pending: Optional[MacroSnapshot] = None  # prefetched for a future bucket
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.failures = 0
+
+    def _bucket(self, now: Optional[float] = None) -> int:
+        return int((time.time() if now is None else now) // self.ttl)
+
+    def get(self) -> MacroData:
+        return self.snapshot().data
+
+    def snapshot(self) -> MacroSnapshot:
+        bucket = self._bucket()
+        snap = self._snapshot
+        if snap is not None and snap.bucket >= bucket:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.bucket >= bucket:
+                return snap
+            pending = self._pending
+            if pending is not None and pending.bucket == bucket:
+                self._snapshot, self._pending = pending, None
+                return pending
+            return self._refresh(bucket)
+
+    async def snapshot_async(self) -> MacroSnapshot:
+        """snapshot() for async callers: a backend fetch on a miss runs in a worker thread."""
+        snap = self._snapshot
+        if snap is not None and snap.bucket >= self._bucket():
+            return snap
+        return await asyncio.to_thread(self.snapshot)
+
+    def _fetch(self, bucket: int) -> MacroSnapshot:
+        """Fetch from the backend; on failure reuse the last data (stale) for this bucket."""
+        self.fetches += 1
+        try:
+            return MacroSnapshot(self.backend.fetch(), bucket, time.time())
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("macro backend %s failed: %s; reusing previous snapshot", getattr(self.backend, "name", self.backend), exc)
+            prev = self._snapshot
+            return MacroSnapshot(prev.data if prev is not None else BASELINE_MACRO, bucket, time.time(), stale=True)
+
+    def _refresh(self, bucket: int) -> MacroSnapshot:
+        snap = self._fetch(bucket)
+        self._snapshot = snap
+        return snap
+
+    def _prefetch(self, bucket: int) -> None:
+        snap = self._fetch(bucket)
+        with self._lock:
+            current = self._snapshot
+            if current is None or current.bucket < bucket:
+                self._pending = snap
+
+    async def run_refresher(self, lead: float = 1.0) -> None:
+        """Background task: fetch each bucket's snapshot `lead` seconds before the bucket starts."""
+        lead = min(lead, self.ttl / 2)
+        await asyncio.to_thread(self.snapshot)
+        while True:
+            now = time.time()
+            next_bucket = self._bucket(now) + 1
+            await asyncio.sleep(max(0.0, next_bucket * self.ttl - lead - now))
+            await asyncio.to_thread(self._prefetch, next_bucket)
+            # let the bucket start before scheduling the one after it
+            await asyncio.sleep(max(0.0, next_bucket * self.ttl - time.time()))
+
+    def stats(self) -> Dict[str, object]:
+        snap = self._snapshot
+        return {
+            "backend": getattr(self.backend, "name", type(self.backend).__name__),
+            "ttl_seconds": self.ttl,
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "bucket": snap.bucket if snap else None,
+            "fetched_at": snap.fetched_at if snap else None,
+            "stale": snap.stale if snap else None,
+        }
+
+
+macro_provider = MacroProvider(make_backend(settings.MACRO_SOURCE, settings.MACRO_FILE), ttl=settings.MACRO_TTL_SECONDS)
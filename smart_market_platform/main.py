@@ -60,10 +60,45 @@ async def lifespan(app: FastAPI):
     else:
         logger.debug("No alert worker module available; skipping")
 
+    # Refresh macro snapshots ahead of each TTL bucket so requests never wait on the source
+    from .macro_data.engine import macro_provider
+    macro_task = asyncio.create_task(macro_provider.run_refresher())
+    # Write quarantined prices to SQLite in batches, off the request path
+    from .validation_engine.engine import quarantine_store
+    await asyncio.to_thread(quarantine_store.open)
+    quarantine_task = asyncio.create_task(quarantine_store.run_writer())
+    # Feed the online forecast models with the realtime manager's daily rollups (if available)
+    from .forecast_engine.online import forecast_models
+    try:
+        from market_realtime_dashboard.app import manager as realtime_manager
+    except Exception:
+        realtime_manager = None
+    if realtime_manager is not None:
+        forecast_models.attach(realtime_manager)
+    else:
+        logger.debug("realtime manager not available; forecast models will stay empty")
+    # Fit heavier forecast models in a process pool, off the event loop
+    from .forecast_engine.scheduler import training_scheduler
+    training_task = asyncio.create_task(training_scheduler.run())
+
     yield  # application runs here
 
     # Shutdown / cleanup
     logger.info("Smart Market Platform shutting down (lifespan shutdown)")
+    macro_task.cancel()
+    quarantine_task.cancel()
+    training_task.cancel()
+    # training_task shuts the process pool down, quarantine_task writes the last pending entries
+    await asyncio.gather(training_task, quarantine_task, return_exceptions=True)
+    if realtime_manager is not None:
+        realtime_manager.remove_bucket_listener(forecast_models.on_bucket_closed)
+    await asyncio.to_thread(quarantine_store.close)
+    # keep validation baselines across restarts (when a spill file is configured)
+    try:
+        from .validation_engine.engine import flush_windows
+        flush_windows()
+    except Exception as exc:
+        logger.exception("Failed to flush validation windows: %s", exc)
 
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
@@ -98,4 +133,4 @@ if __name__ == "__main__":
     import uvicorn
 
     import_str = "smart_market_platform.main:app"
-    uvicorn.run(import_str, host=settings.HOST, port=settings.PORT, reload=settings.DEBUG)
\ No newline at end of file
+    uvicorn.run(import_str, host=settings.HOST, port=settings.PORT, reload=settings.DEBUG, ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE)
\ No newline at end of file
@@ -3,54 +3,82 @@ Validation & Anti-Manipulation System.
 
 - Outlier detection (Z-score, IQR)
 - Simple AI anomaly detector stub (LSTM/Prophet optional)
-- Multi-source verification (mocked)
-- Quarantine suspicious entries flagging
+- Multi-source verification (async reference sources, see sources.py; none until configured, simulated on request)
+- Quarantine suspicious entries flagging (kept in a QuarantineStore for review, see quarantine.py)
 """
 from __future__ import annotations
 
+import asyncio
 import math
-from collections import deque
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 import numpy as np
 import statistics
 import logging
 
+from ..config import settings
+from .quarantine import QuarantineStore
+from .sources import PriceSource, SimulatedSource, SourceFanout, sources_agree
+from .store import WindowStore
+from .window import RollingWindow
+
 logger = logging.getLogger("validation_engine")
 
-# In-memory store per (market, commodity) for quick stats. For production, use DB/time-series store.
+# Bounded in-memory store per (market, commodity, region) for quick stats; cold windows are
+# evicted (LRU / idle) and, with VALIDATION_SPILL_PATH, kept in SQLite and reloaded on demand.
 STATS_WINDOW = 500
-_store: Dict[Tuple[str, str, Optional[str]], deque] = {}
+_store = WindowStore(
+    STATS_WINDOW,
+    capacity=settings.VALIDATION_MAX_WINDOWS,
+    idle_seconds=settings.VALIDATION_WINDOW_IDLE_SECONDS,
+    spill_path=settings.VALIDATION_SPILL_PATH,
+)
+
+# detectors accept a RollingWindow (incremental stats) or a plain list of prices
+Window = Union[RollingWindow, List[float]]
+
+def _get_window(market_id: str, commodity: str, region: Optional[str]) -> RollingWindow:
+    return _store.get((market_id, commodity, region))
+
+# Quarantined prices awaiting review (ring + SQLite, opened and written in batches by the lifespan)
+quarantine_store = QuarantineStore(settings.QUARANTINE_DB_PATH, ring_size=settings.QUARANTINE_RING_SIZE)
 
-def _get_window(market_id: str, commodity: str, region: Optional[str]):
-    key = (market_id, commodity, region)
-    if key not in _store:
-        _store[key] = deque(maxlen=STATS_WINDOW)
-    return _store[key]
+def window_store_stats() -> Dict:
+    return _store.stats()
 
-def zscore_outlier(window: List[float], value: float, threshold: float = 3.0) -> bool:
+def flush_windows() -> int:
+    """Persist resident windows to the spill file (no-op without VALIDATION_SPILL_PATH)."""
+    return _store.flush()
+
+def zscore_outlier(window: Window, value: float, threshold: float = 3.0) -> bool:
     if len(window) < 2:
         return False
-    mean = statistics.mean(window)
-    stdev = statistics.pstdev(window)
+    if isinstance(window, RollingWindow):
+        mean, stdev = window.mean, window.pstdev()
+    else:
+        mean = statistics.mean(window)
+        stdev = statistics.pstdev(window)
     if stdev == 0:
         return False
     z = (value - mean) / stdev
     logger.debug("Z-Score check value=%s mean=%s stdev=%s z=%s", value, mean, stdev, z)
     return abs(z) > threshold
 
-def iqr_outlier(window: List[float], value: float, multiplier: float = 1.5) -> bool:
+def iqr_outlier(window: Window, value: float, multiplier: float = 1.5) -> bool:
     if len(window) < 4:
         return False
-    arr = sorted(window)
-    q1 = np.percentile(arr, 25)
-    q3 = np.percentile(arr, 75)
+    if isinstance(window, RollingWindow):
+        q1, q3 = window.percentile(25), window.percentile(75)
+    else:
+        arr = sorted(window)
+        q1 = np.percentile(arr, 25)
+        q3 = np.percentile(arr, 75)
     iqr = q3 - q1
     lower = q1 - multiplier * iqr
     upper = q3 + multiplier * iqr
     logger.debug("IQR check value=%s lower=%s upper=%s", value, lower, upper)
     return value < lower or value > upper
 
-def ai_anomaly_detector(window: List[float], value: float) -> bool:
+def ai_anomaly_detector(window: Window, value: float) -> bool:
     """
     Placeholder AI anomaly detector.
     In production replace with LSTM/Prophet model inference.
@@ -58,37 +86,59 @@ def ai_anomaly_detector(window: List[float], value: float) -> bool:
     """
     if len(window) < 10:
         return False
-    median = statistics.median(window)
+    median = window.median() if isinstance(window, RollingWindow) else statistics.median(window)
     if median == 0:
         return False
     rel = abs(value - median) / (median + 1e-9)
     logger.debug("AI anomaly detector rel=%s", rel)
     return rel > 0.5  # arbitrary
 
-def multi_source_verify(market_id: str, commodity: str, value: float) -> Tuple[bool, List[Dict]]:
+def _window_median(market_id: str, commodity: str, region: Optional[str]) -> Optional[float]:
+    # reference level for the simulated sources: the accepted prices seen so far
+    window = _store.peek((market_id, commodity, region))
+    return window.median() if window is not None and len(window) else None
+
+def _simulated_sources() -> List[PriceSource]:
+    # stand-ins for the central DB / scraped news / partner feeds, with their noise
+    timeout = settings.VALIDATION_SOURCE_TIMEOUT_SECONDS
+    return [
+        SimulatedSource("central_db", 0.01, _window_median, timeout=timeout),
+        SimulatedSource("news_scrape", 0.02, _window_median, timeout=timeout),
+        SimulatedSource("partner_feed", 0.03, _window_median, timeout=timeout),
+    ]
+
+# No reference sources until real feeds are configured via set_price_sources(): with no
+# answers there is nothing to disagree with, so multi_source_ok stays True as with the old
+# stubs that echoed the submitted price. VALIDATION_SIMULATED_SOURCES=1 enables the simulated
+# sources, which compare against the window median and do change quarantine verdicts.
+price_sources = SourceFanout(
+    _simulated_sources() if settings.VALIDATION_SIMULATED_SOURCES else [],
+    ttl=settings.VALIDATION_SOURCE_TTL_SECONDS,
+    negative_ttl=settings.VALIDATION_SOURCE_NEGATIVE_TTL_SECONDS,
+)
+
+def set_price_sources(sources: List[PriceSource]) -> None:
+    price_sources.set_sources(sources)
+
+async def multi_source_verify(market_id: str, commodity: str, value: float, region: Optional[str] = None) -> Tuple[bool, List[Dict]]:
     """
-    Verify price against other sources. For demo we simulate sources.
-    Returns (all_sources_agree, sources)
+    Verify price against the reference sources (queried concurrently, cached per TTL).
+    Returns (majority_of_answering_sources_agree, sources); a source without data has price None.
     """
-    # Mock other sources with slight variations
-    sources = [
-        {"source": "central_db", "price": value * (1 + np.random.normal(0, 0.01))},
-        {"source": "news_scrape", "price": value * (1 + np.random.normal(0, 0.02))},
-        {"source": "partner_feed", "price": value * (1 + np.random.normal(0, 0.03))},
-    ]
-    # determine if majority within 10%
-    agree = sum(1 for s in sources if abs(s["price"] - value) / (value + 1e-9) < 0.1) >= 2
-    return agree, sources
+    prices = await price_sources.prices(market_id, commodity, region)
+    agree = sources_agree(value, [p for _, p in prices])
+    return agree, [{"source": name, "price": p} for name, p in prices]
 
-def validate_price(market_id: str, commodity: str, value: float, region: Optional[str] = None) -> Dict:
+async def validate_price(market_id: str, commodity: str, value: float, region: Optional[str] = None) -> Dict:
     """
     Runs validation checks and returns a JSON summary including quarantine flag.
     """
-    window = list(_get_window(market_id, commodity, region))
+    window = _get_window(market_id, commodity, region)
     z = zscore_outlier(window, value)
     iq = iqr_outlier(window, value)
     ai = ai_anomaly_detector(window, value)
-    multi_ok, sources = multi_source_verify(market_id, commodity, value)
+    multi_ok, sources = await multi_source_verify(market_id, commodity, value, region)
+    await quarantine_store.open_async()  # no-op once open; keeps record() off SQLite
 
     # decide quarantine: if at least two detectors flag or multi-source disagrees
     flags = {"zscore": z, "iqr": iq, "ai": ai, "multi_source_ok": multi_ok}
@@ -97,11 +147,13 @@ def validate_price(market_id: str, commodity: str, value: float, region: Optiona
 
     # update window if not quarantined (or optionally add even quarantined to maintain history)
     if not quarantined:
+        # through the store: the window may have been evicted while awaiting the sources
         _get_window(market_id, commodity, region).append(value)
     else:
         logger.warning("Quarantined price for %s/%s value=%s flags=%s", market_id, commodity, value, flags)
+        entry = quarantine_store.record(market_id, commodity, value, region, {k: bool(v) for k, v in flags.items()}, origin="check")
 
-    return {
+    res = {
         "market_id": market_id,
         "commodity": commodity,
         "value": value,
@@ -109,4 +161,143 @@ def validate_price(market_id: str, commodity: str, value: float, region: Optiona
         "flags": flags,
         "quarantined": quarantined,
         "sources": sources,
-    }
\ No newline at end of file
+    }
+    if quarantined:
+        res["quarantine_id"] = entry["id"]
+    return res
+
+async def resolve_quarantined(entry_id: int, action: str) -> Optional[Dict]:
+    """
+    Review a quarantined price: "confirm" accepts it as genuine and appends it to its window,
+    "release" discards it. Returns the updated entry, None for an unknown id; raises ValueError
+    for an unknown action or an entry that was already resolved.
+
+    A confirmed price held back by the ingest validation stage (origin "ingest") is also
+    replayed into the realtime manager at its own timestamp, so it reaches history, rollups and
+    (unless newer prices arrived meanwhile) latest; the entry then carries "replayed": True.
+    Prices quarantined by /api/validation checks were never ingested and are not replayed.
+    """
+    status = {"confirm": "confirmed", "release": "released"}.get(action)
+    if status is None:
+        raise ValueError(f"unknown action {action!r}; expected confirm or release")
+    entry = await asyncio.to_thread(quarantine_store.resolve, entry_id, status)
+    if entry is not None and status == "confirmed":
+        _get_window(entry["market_id"], entry["commodity"], entry["region"]).append(entry["value"])
+        if entry.get("origin") == "ingest":
+            entry["replayed"] = await _replay_confirmed(entry)
+    return entry
+
+async def _replay_confirmed(entry: Dict) -> bool:
+    try:
+        from market_realtime_dashboard.app import manager as realtime_manager
+    except Exception:
+        logger.debug("realtime manager not available; confirmed price %s not replayed", entry["id"])
+        return False
+    try:
+        await realtime_manager.replay_point(entry["ts"], entry["market_id"], entry["commodity"], entry["value"], entry["region"])
+    except Exception as exc:
+        logger.warning("could not replay confirmed price %s into the realtime manager: %s", entry["id"], exc)
+        return False
+    return True
+
+def _sources_agree_batch(values: np.ndarray, refs: np.ndarray) -> np.ndarray:
+    """sources_agree for many prices; refs is (len(values), n_sources) with NaN where a source had no price."""
+    answered = ~np.isnan(refs)
+    with np.errstate(invalid="ignore"):
+        within = answered & (np.abs(refs - values[:, None]) / (values[:, None] + 1e-9) < 0.1)
+    n_answered = answered.sum(axis=1)
+    return (n_answered == 0) | (within.sum(axis=1) * 2 > n_answered)
+
+def _detect_batch(windows: List[RollingWindow], values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    zscore_outlier / iqr_outlier / ai_anomaly_detector for one value per window, as array
+    operations over the windows' running statistics (same float operations, same verdicts).
+    """
+    m = len(windows)
+    n = np.empty(m, dtype=np.int64)
+    mean = np.zeros(m)
+    stdev = np.zeros(m)
+    q1 = np.zeros(m)
+    q3 = np.zeros(m)
+    median = np.zeros(m)
+    for i, w in enumerate(windows):
+        k = n[i] = len(w)
+        if k >= 2:
+            mean[i], stdev[i] = w.mean, w.pstdev()
+        if k >= 4:
+            q1[i], q3[i] = w.percentile(25), w.percentile(75)
+        if k >= 10:
+            median[i] = w.median()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (n >= 2) & (stdev != 0) & (np.abs((values - mean) / np.where(stdev != 0, stdev, 1.0)) > 3.0)
+        iqr = q3 - q1
+        iq = (n >= 4) & ((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr))
+        ai = (n >= 10) & (median != 0) & (np.abs(values - median) / (median + 1e-9) > 0.5)
+    return z, iq, ai
+
+async def validate_batch(
+    items: List[Tuple[str, str, float, Optional[str]]],
+    origin: str = "check",
+    timestamps: Optional[List[float]] = None,
+) -> List[Dict]:
+    """
+    validate_price for many (market_id, commodity, value, region) items; results in input order.
+    Quarantined items are recorded with `origin` and, if given, their timestamp (epoch seconds)
+    from `timestamps` (see quarantine.py).
+
+    Items are grouped by window key and processed in rounds holding at most one item per key,
+    so every check sees the window exactly as sequential validate_price calls would (earlier
+    accepted items of the same key already appended). The reference sources are queried once
+    per key for the whole batch (concurrently, through the TTL cache); each round then runs the
+    detectors and the source agreement check as array operations across its keys.
+    """
+    positions: Dict[Tuple[str, str, Optional[str]], List[int]] = {}
+    for i, (market_id, commodity, _, region) in enumerate(items):
+        positions.setdefault((market_id, commodity, region), []).append(i)
+
+    results: List[Optional[Dict]] = [None] * len(items)
+    groups = list(positions.items())
+    looked_up = await asyncio.gather(*(price_sources.prices(*key) for key, _ in groups))
+    source_names = [name for name, _ in looked_up[0]] if looked_up else []
+    refs_by_key = {
+        key: [math.nan if p is None else p for _, p in prices] for (key, _), prices in zip(groups, looked_up)
+    }
+    await quarantine_store.open_async()  # no-op once open; keeps record() off SQLite
+    rnd = 0
+    while groups:
+        windows = [_get_window(*key) for key, _ in groups]
+        idx = [g[rnd] for _, g in groups]
+        values = np.array([float(items[i][2]) for i in idx], dtype=np.float64)
+        z, iq, ai = _detect_batch(windows, values)
+        refs = np.array([refs_by_key[key] for key, _ in groups], dtype=np.float64).reshape(len(groups), len(source_names))
+        multi_ok = _sources_agree_batch(values, refs)
+        quarantined = (z.astype(np.int64) + iq + ai + ~multi_ok) >= 2
+
+        for j, i in enumerate(idx):
+            key = groups[j][0]
+            market_id, commodity, value, region = items[i]
+            flags = {"zscore": bool(z[j]), "iqr": bool(iq[j]), "ai": bool(ai[j]), "multi_source_ok": bool(multi_ok[j])}
+            q = bool(quarantined[j])
+            if not q:
+                # through the store again: a round with more keys than the store's capacity
+                # may have evicted (spilled) this window while fetching the others
+                _get_window(market_id, commodity, region).append(value)
+            else:
+                logger.warning("Quarantined price for %s/%s value=%s flags=%s", market_id, commodity, value, flags)
+            results[i] = res = {
+                "market_id": market_id,
+                "commodity": commodity,
+                "value": value,
+                "region": region,
+                "flags": flags,
+                "quarantined": q,
+                "sources": [{"source": name, "price": None if math.isnan(p) else p} for name, p in zip(source_names, refs_by_key[key])],
+            }
+            if q:
+                ts = timestamps[i] if timestamps is not None else None
+                res["quarantine_id"] = quarantine_store.record(market_id, commodity, value, region, flags, ts=ts, origin=origin)["id"]
+
+        rnd += 1
+        groups = [(key, g) for key, g in groups if len(g) > rnd]
+    return results  # type: ignore[return-value]
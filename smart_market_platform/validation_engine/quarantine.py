@@ -0,0 +1,290 @@
+"""
+Quarantine store for prices rejected by the validation engine.
+
+Quarantined entries go to an in-memory ring (recent entries, for dashboards) and to a SQLite
+table indexed on (market_id, commodity, ts). record() only appends to the ring and a pending
+list: the writer task (run_writer, started in the app lifespan) inserts pending rows in
+batches in a worker thread, so the request path never waits on SQLite; if the backlog reaches
+max_pending the writer is woken early (without a writer, record() schedules a flush in the
+loop's default executor). Queries flush pending rows first and page with a keyset cursor on
+(ts, id), newest first. All methods but record() and recent() touch SQLite and are meant to
+be called from a worker thread (asyncio.to_thread) by async code.
+
+The database is opened by open() (the app lifespan calls it in a worker thread) or on first
+use, so creating the store (e.g. importing the engine) does not create the file.
+
+Entries start as "pending"; a reviewer either confirms the price as genuine ("confirmed",
+the engine then feeds it back into its window and, for prices held back by the ingest
+validation stage, into the realtime manager) or releases it ("released", discarded). An
+entry's origin says where the price came from: "ingest" (ts is then the price's own
+timestamp) or "check" (/api/validation), None for rows written before origins were kept.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("validation_engine.quarantine")
+
+STATUSES = ("pending", "confirmed", "released")
+
+_COLUMNS = ("id", "ts", "market_id", "commodity", "region", "value", "flags", "status", "resolved_at", "origin")
+
+
+def encode_cursor(entry: Dict[str, Any]) -> str:
+    return f"{entry['ts']!r}:{entry['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    ts, _, id_ = cursor.rpartition(":")
+    return float(ts), int(id_)
+
+
+class QuarantineStore:
+    def __init__(self, path: str, ring_size: int = 1000, flush_interval: float = 0.5, max_pending: int = 10000) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._ring: Deque[Dict[str, Any]] = deque(maxlen=ring_size)
+        self._pending: List[Dict[str, Any]] = []
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()  # held only to append / swap, never during I/O
+        self._conn: Optional[sqlite3.Connection] = None
+        # ids are assigned in memory so an entry has its id before it is written (set by open())
+        self._next_id: Optional[int] = None
+        self._wakeup: Optional[asyncio.Event] = None  # set while run_writer is running
+        self._flushing: Optional[asyncio.Future] = None
+        self.written = 0
+
+    def open(self) -> None:
+        """Open (creating if needed) the database; no-op when already open."""
+        with self._db_lock:
+            self._open()
+
+    async def open_async(self) -> None:
+        """open() in a worker thread, if the store is not open yet."""
+        if self._next_id is None:
+            await asyncio.to_thread(self.open)
+
+    def _open(self) -> sqlite3.Connection:
+        # caller holds _db_lock
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quarantine ("
+                " id INTEGER PRIMARY KEY, ts REAL NOT NULL, market_id TEXT NOT NULL, commodity TEXT NOT NULL,"
+                " region TEXT, value REAL NOT NULL, flags TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending', resolved_at REAL, origin TEXT)"
+            )
+            if "origin" not in {row[1] for row in conn.execute("PRAGMA table_info(quarantine)")}:
+                conn.execute("ALTER TABLE quarantine ADD COLUMN origin TEXT")  # databases from before origins
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_quarantine_market_commodity_ts ON quarantine (market_id, commodity, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_quarantine_ts ON quarantine (ts)")
+            conn.commit()
+            self._next_id = (conn.execute("SELECT MAX(id) FROM quarantine").fetchone()[0] or 0) + 1
+            self._conn = conn
+        return self._conn
+
+    def record(
+        self,
+        market_id: str,
+        commodity: str,
+        value: float,
+        region: Optional[str],
+        flags: Dict[str, bool],
+        ts: Optional[float] = None,
+        origin: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Add a quarantined price; returns the entry with its id. Non-blocking once the store is
+        open: async callers await open_async() first, otherwise the first call opens the
+        database inline.
+        """
+        if self._next_id is None:
+            self.open()
+        entry = {
+            "id": self._next_id,
+            "ts": time.time() if ts is None else ts,
+            "market_id": market_id,
+            "commodity": commodity,
+            "region": region,
+            "value": value,
+            "flags": flags,
+            "status": "pending",
+            "resolved_at": None,
+            "origin": origin,
+        }
+        self._next_id += 1
+        self._ring.append(entry)
+        with self._pending_lock:
+            self._pending.append(entry)
+            backlog = len(self._pending)
+        if backlog >= self.max_pending:
+            self._flush_soon()
+        return entry
+
+    def _flush_soon(self) -> None:
+        """Backlog at max_pending: wake the writer, or flush in a worker thread without one."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # synchronous caller, no event loop to block
+            return
+        if self._flushing is None or self._flushing.done():
+            self._flushing = loop.run_in_executor(None, self._drain)
+
+    def _drain(self) -> None:
+        # entries recorded while a flush runs can fill the backlog again
+        while self.flush() and len(self._pending) >= self.max_pending:
+            pass
+
+    def flush(self) -> int:
+        """Insert pending entries in one transaction; returns how many were written."""
+        with self._db_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                conn = self._open()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO quarantine (id, ts, market_id, commodity, region, value, flags, status, resolved_at, origin)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (e["id"], e["ts"], e["market_id"], e["commodity"], e["region"], e["value"], json.dumps(e["flags"]), e["status"], e["resolved_at"], e["origin"])
+                            for e in batch
+                        ],
+                    )
+            except Exception as exc:
+                with self._pending_lock:
+                    self._pending[:0] = batch  # keep them for the next attempt
+                logger.warning("could not write %d quarantine entries: %s", len(batch), exc)
+                return 0
+            self.written += len(batch)
+            return len(batch)
+
+    async def run_writer(self) -> None:
+        """Background task: flush pending entries every flush_interval seconds (or when the backlog fills up)."""
+        self._wakeup = wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+                if self._pending:
+                    await asyncio.to_thread(self.flush)
+        finally:
+            self._wakeup = None
+            await asyncio.to_thread(self.flush)
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest entries from the in-memory ring."""
+        return list(self._ring)[-limit:][::-1]
+
+    def query(
+        self,
+        market_id: Optional[str] = None,
+        commodity: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Entries newest first matching the filters, and the cursor for the next page (or None)."""
+        self.flush()
+        where, args = [], []
+        for col, val in (("market_id", market_id), ("commodity", commodity), ("status", status)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if since is not None:
+            where.append("ts >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            args.append(until)
+        if cursor:
+            ts, id_ = decode_cursor(cursor)
+            where.append("(ts < ? OR (ts = ? AND id < ?))")
+            args.extend((ts, ts, id_))
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM quarantine"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        args.append(limit + 1)
+        with self._db_lock:
+            rows = self._open().execute(sql, args).fetchall()
+        entries = [self._row(r) for r in rows[:limit]]
+        next_cursor = encode_cursor(entries[-1]) if len(rows) > limit else None
+        return entries, next_cursor
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        self.flush()
+        with self._db_lock:
+            row = self._open().execute(f"SELECT {', '.join(_COLUMNS)} FROM quarantine WHERE id = ?", (entry_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def resolve(self, entry_id: int, status: str) -> Optional[Dict[str, Any]]:
+        """
+        Mark a pending entry confirmed or released; returns the updated entry, None if there is
+        no such id. Raises ValueError for an unknown status or an already resolved entry.
+        """
+        if status not in ("confirmed", "released"):
+            raise ValueError(f"unknown resolution {status!r}; expected confirmed or released")
+        self.flush()
+        now = time.time()
+        with self._db_lock:
+            conn = self._open()
+            with conn:
+                cur = conn.execute(
+                    "UPDATE quarantine SET status = ?, resolved_at = ? WHERE id = ? AND status = 'pending'",
+                    (status, now, entry_id),
+                )
+        if cur.rowcount == 0:
+            entry = self.get(entry_id)
+            if entry is None:
+                return None
+            raise ValueError(f"quarantine entry {entry_id} is already {entry['status']}")
+        for e in self._ring:
+            if e["id"] == entry_id:
+                e["status"], e["resolved_at"] = status, now
+        return self.get(entry_id)
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        entry = dict(zip(_COLUMNS, row))
+        entry["flags"] = json.loads(entry["flags"])
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        self.flush()
+        with self._db_lock:
+            counts = dict(self._open().execute("SELECT status, COUNT(*) FROM quarantine GROUP BY status").fetchall())
+        return {
+            "ring": len(self._ring),
+            "pending_writes": len(self._pending),
+            "written": self.written,
+            "by_status": {s: counts.get(s, 0) for s in STATUSES},
+        }
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+            self._conn = None
@@ -3,14 +3,20 @@ API router to expose validation endpoints.
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
-from .engine import validate_price
+from .engine import price_sources, quarantine_store, resolve_quarantined, validate_batch, validate_price, window_store_stats
+from .quarantine import STATUSES
 
 router = APIRouter()
 
+# Upper bound for one /price/check/batch request
+MAX_BATCH_ITEMS = 5000
+
 class ValidatePayload(BaseModel):
     market_id: str
     commodity: str
@@ -19,5 +25,73 @@ class ValidatePayload(BaseModel):
 
 @router.post("/price/check")
 async def price_check(payload: ValidatePayload):
-    res = validate_price(payload.market_id, payload.commodity, payload.price, payload.region)
-    return res
\ No newline at end of file
+    res = await validate_price(payload.market_id, payload.commodity, payload.price, payload.region)
+    return res
+
+@router.get("/windows/stats")
+async def windows_stats():
+    """Resident window count, memory use and eviction / spill counters."""
+    return window_store_stats()
+
+@router.get("/sources/stats")
+async def sources_stats():
+    """Reference source lookups, cache hits and failures."""
+    return price_sources.stats()
+
+@router.post("/price/check/batch")
+async def price_check_batch(payloads: List[ValidatePayload]):
+    """
+    Validate many prices at once (e.g. one request per gateway flush instead of one per price).
+    Items for the same market/commodity/region are checked in the order given.
+    """
+    if len(payloads) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large ({len(payloads)} items, max {MAX_BATCH_ITEMS})")
+    results = await validate_batch([(p.market_id, p.commodity, p.price, p.region) for p in payloads])
+    return {
+        "count": len(results),
+        "quarantined": sum(1 for r in results if r["quarantined"]),
+        "results": results,
+    }
+
+
+@router.get("/quarantine")
+async def quarantine_list(
+    market_id: Optional[str] = None,
+    commodity: Optional[str] = None,
+    since: Optional[float] = Query(None, description="unix time, inclusive"),
+    until: Optional[float] = Query(None, description="unix time, exclusive"),
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    """Quarantined prices, newest first, with keyset pagination (pass next_cursor back as cursor)."""
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(STATUSES)}")
+    try:
+        items, next_cursor = await asyncio.to_thread(quarantine_store.query, market_id, commodity, since, until, status, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/quarantine/recent")
+async def quarantine_recent(limit: int = Query(100, ge=1, le=1000)):
+    """Most recent quarantined prices from memory."""
+    return quarantine_store.recent(limit)
+
+@router.get("/quarantine/stats")
+async def quarantine_stats():
+    return await asyncio.to_thread(quarantine_store.stats)
+
+@router.post("/quarantine/{entry_id}/{action}")
+async def quarantine_resolve(entry_id: int, action: str):
+    """
+    confirm: the price is genuine and is added to its window (and replayed into the realtime
+    manager if the ingest validation stage held it back); release: discard it.
+    """
+    try:
+        entry = await resolve_quarantined(entry_id, action)
+    except ValueError as exc:
+        raise HTTPException(status_code=409 if action in ("confirm", "release") else 400, detail=str(exc))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Quarantine entry not found")
+    return entry
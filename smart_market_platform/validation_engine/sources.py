@@ -0,0 +1,158 @@
+"""
+Reference price sources for multi-source verification.
+
+A PriceSource returns its reference price for a (market, commodity, region), or None when it
+has nothing. SourceFanout queries all configured sources concurrently (asyncio.gather), each
+bounded by its own timeout, behind a TTL cache keyed by (source, market_id, commodity,
+region): concurrent and repeated lookups for a key share one fetch, so a burst of validations
+for the same commodity costs at most one lookup per source per TTL window. A lookup without a
+price (no data, failed or timed out) is only kept for the much shorter `negative_ttl`: long
+enough that a dead source is not hammered, short enough that a price that becomes available
+(e.g. the first accepted prices of a new series) is picked up quickly.
+
+SimulatedSource is the local stub used until real feeds are wired in: it reports a reference
+price around a callback's value (the engine passes the window median) with a fixed noise.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import random
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("validation_engine.sources")
+
+SourceKey = Tuple[str, str, str, Optional[str]]  # (source, market_id, commodity, region)
+
+
+class PriceSource(ABC):
+    """Base class for reference price sources; subclasses implement fetch()."""
+
+    name = "source"
+    timeout = 1.0
+
+    @abstractmethod
+    async def fetch(self, market_id: str, commodity: str, region: Optional[str] = None) -> Optional[float]:
+        """Reference price for the series, or None when the source has none."""
+
+
+class SimulatedSource(PriceSource):
+    """Stub source: reference(market_id, commodity, region) * (1 + N(0, sigma)), None if unknown."""
+
+    def __init__(self, name: str, sigma: float, reference: Callable[[str, str, Optional[str]], Optional[float]], timeout: float = 1.0, rng: Optional[random.Random] = None) -> None:
+        self.name = name
+        self.sigma = sigma
+        self.timeout = timeout
+        self._reference = reference
+        self._rng = rng or random.Random()
+
+    async def fetch(self, market_id: str, commodity: str, region: Optional[str] = None) -> Optional[float]:
+        ref = self._reference(market_id, commodity, region)
+        if ref is None:
+            return None
+        return ref * (1 + self._rng.gauss(0, self.sigma))
+
+
+class StaticSource(PriceSource):
+    """Stub source with fixed prices per (market_id, commodity); for tests and local setups."""
+
+    def __init__(self, name: str, prices: Dict[Tuple[str, str], float], timeout: float = 1.0, delay: float = 0.0) -> None:
+        self.name = name
+        self.prices = prices
+        self.timeout = timeout
+        self.delay = delay
+        self.calls = 0
+
+    async def fetch(self, market_id: str, commodity: str, region: Optional[str] = None) -> Optional[float]:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.prices.get((market_id, commodity))
+
+
+class SourceFanout:
+    """Concurrent, cached lookups across a list of sources."""
+
+    def __init__(self, sources: Sequence[PriceSource], ttl: float = 30.0, negative_ttl: float = 2.0, max_entries: int = 100_000) -> None:
+        self.sources: List[PriceSource] = list(sources)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, future with the price)
+        self._cache: "OrderedDict[SourceKey, Tuple[float, asyncio.Future]]" = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.failures = 0
+
+    def set_sources(self, sources: Sequence[PriceSource]) -> None:
+        self.sources = list(sources)
+        self._cache.clear()
+
+    async def _lookup(self, source: PriceSource, market_id: str, commodity: str, region: Optional[str]) -> Optional[float]:
+        self.lookups += 1
+        try:
+            price = await asyncio.wait_for(source.fetch(market_id, commodity, region), timeout=source.timeout)
+            return None if price is None else float(price)
+        except asyncio.TimeoutError:
+            self.failures += 1
+            logger.warning("price source %s timed out for %s/%s", source.name, market_id, commodity)
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("price source %s failed for %s/%s: %s", source.name, market_id, commodity, exc)
+        return None
+
+    def _get(self, source: PriceSource, market_id: str, commodity: str, region: Optional[str]) -> asyncio.Future:
+        key = (source.name, market_id, commodity, region)
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > now and not entry[1].cancelled() and entry[1].get_loop() is asyncio.get_running_loop():
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return entry[1]
+        fut = asyncio.ensure_future(self._lookup(source, market_id, commodity, region))
+        fut.add_done_callback(lambda f, key=key: self._expire_miss(key, f))
+        self._cache[key] = (now + self.ttl, fut)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return fut
+
+    def _expire_miss(self, key: SourceKey, fut: asyncio.Future) -> None:
+        # a finished lookup without a price is only kept for negative_ttl
+        if not fut.cancelled() and fut.result() is not None:
+            return
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] is fut:
+            self._cache[key] = (min(entry[0], time.monotonic() + self.negative_ttl), fut)
+
+    async def prices(self, market_id: str, commodity: str, region: Optional[str] = None) -> List[Tuple[str, Optional[float]]]:
+        """(source name, reference price or None) for every source, fetched concurrently."""
+        futs = [self._get(s, market_id, commodity, region) for s in self.sources]
+        results = await asyncio.gather(*(asyncio.shield(f) for f in futs))
+        return [(s.name, p) for s, p in zip(self.sources, results)]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "sources": [s.name for s in self.sources],
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "cached": len(self._cache),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "failures": self.failures,
+        }
+
+
+def sources_agree(value: float, prices: Sequence[Optional[float]]) -> bool:
+    """
+    True if a strict majority of the sources that answered are within 10% of value
+    (2 of 3 when all answer); with no answers there is nothing to disagree with.
+    """
+    answered = [p for p in prices if p is not None]
+    if not answered:
+        return True
+    within = sum(1 for p in answered if abs(p - value) / (value + 1e-9) < 0.1)
+    return within * 2 > len(answered)
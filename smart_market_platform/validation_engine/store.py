@@ -0,0 +1,201 @@
+"""
+Bounded store of validation windows keyed by (market_id, commodity, region).
+
+WindowStore keeps at most `capacity` RollingWindows in memory in LRU order and also drops
+windows that have not been used for `idle_seconds`. With a spill path, evicted windows are
+written to a SQLite file (values as a little-endian float64 blob) and reloaded lazily the
+next time their key is validated; flush() writes every resident window so a restart keeps
+its baselines. Without a spill path evicted windows are simply forgotten.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from .window import RollingWindow
+
+logger = logging.getLogger("validation_engine.store")
+
+WindowKey = Tuple[str, str, Optional[str]]
+
+
+class WindowSpill:
+    """SQLite table of serialized windows: key (JSON) -> maxlen, float64 values blob."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS windows (key TEXT PRIMARY KEY, maxlen INTEGER NOT NULL, data BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(key: WindowKey) -> str:
+        return json.dumps(list(key), ensure_ascii=False)
+
+    def keys(self) -> Set[WindowKey]:
+        return {tuple(json.loads(k)) for (k,) in self._conn.execute("SELECT key FROM windows")}  # type: ignore[misc]
+
+    def save(self, items) -> int:
+        rows = [
+            (self._key(key), w.maxlen, w.values().astype("<f8").tobytes(), time.time())
+            for key, w in items
+        ]
+        if rows:
+            self._conn.executemany("INSERT OR REPLACE INTO windows (key, maxlen, data, updated) VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def load(self, key: WindowKey, maxlen: int) -> Optional[RollingWindow]:
+        row = self._conn.execute("SELECT data FROM windows WHERE key = ?", (self._key(key),)).fetchone()
+        if row is None:
+            return None
+        values = np.frombuffer(row[0], dtype="<f8")
+        return RollingWindow(maxlen, values[-maxlen:].tolist())
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class WindowStore:
+    """
+    LRU + idle-time bounded mapping of window keys to RollingWindows.
+
+    get() returns the key's window, reloading it from the spill file or creating an empty one;
+    it also evicts least recently used windows beyond capacity and windows idle longer than
+    idle_seconds (0 disables idle eviction).
+    """
+
+    def __init__(self, maxlen: int, capacity: int = 10000, idle_seconds: float = 0.0, spill_path: Optional[str] = None) -> None:
+        self.maxlen = maxlen
+        self.capacity = max(1, capacity)
+        self.idle_seconds = idle_seconds
+        self._windows: "OrderedDict[WindowKey, Tuple[RollingWindow, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._spill: Optional[WindowSpill] = None
+        self._spilled: Set[WindowKey] = set()
+        if spill_path:
+            try:
+                self._spill = WindowSpill(spill_path)
+                self._spilled = self._spill.keys()
+                logger.info("validation window spill %s: %d windows on disk", spill_path, len(self._spilled))
+            except Exception as exc:
+                logger.warning("could not open validation window spill %s: %s; evicted windows will be dropped", spill_path, exc)
+                self._spill = None
+        # counters
+        self.created = 0
+        self.reloaded = 0
+        self.evicted = 0
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def __contains__(self, key: WindowKey) -> bool:
+        return key in self._windows
+
+    def get(self, key: WindowKey) -> RollingWindow:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is not None:
+                self._windows.move_to_end(key)
+                window = entry[0]
+            else:
+                window = self._reload(key)
+                if window is None:
+                    window = RollingWindow(self.maxlen)
+                    self.created += 1
+            self._windows[key] = (window, now)
+            if entry is None or self.idle_seconds > 0:
+                self._evict(now, keep=key)
+            return window
+
+    def peek(self, key: WindowKey) -> Optional[RollingWindow]:
+        """The resident window for key, without reloading, creating or touching LRU order."""
+        entry = self._windows.get(key)
+        return entry[0] if entry is not None else None
+
+    def _reload(self, key: WindowKey) -> Optional[RollingWindow]:
+        if self._spill is None or key not in self._spilled:
+            return None
+        try:
+            window = self._spill.load(key, self.maxlen)
+        except Exception as exc:
+            logger.warning("could not reload validation window %s: %s", key, exc)
+            return None
+        if window is not None:
+            self.reloaded += 1
+        return window
+
+    def _evict(self, now: float, keep: WindowKey) -> None:
+        windows = self._windows
+        out = []
+        while len(windows) > self.capacity:
+            out.append(windows.popitem(last=False))
+        if self.idle_seconds > 0:
+            cutoff = now - self.idle_seconds
+            while windows:
+                key, (_, last_used) = next(iter(windows.items()))
+                if last_used >= cutoff or key == keep:
+                    break
+                out.append(windows.popitem(last=False))
+        if out:
+            self.evicted += len(out)
+            self._save((key, w) for key, (w, _) in out)
+
+    def _save(self, items) -> None:
+        if self._spill is None:
+            return
+        items = [(key, w) for key, w in items if len(w)]
+        try:
+            self.spilled += self._spill.save(items)
+            self._spilled.update(key for key, _ in items)
+        except Exception as exc:
+            logger.warning("could not spill %d validation windows: %s", len(items), exc)
+
+    def flush(self) -> int:
+        """Write every resident window to the spill file (e.g. on shutdown); returns the count."""
+        with self._lock:
+            if self._spill is None:
+                return 0
+            before = self.spilled
+            self._save((key, w) for key, (w, _) in self._windows.items())
+            return self.spilled - before
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    def nbytes(self) -> int:
+        return sum(w.nbytes for w, _ in self._windows.values())
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "resident": len(self._windows),
+            "capacity": self.capacity,
+            "idle_seconds": self.idle_seconds,
+            "nbytes": self.nbytes(),
+            "created": self.created,
+            "reloaded": self.reloaded,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "on_disk": len(self._spilled),
+            "spill_path": self._spill.path if self._spill is not None else None,
+        }
@@ -0,0 +1,157 @@
+"""
+Rolling price window with incremental statistics for the validation detectors.
+
+RollingWindow keeps the last `maxlen` prices in a ring buffer together with:
+- running mean / sum of squared deviations (Welford's update, with the matching removal step
+  for the value leaving the window), recomputed exactly from the ring every `maxlen` updates
+  so floating point drift stays bounded
+- the same values in a sorted array (binary search for insert / remove), giving the median
+  and quartiles by index
+
+so a check costs O(log n) comparisons plus a short memmove instead of copying and sorting
+the whole window. Quantiles use numpy.percentile's default linear interpolation and the
+median follows statistics.median, so detector verdicts match the list-based versions.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    # same formula (and rounding) as numpy.percentile's linear interpolation
+    diff = b - a
+    if t >= 0.5:
+        return b - diff * (1 - t)
+    return a + diff * t
+
+
+class RollingWindow:
+    """Fixed-capacity window of floats with O(1) mean / pstdev and O(log n) order statistics."""
+
+    __slots__ = ("maxlen", "_ring", "_sorted", "_start", "_n", "_mean", "_m2", "_updates")
+
+    def __init__(self, maxlen: int, values: Optional[Iterable[float]] = None) -> None:
+        if maxlen < 1:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = maxlen
+        self._ring = np.zeros(maxlen, dtype=np.float64)
+        self._sorted = np.zeros(maxlen, dtype=np.float64)
+        self._start = 0  # index of the oldest value in _ring
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+        if values is not None:
+            for v in values:
+                self.append(v)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.values().tolist())
+
+    def values(self) -> np.ndarray:
+        """Values oldest first (a copy)."""
+        end = self._start + self._n
+        if end <= self.maxlen:
+            return self._ring[self._start:end].copy()
+        return np.concatenate((self._ring[self._start:], self._ring[: end - self.maxlen]))
+
+    @property
+    def nbytes(self) -> int:
+        return self._ring.nbytes + self._sorted.nbytes
+
+    def append(self, value: float) -> None:
+        value = float(value)
+        if self._n == self.maxlen:
+            old = float(self._ring[self._start])
+            self._ring[self._start] = value
+            self._start = (self._start + 1) % self.maxlen
+            self._sorted_remove(old, self._n)
+            self._sorted_insert(value, self._n - 1)
+            # Welford removal of `old` followed by the usual add of `value`
+            n = self._n
+            if n == 1:
+                self._mean, self._m2 = value, 0.0
+            else:
+                delta = old - self._mean
+                mean = self._mean - delta / (n - 1)
+                self._m2 -= delta * (old - mean)
+                delta = value - mean
+                self._mean = mean + delta / n
+                self._m2 += delta * (value - self._mean)
+        else:
+            self._ring[(self._start + self._n) % self.maxlen] = value
+            self._sorted_insert(value, self._n)
+            self._n += 1
+            delta = value - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (value - self._mean)
+        self._updates += 1
+        if self._updates >= self.maxlen:
+            self._rebase()
+
+    def _sorted_insert(self, value: float, n: int) -> None:
+        """Insert into the first n sorted slots (slot n must be free)."""
+        s = self._sorted
+        i = int(np.searchsorted(s[:n], value, side="right"))
+        if i < n:
+            s[i + 1:n + 1] = s[i:n]
+        s[i] = value
+
+    def _sorted_remove(self, value: float, n: int) -> None:
+        """Remove one occurrence of value from the first n sorted slots."""
+        s = self._sorted
+        i = int(np.searchsorted(s[:n], value, side="left"))
+        s[i:n - 1] = s[i + 1:n]
+
+    def _rebase(self) -> None:
+        """Recompute mean / m2 exactly from the ring (amortized O(1) per append)."""
+        self._updates = 0
+        vals = self.values()
+        if not len(vals):
+            self._mean = self._m2 = 0.0
+            return
+        self._mean = math.fsum(vals.tolist()) / len(vals)
+        self._m2 = math.fsum(((vals - self._mean) ** 2).tolist())
+
+    # statistics
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    def pstdev(self) -> float:
+        n = self._n
+        if n == 0 or self._sorted[0] == self._sorted[n - 1]:
+            return 0.0  # constant window: exactly zero, not rounding noise
+        return math.sqrt(max(self._m2, 0.0) / n)
+
+    def percentile(self, q: float) -> float:
+        """numpy.percentile(window, q) (linear interpolation)."""
+        n = self._n
+        if n == 0:
+            raise ValueError("percentile of an empty window")
+        quantile = q / 100
+        virtual = n * quantile + (1 - quantile) - 1
+        lo = int(math.floor(virtual))
+        lo = min(max(lo, 0), n - 1)
+        hi = min(lo + 1, n - 1)
+        return _lerp(float(self._sorted[lo]), float(self._sorted[hi]), virtual - math.floor(virtual))
+
+    def median(self) -> float:
+        """statistics.median(window)."""
+        n = self._n
+        if n == 0:
+            raise ValueError("median of an empty window")
+        i = n // 2
+        if n % 2:
+            return float(self._sorted[i])
+        return (float(self._sorted[i - 1]) + float(self._sorted[i])) / 2
+
+    def tolist(self) -> List[float]:
+        return self.values().tolist()
@@ -59,8 +59,10 @@ def load_config() -> Dict[str, Any]:
     """Return a dict of runtime configuration pulled from environment variables."""
     cfg = {
         "MARKET_ID": get_env("MARKET_ID", "PASAR-001"),
-        "PUSH_MODE": get_env("PUSH_MODE", "mqtt"),  # or http
+        "PUSH_MODE": get_env("PUSH_MODE", "mqtt"),  # or http / stream
         "HTTP_ENDPOINT": get_env("HTTP_ENDPOINT", "http://localhost:8000/ingest"),
+        "HTTP_STREAM_ENDPOINT": get_env("HTTP_STREAM_ENDPOINT", "http://localhost:8000/ingest/stream"),
+        "STREAM_ROTATE_LINES": int(get_env("STREAM_ROTATE_LINES", 1800)),
         "MQTT_BROKER": get_env("MQTT_BROKER", "localhost"),
         "MQTT_PORT": int(get_env("MQTT_PORT", 1883)),
         "MQTT_TOPIC": get_env("MQTT_TOPIC", "pasar/data"),
@@ -0,0 +1,180 @@
+"""
+Compiled factor tables for the impact engine.
+
+A factor table maps factor names to signed base multipliers. Everything compute_impact derives
+from it (normalized shares, dominant factor, concentration) is independent of the price change,
+so a FactorTable computes those once and every result shares its immutable weights mapping.
+
+FactorTableRegistry resolves the table for a (commodity, region) pair, optionally from a JSON
+config file that is reloaded when it changes:
+
+    {
+      "default": {"weather": 0.9, "pests": 0.8, ...},
+      "tables": [
+        {"commodity": "cabai", "region": "JAKARTA", "factors": {"weather": 1.2, ...}},
+        {"commodity": "beras", "factors": {...}},
+        {"region": "PAPUA", "factors": {...}}
+      ]
+    }
+
+Lookup order: (commodity, region), (commodity, any region), (any commodity, region), default.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger("smart_market_stream.factor_tables")
+
+
+class FrozenWeights(dict):
+    """Read-only dict shared by many results (still a dict, so it JSON-encodes as one)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("factor weights are shared and read-only; copy them with dict(...) to modify")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly  # type: ignore
+
+    def __copy__(self) -> Dict[str, float]:
+        return dict(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FactorTable:
+    """
+    A factor table compiled once: shares, dominant factor and concentration are precomputed.
+
+    shares      : unrounded percentages abs(base) / sum(abs(base)) * 100
+    weights     : shares rounded to 2 decimals (what results report), read-only
+    neutral     : all-zero weights for unchanged prices, read-only
+    dominant    : factor with the largest share (first one on ties), or "none" for an empty table
+    concentration: dominant share / 100
+    """
+
+    __slots__ = ("name", "version", "factors", "names", "shares", "weights", "neutral", "dominant", "dominant_index", "concentration")
+
+    def __init__(self, factors: Mapping[str, float], name: str = "default", version: int = 0) -> None:
+        self.name = name
+        self.version = version
+        self.factors: Dict[str, float] = FrozenWeights({f: float(b) for f, b in factors.items()})
+        self.names: Tuple[str, ...] = tuple(self.factors)
+        bases = [abs(b) for b in self.factors.values()]
+        total = sum(bases) or 1.0
+        self.shares: Tuple[float, ...] = tuple(b / total * 100.0 for b in bases)
+        self.weights: Dict[str, float] = FrozenWeights({f: round(s, 2) for f, s in zip(self.names, self.shares)})
+        self.neutral: Dict[str, float] = FrozenWeights({f: 0.0 for f in self.names})
+        if self.names:
+            self.dominant_index = max(range(len(self.names)), key=lambda i: self.shares[i])
+            self.dominant = self.names[self.dominant_index]
+            self.concentration = self.shares[self.dominant_index] / 100.0
+        else:
+            self.dominant_index = -1
+            self.dominant = "none"
+            self.concentration = 0.0
+
+    def __repr__(self) -> str:
+        return f"FactorTable({self.name!r}, version={self.version}, dominant={self.dominant!r})"
+
+
+_COMPILED: Dict[Tuple[Tuple[str, float], ...], FactorTable] = {}
+_COMPILED_MAX = 256
+
+
+def compile_table(table) -> FactorTable:
+    """FactorTable for a plain dict (cached by content) or an already compiled table."""
+    if isinstance(table, FactorTable):
+        return table
+    key = tuple(table.items())
+    compiled = _COMPILED.get(key)
+    if compiled is None:
+        if len(_COMPILED) >= _COMPILED_MAX:
+            _COMPILED.clear()
+        compiled = _COMPILED[key] = FactorTable(table, name="custom")
+    return compiled
+
+
+class FactorTableRegistry:
+    """
+    Resolves the compiled FactorTable for a commodity / region.
+
+    With a config path, the file's mtime is checked at most every `check_interval` seconds
+    on lookup and the tables are recompiled when it changed. A file that fails to parse is
+    logged and the previous tables stay in use. `version` increases on every (re)load.
+    """
+
+    def __init__(self, default: Mapping[str, float], path: Optional[str] = None, check_interval: float = 5.0) -> None:
+        self._builtin_default = dict(default)
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self.default = FactorTable(self._builtin_default, "default", 0)
+        self._tables: Dict[Tuple[Optional[str], Optional[str]], FactorTable] = {}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        if path:
+            self._maybe_reload(force=True)
+
+    def get(self, commodity: Optional[str] = None, region: Optional[str] = None) -> FactorTable:
+        if self.path:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._maybe_reload(now=now)
+        tables = self._tables
+        if tables:
+            t = tables.get((commodity, region)) or tables.get((commodity, None)) or tables.get((None, region))
+            if t is not None:
+                return t
+        return self.default
+
+    def overrides(self) -> Dict[Tuple[Optional[str], Optional[str]], FactorTable]:
+        """The per commodity/region tables currently loaded (without the default)."""
+        return dict(self._tables)
+
+    def _maybe_reload(self, force: bool = False, now: Optional[float] = None) -> None:
+        if not self._reload_lock.acquire(blocking=False):
+            return  # another thread is already reloading
+        try:
+            self._next_check = (time.monotonic() if now is None else now) + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                if self._mtime is not None or force:
+                    logger.warning("factor table config %s not readable; using built-in default", self.path)
+                    self._install(self._builtin_default, [], None)
+                return
+            if not force and mtime == self._mtime:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    cfg = json.load(f)
+                default = cfg.get("default") or self._builtin_default
+                entries = cfg.get("tables") or []
+                self._install(default, entries, mtime)
+                logger.info("loaded factor tables from %s (version %d, %d overrides)", self.path, self.version, len(self._tables))
+            except Exception as exc:
+                self._mtime = mtime  # don't retry the same broken file until it changes again
+                logger.warning("could not load factor tables from %s: %s; keeping previous tables", self.path, exc)
+        finally:
+            self._reload_lock.release()
+
+    def _install(self, default: Mapping[str, float], entries, mtime: Optional[float]) -> None:
+        version = self.version + 1
+        tables: Dict[Tuple[Optional[str], Optional[str]], FactorTable] = {}
+        for e in entries:
+            commodity, region = e.get("commodity"), e.get("region")
+            if commodity is None and region is None:
+                raise ValueError("table entry needs a commodity and/or region")
+            name = f"{commodity or '*'}/{region or '*'}"
+            tables[(commodity, region)] = FactorTable(e["factors"], name, version)
+        # swap in complete state only after everything compiled
+        self.default = FactorTable(default, "default", version)
+        self._tables = tables
+        self._mtime = mtime
+        self.version = version
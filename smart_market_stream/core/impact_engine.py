@@ -12,8 +12,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
 import math
+import os
+
+import numpy as np
+
+from .factor_tables import FactorTable, FactorTableRegistry, compile_table
 
 
 @dataclass
@@ -39,17 +44,46 @@ DEFAULT_FACTOR_TABLE: Dict[str, float] = {
 }
 
 
+# Per commodity/region tables; IMPACT_FACTOR_TABLES points to an optional JSON config
+# (see factor_tables.py) that is reloaded when the file changes.
+factor_tables = FactorTableRegistry(
+    DEFAULT_FACTOR_TABLE,
+    path=os.getenv("IMPACT_FACTOR_TABLES") or None,
+    check_interval=float(os.getenv("IMPACT_FACTOR_TABLES_CHECK_SECONDS", "5")),
+)
+
+FactorTableLike = Union[FactorTable, Dict[str, float]]
+
+
 def _clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, v))
 
 
+def resolve_table(factor_table: FactorTableLike = None, commodity: str | None = None, region: str | None = None) -> FactorTable:
+    """Compiled table for an explicit override, else the registry's table for commodity/region."""
+    if factor_table is None:
+        return factor_tables.get(commodity, region)
+    return compile_table(factor_table)
+
+
+def factor_weights(factor_table: FactorTableLike = None, commodity: str | None = None, region: str | None = None) -> Dict[str, float]:
+    """
+    Normalized factor shares (percent, rounded like compute_impact) for any non-zero price change.
+
+    abs(base) * magnitude / sum(abs(base) * magnitude) does not depend on the magnitude, so the
+    shares are a property of the factor table alone (a zero change yields all-zero weights).
+    The returned mapping is the table's shared read-only weights.
+    """
+    return resolve_table(factor_table, commodity, region).weights
+
+
 def compute_impact(
     prev_price: float | None,
     new_price: float,
     commodity: str | None = None,
     market_id: str | None = None,
     region: str | None = None,
-    factor_table: Dict[str, float] = None,
+    factor_table: FactorTableLike = None,
     timestamp: datetime | None = None,
 ) -> ImpactResult:
     """
@@ -58,14 +92,15 @@ def compute_impact(
     Args:
         prev_price: previous price value or None if not available.
         new_price: current price.
-        commodity, market_id, region: optional context (not used in this heuristic but provided for extensibility).
-        factor_table: optional override of DEFAULT_FACTOR_TABLE.
+        commodity, region: select the factor table from `factor_tables` (per commodity/region
+            overrides, else the default table); market_id is accepted for extensibility.
+        factor_table: optional override (dict or compiled FactorTable) of the registry table.
 
     Returns:
-        ImpactResult with price_change (relative), impact_score (0-100), dominant_factor and factors_with_weights.
+        ImpactResult with price_change (relative), impact_score (0-100), dominant_factor and
+        factors_with_weights (the table's shared read-only mapping).
     """
-    if factor_table is None:
-        factor_table = DEFAULT_FACTOR_TABLE
+    table = resolve_table(factor_table, commodity, region)
 
     # Compute relative price change
     if prev_price is None or prev_price <= 0:
@@ -75,50 +110,129 @@ def compute_impact(
 
     magnitude = abs(price_change)  # 0.0 .. inf
 
-    # If no meaningful change, return neutral impact
-    if math.isclose(magnitude, 0.0, abs_tol=1e-9):
-        neutral_weights = {k: 0.0 for k in factor_table.keys()}
+    # If no meaningful change (or no factors), return neutral impact
+    if magnitude <= 1e-9 or not table.names:
         return ImpactResult(
             price_change=0.0,
             impact_score=0.0,
             dominant_factor="none",
-            factors_with_weights=neutral_weights,
+            factors_with_weights=table.neutral,
         )
 
-    # Compute raw influence scores per factor: abs(base_multiplier) * magnitude
-    raw: Dict[str, float] = {}
-    for factor, base in factor_table.items():
-        # The idea: factors with larger absolute base are more capable of explaining the price movement
-        raw_score = abs(base) * magnitude
-        # Optionally tweak by commodity/region heuristics here (not implemented)
-        raw[factor] = raw_score
-
-    # Normalize raw scores to percentages (sum to 100)
-    total_raw = sum(raw.values()) or 1.0
-    normalized = {f: (raw[f] / total_raw) * 100.0 for f in raw}
-
-    # Determine dominant factor (largest normalized share)
-    dominant_factor = max(normalized.items(), key=lambda it: it[1])[0]
-
-    # Compute an overall impact_score on 0-100 scale.
-    # Heuristic: impact should grow with magnitude but capped. We scale magnitude such that
-    # 1.0 (100% change) yields a very strong impact (clamped to 100).
-    # We apply a small boost based on concentration (if dominant factor is very dominant -> higher score).
-    concentration = normalized[dominant_factor] / 100.0  # 0..1
-    # base_score proportional to magnitude, scaled to 0..100 range:
+    # Factor shares abs(base) * magnitude / sum(abs(base) * magnitude) do not depend on the
+    # magnitude: weights, dominant factor and concentration come precompiled with the table.
+    # Overall impact_score on 0-100 scale: grows with magnitude (1.0 = 100% change is clamped
+    # to 100), plus a boost of up to +20% when the dominant factor is very dominant.
     base_score = _clamp(magnitude * 500.0, 0.0, 100.0)
-    # boost proportional to concentration (0..1) up to +20%
-    boost = base_score * (concentration * 0.2)
-    impact_score = _clamp(base_score + boost, 0.0, 100.0)
+    impact_score = _clamp(base_score + base_score * (table.concentration * 0.2), 0.0, 100.0)
 
     # Round values for cleaner JSON
-    normalized_rounded = {k: round(v, 2) for k, v in normalized.items()}
-    impact_score_rounded = round(impact_score, 2)
-    price_change_rounded = round(price_change, 6)
-
     return ImpactResult(
-        price_change=price_change_rounded,
-        impact_score=impact_score_rounded,
-        dominant_factor=dominant_factor,
-        factors_with_weights=normalized_rounded,
-    )
\ No newline at end of file
+        price_change=round(price_change, 6),
+        impact_score=round(impact_score, 2),
+        dominant_factor=table.dominant,
+        factors_with_weights=table.weights,
+    )
+
+
+def round_list(values: np.ndarray, digits: int) -> List[float]:
+    """
+    Same values as [round(v, digits) for v in values], without a Python round per element.
+
+    rint(v * 10**digits) / 10**digits only differs from Python's correctly rounded round()
+    when the scaled value sits (within float error) on a .5 boundary, or is huge; those few
+    elements are rounded with round() itself.
+    """
+    scale = 10.0 ** digits
+    scaled = values * scale
+    out = np.rint(scaled) / scale
+    frac = np.abs(scaled - np.trunc(scaled))
+    unsure = np.nonzero((np.abs(frac - 0.5) < 1e-6) | ~(np.abs(scaled) < 1e12))[0]
+    result = out.tolist()
+    for i in unsure.tolist():
+        result[i] = round(float(values[i]), digits)
+    return result
+
+
+@dataclass
+class ImpactBatch:
+    """
+    Vectorized impact results, one row per input price.
+
+    price_change and impact_score are unrounded float64 arrays; dominant holds indexes into
+    factor_names (-1 where the change is zero and the dominant factor is "none"). All rows
+    share one compiled table: its weights mapping applies to every non-neutral row (neutral
+    rows have table.neutral), so it is not repeated per row.
+    """
+
+    price_change: np.ndarray
+    impact_score: np.ndarray
+    dominant: np.ndarray
+    table: FactorTable
+
+    @property
+    def factor_names(self) -> Tuple[str, ...]:
+        return self.table.names
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return self.table.weights
+
+    def __len__(self) -> int:
+        return len(self.price_change)
+
+    def rounded(self) -> Tuple[List[float], List[float], List[str]]:
+        """
+        price_change / impact_score lists rounded exactly like compute_impact (Python round,
+        not numpy's scaled rounding) and dominant factor names.
+        """
+        names = self.factor_names + ("none",)  # index -1 -> "none"
+        return (
+            round_list(self.price_change, 6),
+            round_list(self.impact_score, 2),
+            [names[i] for i in self.dominant.tolist()],
+        )
+
+
+def compute_impact_batch(
+    prev_prices: Sequence[float] | np.ndarray,
+    new_prices: Sequence[float] | np.ndarray,
+    factor_table: FactorTableLike = None,
+) -> ImpactBatch:
+    """
+    compute_impact for many prices at once, all with the same factor table.
+
+    Args:
+        prev_prices: previous prices; NaN (or None in a list) where no previous price exists.
+        new_prices: current prices, same length.
+        factor_table: dict or compiled FactorTable shared by all rows (default: the registry's
+            default table). Callers mixing commodities with their own tables group rows by
+            resolve_table() and call once per table.
+
+    Returns:
+        ImpactBatch; rounded() reproduces compute_impact's values row by row.
+    """
+    table = resolve_table(factor_table)
+    prev = np.asarray(prev_prices, dtype=np.float64)
+    new = np.asarray(new_prices, dtype=np.float64)
+    if prev.shape != new.shape:
+        raise ValueError("prev_prices and new_prices must have the same length")
+
+    # relative change; missing or non-positive previous price -> 0
+    valid = prev > 0  # False for NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(valid, (new - prev) / np.where(valid, prev, 1.0), 0.0)
+    magnitude = np.abs(change)
+    moving = magnitude > 1e-9
+    if not table.names:
+        moving[:] = False
+
+    base_score = np.clip(magnitude * 500.0, 0.0, 100.0)
+    score = np.clip(base_score + base_score * (table.concentration * 0.2), 0.0, 100.0)
+
+    return ImpactBatch(
+        price_change=np.where(moving, change, 0.0),
+        impact_score=np.where(moving, score, 0.0),
+        dominant=np.where(moving, table.dominant_index, -1).astype(np.int16),
+        table=table,
+    )
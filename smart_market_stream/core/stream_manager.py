@@ -103,6 +103,13 @@ class MarketDataStream:
             ok = await client.send(payload)
             if not ok:
                 LOGGER.warning("Failed to push payload over HTTP")
+        elif mode == "stream":
+            # keep the client so every reading goes into the same long-lived request
+            if self.http_client is None:
+                self.http_client = HTTPClient()
+            ok = await self.http_client.send_stream(payload)
+            if not ok:
+                LOGGER.warning("Failed to push payload over HTTP stream")
         else:
             client = self.mqtt_client or MQTTClient()
             ok = await client.send(payload)
@@ -1,15 +1,19 @@
 """
 HTTP client to push market data to cloud server using aiohttp.
+
+send() posts one JSON payload per request; send_stream() writes payloads as NDJSON lines
+into one long-lived chunked request to the platform's /ingest/stream endpoint.
 """
 from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import aiohttp
 
 from ..core.config import LOGGER, load_config
+from .ndjson_stream import NDJSONStream
 
 
 class HTTPClient:
@@ -17,11 +21,27 @@ class HTTPClient:
     Async HTTP client to push JSON payloads to a configured HTTP endpoint.
     """
 
-    def __init__(self, endpoint: Optional[str] = None, session: Optional[aiohttp.ClientSession] = None) -> None:
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        stream_endpoint: Optional[str] = None,
+        requeue: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> None:
         cfg = load_config()
         self.endpoint = endpoint or cfg["HTTP_ENDPOINT"]
+        self.stream_endpoint = stream_endpoint or cfg["HTTP_STREAM_ENDPOINT"]
         self.session = session
         self._internal_session: Optional[aiohttp.ClientSession] = None
+        # payloads of a failed stream go to requeue(payloads), or into the next stream
+        self._stream = NDJSONStream(
+            self.stream_endpoint,
+            self._ensure_session,
+            cfg["STREAM_ROTATE_LINES"],
+            requeue=requeue,
+            dumps=lambda payload: json.dumps(payload, default=str),
+            logger=LOGGER,
+        )
 
     async def _ensure_session(self) -> aiohttp.ClientSession:
         if self.session:
@@ -54,7 +74,16 @@ class HTTPClient:
             LOGGER.exception("HTTPClient error: %s", exc)
             return False
 
+    async def send_stream(self, payload: Dict[str, Any]) -> bool:
+        """
+        Write payload as one NDJSON line into the long-lived stream request (opened on demand).
+        Payloads are confirmed per stream; see NDJSONStream for the retry/requeue rules.
+        """
+        self._stream.send(payload)
+        return True
+
     async def close(self) -> None:
+        await self._stream.close()
         if self._internal_session:
             await self._internal_session.close()
             self._internal_session = None
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Client side of the platform's /ingest/stream endpoint: payloads written as NDJSON lines into
+one long-lived chunked POST. Shared by smart_market_stream's and device_client's HTTP clients.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import aiohttp
+
+# unconfirmed stream payloads kept in memory for the next stream when no requeue callback is set
+MAX_STREAM_RETRY = 10000
+
+
+class NDJSONStream:
+    """
+    Writes payloads into a stream request opened on demand and rotated every rotate_lines lines.
+
+    The server only confirms a stream as a whole, with its summary response when the body ends
+    (rotation or close()). Until then payloads are kept as pending; if the stream fails
+    (connection error or non-2xx reply) every pending payload is handed to requeue() or, without
+    one, resent at the start of the next stream. Delivery is therefore at least once: lines the
+    server took before a failure may arrive twice.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session: Callable[[], Awaitable[aiohttp.ClientSession]],
+        rotate_lines: int,
+        headers: Optional[Dict[str, str]] = None,
+        requeue: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        dumps: Callable[[Dict[str, Any]], str] = json.dumps,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.url = url
+        self._session = session
+        self.rotate_lines = rotate_lines
+        self.headers = {"Content-Type": "application/x-ndjson", **(headers or {})}
+        self._dumps = dumps
+        self._log = logger or logging.getLogger("smart_market_stream.ndjson_stream")
+        # queue feeding the open request body, and its request task
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # payloads written into the open stream, not yet confirmed by its summary response
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        # where payloads of a failed stream go: requeue(payloads) if given, else _retry,
+        # which is written first into the next stream
+        self._requeue = requeue
+        self._retry: Deque[Dict[str, Any]] = deque(maxlen=MAX_STREAM_RETRY)
+
+    def send(self, payload: Dict[str, Any]) -> None:
+        """Queue payload as one NDJSON line, opening a stream if none is open."""
+        if self._queue is None:
+            queue: asyncio.Queue = asyncio.Queue()
+            pending: List[Dict[str, Any]] = []
+            self._queue = queue
+            self._pending = pending
+            self._task = asyncio.create_task(self._run(queue, pending))
+            while self._retry:
+                self._queue_line(self._retry.popleft())
+        self._queue_line(payload)
+
+    def _queue_line(self, payload: Dict[str, Any]) -> None:
+        assert self._queue is not None and self._pending is not None
+        self._pending.append(payload)
+        self._queue.put_nowait((self._dumps(payload) + "\n").encode("utf-8"))
+
+    def _detach(self, queue: asyncio.Queue) -> None:
+        # new payloads go to the next stream from now on
+        if self._queue is queue:
+            self._queue = None
+            self._pending = None
+
+    def _requeue_pending(self, pending: List[Dict[str, Any]]) -> None:
+        if not pending:
+            return
+        if self._requeue is not None:
+            try:
+                self._requeue(list(pending))
+            except Exception as exc:
+                self._log.error("could not requeue %d unconfirmed stream payload(s): %s", len(pending), exc)
+        else:
+            self._retry.extend(pending)
+        pending.clear()
+
+    async def _body(self, queue: asyncio.Queue):
+        # Request body generator: yields queued lines until close() or rotation
+        sent = 0
+        while True:
+            line = await queue.get()
+            if line is None:
+                return
+            yield line
+            sent += 1
+            if sent >= self.rotate_lines:
+                # detach first so new readings open the next stream, then drain what's left
+                self._detach(queue)
+                while not queue.empty():
+                    line = queue.get_nowait()
+                    if line is None:
+                        return
+                    yield line
+                return
+
+    async def _run(self, queue: asyncio.Queue, pending: List[Dict[str, Any]]) -> None:
+        session = await self._session()
+        try:
+            timeout = aiohttp.ClientTimeout(total=None)
+            async with session.post(self.url, data=self._body(queue), headers=self.headers, timeout=timeout) as resp:
+                text = await resp.text()
+                if 200 <= resp.status < 300:
+                    self._log.info("HTTP stream to %s closed status=%s summary=%s", self.url, resp.status, text)
+                    pending.clear()  # confirmed by the summary
+                else:
+                    self._log.warning("HTTP stream rejected status=%s body=%s; %d payload(s) requeued", resp.status, text, len(pending))
+        except Exception as exc:
+            self._log.warning("HTTP stream error: %s; %d payload(s) requeued", exc, len(pending))
+        finally:
+            self._detach(queue)
+            self._requeue_pending(pending)
+
+    async def close(self, timeout: float = 10) -> None:
+        """End the open stream body and wait for the server's summary."""
+        if self._queue is not None:
+            self._queue.put_nowait(None)
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except Exception:
+                self._log.debug("HTTP stream did not finish cleanly on close")
+            self._task = None
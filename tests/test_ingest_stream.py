@@ -0,0 +1,60 @@
+"""
+/ingest/stream: NDJSON lines are applied as the body arrives and every bad line (invalid
+JSON, invalid payload, oversized) is reported in the summary without ending the stream.
+/ingest/batch shares its payload handling; its per-item summary shape is checked here too.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from smart_market_platform.ingest import routes
+from smart_market_platform.main import app
+
+
+def _line(market_id: str, price: float) -> bytes:
+    payload = {"timestamp": datetime.now(timezone.utc).isoformat(), "market_id": market_id, "prices": {"beras": price}}
+    return (json.dumps(payload) + "\n").encode()
+
+
+def test_oversized_line_is_rejected_alone():
+    big = b'{"market_id": "' + b"x" * (routes.MAX_STREAM_LINE_BYTES + 10) + b'"}\n'
+    chunks = [_line("s1", 100.0), big[:1000], big[1000:], _line("s1", 101.0), b"not json\n"]
+    with TestClient(app) as client:
+        resp = client.post("/ingest/stream", content=iter(chunks), headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    out = resp.json()
+    assert (out["lines"], out["accepted"], out["rejected"]) == (4, 2, 2)
+    assert [e["line"] for e in out["errors"]] == [2, 4]
+    assert "exceeds" in out["errors"][0]["error"]
+
+
+def test_lines_are_validated_in_batches(monkeypatch):
+    calls = []
+    real = routes._validation_stage
+
+    async def counting(payloads):
+        calls.append(len(payloads))
+        return await real(payloads)
+
+    monkeypatch.setattr(routes, "_validation_stage", counting)
+    monkeypatch.setattr(routes, "STREAM_FLUSH_LINES", 4)
+    chunks = [_line("s2", 100.0 + i % 2) for i in range(10)]
+    with TestClient(app) as client:
+        resp = client.post("/ingest/stream", content=iter(chunks), headers={"Content-Type": "application/x-ndjson"})
+    out = resp.json()
+    assert (out["accepted"], out["processed"]) == (10, 10)
+    assert sum(calls) == 10 and max(calls) <= 4 and len(calls) < 10
+
+
+def test_batch_items_always_report_processed(monkeypatch):
+    body = _line("b1", 100.0) + b"not json\n"
+    with TestClient(app) as client:
+        with_manager = client.post("/ingest/batch", content=body, headers={"Content-Type": "application/x-ndjson"}).json()
+        monkeypatch.setattr(routes, "realtime_manager", None)
+        without = client.post("/ingest/batch", content=body, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert with_manager["items"][0]["processed"] == 1
+    assert without["items"][0]["processed"] == 0 and "note" in without
+    assert "processed" not in without["items"][1]  # rejected line
@@ -0,0 +1,66 @@
+"""
+Late points replayed into the realtime manager (confirmed quarantined prices): latest keeps
+the market's other commodities, and a revised daily bucket reaches the forecast models.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from market_realtime_dashboard.manager import RealtimeManager
+from market_realtime_dashboard.rollups import RollupSeries
+from smart_market_platform.forecast_engine.online import DAY_SECONDS, ForecastModels
+
+DAY0 = 20000 * DAY_SECONDS
+
+
+def test_late_point_revises_closed_bucket():
+    series = RollupSeries(DAY_SECONDS, 10)
+    assert series.update(DAY0 + 10, 100.0) is None
+    closed = series.update(DAY0 + DAY_SECONDS, 110.0)
+    assert closed == (DAY0, 100.0, 100.0, 100.0, 100.0, 1, 100.0)
+    revised = series.update(DAY0 + 20, 120.0)
+    assert revised == (DAY0, 100.0, 120.0, 100.0, 100.0, 2, 220.0)  # open/close kept
+    assert series.late_dropped == 0
+
+
+def test_late_point_without_bucket_is_dropped():
+    series = RollupSeries(DAY_SECONDS, 10)
+    series.update(DAY0, 100.0)
+    series.update(DAY0 + 2 * DAY_SECONDS, 100.0)
+    series.update(DAY0 + 3 * DAY_SECONDS, 100.0)
+    # day 1 had no point, so there is no bucket to revise
+    assert series.update(DAY0 + DAY_SECONDS, 500.0) is None
+    assert series.late_dropped == 1
+
+
+def _at(day: int, hour: int = 12) -> datetime:
+    return datetime.fromtimestamp(DAY0 + day * DAY_SECONDS + hour * 3600, tz=timezone.utc)
+
+
+def test_replay_merges_latest_and_reaches_forecast_models():
+    async def scenario():
+        manager = RealtimeManager()
+        models = ForecastModels(30)
+        models.attach(manager)
+        for day in range(5):
+            await manager.process_payload(_at(day), "m1", {"beras": 100.0 + day, "cabai": 50.0}, region="r")
+        trend = models.get("beras", "r", "m1")
+        before = trend.version
+        # confirmed price for the closed day 2 (mean 102 -> (102 + 202) / 2)
+        await manager.replay_point((_at(2, 18)).timestamp(), "m1", "beras", 202.0, region="r")
+        assert trend.version > before
+        assert dict(zip(*trend.observations()))[20002.0] == 152.0
+        assert len(trend) == 4  # day replaced, not added
+        # older than latest: latest unchanged
+        assert manager.latest["m1"]["prices"] == {"beras": 104.0, "cabai": 50.0}
+
+        # newest point: merged into latest, other commodities kept
+        ts = _at(4) + timedelta(hours=1)
+        await manager.replay_point(ts.timestamp(), "m1", "beras", 105.0, region="r")
+        latest = manager.latest["m1"]
+        assert latest["prices"] == {"beras": 105.0, "cabai": 50.0}
+        assert set(latest["impacts"]) == {"beras", "cabai"}
+        assert latest["timestamp"] == ts
+
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+"""
+Differential tests: the validation detectors on a RollingWindow must give the same verdicts
+(and quarantine decisions) as on the plain list of the window's prices.
+"""
+from __future__ import annotations
+
+import random
+import statistics
+from collections import deque
+
+import numpy as np
+import pytest
+
+from smart_market_platform.validation_engine.engine import ai_anomaly_detector, iqr_outlier, zscore_outlier
+from smart_market_platform.validation_engine.window import RollingWindow
+
+
+def _replay(prices, sources_ok, maxlen):
+    """Validate every price against both windows; returns the (list, rolling) verdicts."""
+    ref_window = deque(maxlen=maxlen)
+    window = RollingWindow(maxlen)
+    ref, new = [], []
+    for value, multi_ok in zip(prices, sources_ok):
+        for w, out, accepted in ((list(ref_window), ref, ref_window), (window, new, window)):
+            z = bool(zscore_outlier(w, value))
+            iq = bool(iqr_outlier(w, value))
+            ai = bool(ai_anomaly_detector(w, value))
+            quarantined = sum((z, iq, ai, not multi_ok)) >= 2
+            if not quarantined:
+                accepted.append(value)
+            out.append((z, iq, ai, quarantined))
+        assert window.tolist() == list(ref_window)
+    return ref, new
+
+
+def _stream(n, seed):
+    rnd = random.Random(seed)
+    base = 15000.0
+    prices = []
+    for _ in range(n):
+        base *= 1 + rnd.gauss(0, 0.0005)
+        r = rnd.random()
+        if r < 0.03:
+            prices.append(base * rnd.choice([0.3, 2.5, 4.0]))  # spike
+        elif r < 0.15 and prices:
+            prices.append(prices[-1])  # repeated reading
+        else:
+            prices.append(round(base * (1 + rnd.gauss(0, 0.02)), rnd.choice([0, 2])))
+    return prices, [rnd.random() > 0.05 for _ in range(n)]
+
+
+@pytest.mark.parametrize("maxlen", [1, 2, 3, 4, 10, 11, 64, 500])
+@pytest.mark.parametrize("seed", [1, 7, 11])
+def test_random_stream_same_verdicts(maxlen, seed):
+    prices, sources_ok = _stream(3 * maxlen + 200, seed)
+    ref, new = _replay(prices, sources_ok, maxlen)
+    assert new == ref
+
+
+@pytest.mark.parametrize("maxlen", [1, 5, 12])
+def test_all_equal_values(maxlen):
+    prices = [15000.0] * (3 * maxlen) + [15001.0, 30000.0, 15000.0]
+    ref, new = _replay(prices, [True] * len(prices), maxlen)
+    assert new == ref
+    window = RollingWindow(maxlen, [15000.0] * maxlen)
+    assert window.pstdev() == 0.0  # constant window: exactly zero, like statistics.pstdev
+    assert not zscore_outlier(window, 1e9)
+
+
+def test_repeated_values():
+    prices = [float(v) for v in [100, 100, 101, 100, 99, 100, 100, 101, 101, 99] * 20 + [250, 100, 40, 100]]
+    ref, new = _replay(prices, [True, False] * (len(prices) // 2), 16)
+    assert new == ref
+
+
+@pytest.mark.parametrize("maxlen", [4, 10, 11])
+def test_eviction_at_window_boundary(maxlen):
+    # fill the window exactly, then push the oldest (and smallest / largest) values out one by one
+    prices = [1000.0 + 10 * i for i in range(maxlen)] + [900.0, 2000.0] + [1000.0 + 10 * i for i in range(maxlen)]
+    ref, new = _replay(prices, [True] * len(prices), maxlen)
+    assert new == ref
+
+    window = RollingWindow(maxlen, range(maxlen))
+    window.append(maxlen)  # evicts 0
+    values = list(range(1, maxlen + 1))
+    assert window.tolist() == values
+    assert window.mean == pytest.approx(statistics.mean(values))
+    assert window.pstdev() == pytest.approx(statistics.pstdev(values))
+    assert window.median() == statistics.median(values)
+    for q in (25, 75):
+        assert window.percentile(q) == np.percentile(values, q)
+
+
+def test_window_smaller_than_two():
+    window = RollingWindow(1)
+    assert not zscore_outlier(window, 5.0) and not zscore_outlier([], 5.0)
+    window.append(10.0)
+    window.append(20.0)  # maxlen 1: replaces 10
+    assert window.tolist() == [20.0]
+    assert window.median() == 20.0 and window.percentile(25) == 20.0
+    assert zscore_outlier(window, 1e6) == zscore_outlier([20.0], 1e6) is False
+    with pytest.raises(ValueError):
+        RollingWindow(0)